@@ -4,6 +4,14 @@ Example script demonstrating NER API usage
 
 import requests
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ner_client import NERClient
 
 
 def main():
@@ -60,6 +68,19 @@ def main():
     print(f"Input: {len(texts)} texts")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     
+    # 5. Client library: pooled connections, coalesced calls, retries
+    print("\n5. Client Library")
+    print("-" * 40)
+    with NERClient(BASE_URL) as client:
+        # Single calls from concurrent threads share /extract/batch requests
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(client.extract, texts * 4))
+        print(f"{len(results)} extract calls in {client.stats()['coalesced_batches']} batch requests")
+        
+        # Large batches are sent in chunks and results are yielded as they arrive
+        for text, result in zip(texts, client.stream_batch(iter(texts), chunk_size=2)):
+            print(f"  {text[:40]:40} -> {[entity['text'] for entity in result['entities']]}")
+    
     print("\n" + "=" * 80)
 
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Benchmark alias index build, open and lookup cost against dictionary size.
+
+Synthetic dictionaries of increasing size are compiled and memory-mapped,
+then looked up with known aliases (in a different case) and unknown ones.
+Lookup cost should stay flat as the dictionary grows, and opening the index
+should not depend on its size since nothing is read until it is probed. An
+in-process dict of the normalized aliases is timed as a baseline; it has to
+be rebuilt, and held, by every worker.
+
+Usage:
+    python scripts/benchmark_alias_index.py --sizes 10000 100000 1000000
+"""
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.aliases import AliasIndex, compile_aliases
+from ner_service.analytics import normalize_entity_text
+
+LABELS = ["ORG", "PERSON", "GPE", "PRODUCT"]
+
+
+def synthetic_aliases(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(n):
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))).title()
+                 for _ in range(rng.randint(1, 3))]
+        # A few aliases per id, some of them label-scoped
+        yield " ".join(words), f"Q{i // 3}", LABELS[i % len(LABELS)] if i % 2 else None
+
+
+def time_lookups(lookup, queries, repeats):
+    found = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text, label in queries:
+            found += lookup(text, label) is not None
+    return (time.perf_counter() - start) / (len(queries) * repeats) * 1e6, found / repeats
+
+
+def bench(size, queries, repeats):
+    aliases = list(synthetic_aliases(size))
+    rng = random.Random(1)
+    hits = [(alias.upper(), label or rng.choice(LABELS)) for alias, _, label in rng.sample(aliases, queries)]
+    misses = [(f"unknown alias {i}", LABELS[i % len(LABELS)]) for i in range(queries)]
+    result = {"size": size}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "aliases.nalias"
+        start = time.perf_counter()
+        compile_aliases(aliases, path)
+        result["build_s"] = time.perf_counter() - start
+        result["mb"] = path.stat().st_size / 1e6
+
+        start = time.perf_counter()
+        index = AliasIndex(path)
+        result["open_ms"] = (time.perf_counter() - start) * 1e3
+        result["hit_us"], result["found"] = time_lookups(index.lookup, hits, repeats)
+        result["miss_us"], _ = time_lookups(index.lookup, misses, repeats)
+        index.close()
+
+    start = time.perf_counter()
+    table = {}
+    for alias, canonical_id, label in aliases:
+        table.setdefault((label, normalize_entity_text(alias)), canonical_id)
+    result["dict_build_s"] = time.perf_counter() - start
+
+    def dict_lookup(text, label):
+        key = normalize_entity_text(text)
+        found = table.get((label, key))
+        return found if found is not None else table.get((None, key))
+
+    result["dict_hit_us"], _ = time_lookups(dict_lookup, hits, repeats)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=2000, help="Distinct known and unknown aliases looked up")
+    parser.add_argument("--repeats", type=int, default=20, help="Passes over the queries")
+    args = parser.parse_args()
+
+    print(f"{'aliases':>9} {'build s':>8} {'MB':>7} {'open ms':>8} {'hit us':>7} {'miss us':>8} {'found':>6}"
+          f" | {'dict build s':>12} {'dict hit us':>11}")
+    for size in args.sizes:
+        r = bench(size, min(args.queries, size), args.repeats)
+        print(f"{r['size']:>9} {r['build_s']:>8.2f} {r['mb']:>7.1f} {r['open_ms']:>8.3f} {r['hit_us']:>7.2f} "
+              f"{r['miss_us']:>8.2f} {r['found']:>6.0f} | {r['dict_build_s']:>12.2f} {r['dict_hit_us']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""Compare cold-start time and memory of spacy.load against a packed model file.
+
+Every measurement runs in a fresh interpreter, as a new container replica
+would: time to import spaCy, time to load the pipeline, time of the first
+processed document, and resident memory after loading (current and peak).
+Both pipelines must produce the same entities on the probe text.
+
+Usage:
+    python scripts/pack_model.py en_core_web_sm /tmp/model.nerpack
+    python scripts/benchmark_cold_start.py en_core_web_sm /tmp/model.nerpack --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PROBE = "Apple Inc. was founded by Steve Jobs in Cupertino, California in April 1976."
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+import spacy
+from ner_service.fast_load import load_packed
+from ner_service.server import memory_usage
+imported = time.perf_counter()
+nlp = {loader}({model!r})
+loaded = time.perf_counter()
+doc = nlp({probe!r})
+first = time.perf_counter()
+usage = memory_usage()
+print(json.dumps({{
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "first_doc_s": first - loaded,
+    "rss_mb": usage["rss"] / 1048576,
+    "private_mb": usage["private"] / 1048576,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "ents": [[ent.start_char, ent.end_char, ent.label_] for ent in doc.ents]
+}}))
+"""
+
+
+def measure(loader: str, model: str, runs: int):
+    results = []
+    for _ in range(runs):
+        code = CHILD.format(src=str(ROOT / "src"), loader=loader, model=model, probe=PROBE)
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", help="Model package or directory for spacy.load")
+    parser.add_argument("packed", help="Packed file of the same model")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per loader")
+    args = parser.parse_args()
+
+    rows = {
+        "spacy.load": measure("spacy.load", args.model, args.runs),
+        "packed": measure("load_packed", args.packed, args.runs)
+    }
+    if rows["spacy.load"][0]["ents"] != rows["packed"][0]["ents"]:
+        sys.exit("Packed model predicts different entities than the original")
+
+    metrics = ["import_s", "load_s", "first_doc_s", "rss_mb", "private_mb", "peak_rss_mb"]
+    print(f"median of {args.runs} fresh processes\n")
+    print(f"{'loader':>12} " + " ".join(f"{metric:>12}" for metric in metrics))
+    for name, results in rows.items():
+        values = [statistics.median(result[metric] for result in results) for metric in metrics]
+        print(f"{name:>12} " + " ".join(f"{value:>12.3f}" for value in values))
+    base = statistics.median(result["load_s"] for result in rows["spacy.load"])
+    packed = statistics.median(result["load_s"] for result in rows["packed"])
+    print(f"\nload speedup: {base / packed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
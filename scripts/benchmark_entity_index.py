@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Benchmark entity index build, merge and query latency on a synthetic corpus.
+
+Documents get a few entities drawn from Zipf-distributed vocabularies, so
+some entities are in most documents and most entities in few, as in real
+corpora. Queries cover a rare entity, a frequent one, conjunctions and a
+whole label, before and after merging the segments.
+
+Usage:
+    python scripts/benchmark_entity_index.py --documents 1000000 --segment-size 100000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.entity_index import EntityIndex, EntityIndexWriter, merge_segments
+
+LABELS = ["PERSON", "ORG", "GPE"]
+
+
+def synthetic_documents(n: int, vocabulary: int, seed: int = 0):
+    rng = numpy.random.default_rng(seed)
+    counts = rng.integers(1, 7, size=n)
+    labels = rng.integers(0, len(LABELS), size=counts.sum())
+    names = numpy.minimum(rng.zipf(1.3, size=counts.sum()), vocabulary)
+    position = 0
+    for i, count in enumerate(counts.tolist()):
+        entities = []
+        for j in range(position, position + count):
+            text = f"{LABELS[labels[j]].lower()} {names[j]}"
+            start = 20 * (j - position)
+            entities.append({"text": text, "label": LABELS[labels[j]], "start": start, "end": start + len(text)})
+        position += count
+        yield f"doc-{i}", entities
+
+
+QUERIES = {
+    "rare entity": [("PERSON", "person 5000")],
+    "frequent entity": [("ORG", "org 1")],
+    "rare AND frequent": [("PERSON", "person 5000"), ("ORG", "org 1")],
+    "two frequent": [("PERSON", "person 2"), ("ORG", "org 3")],
+    "three-way": [("PERSON", "person 1"), ("ORG", "org 2"), ("GPE", "gpe 4")],
+    "entity AND label": [("PERSON", "person 10"), ("GPE", None)]
+}
+
+
+def time_queries(index, repeats):
+    rows = []
+    for name, queries in QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            count = index.count(*queries)
+        count_ms = (time.perf_counter() - start) / repeats * 1e3
+        start = time.perf_counter()
+        for _ in range(repeats):
+            index.search(*queries, limit=100, offsets=True)
+        search_ms = (time.perf_counter() - start) / repeats * 1e3
+        rows.append((name, count, count_ms, search_ms))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200_000)
+    parser.add_argument("--vocabulary", type=int, default=100_000, help="Distinct names per label")
+    parser.add_argument("--segment-size", type=int, default=50_000, help="Documents per segment")
+    parser.add_argument("--repeats", type=int, default=20, help="Runs per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index"
+        start = time.perf_counter()
+        with EntityIndexWriter(path, segment_size=args.segment_size) as writer:
+            for doc_id, entities in synthetic_documents(args.documents, args.vocabulary):
+                writer.add(doc_id, entities)
+        print(f"Indexed {args.documents} documents in {time.perf_counter() - start:.2f}s")
+
+        for stage in ("segmented", "merged"):
+            if stage == "merged":
+                start = time.perf_counter()
+                merge_segments(path)
+                print(f"\nMerged in {time.perf_counter() - start:.2f}s")
+            index = EntityIndex(path)
+            stats = index.stats()
+            print(f"{stage}: {stats['segments']} segments, {stats['terms']} terms, "
+                  f"{stats['mentions']} mentions, {stats['bytes'] / 1e6:.1f} MB")
+            print(f"{'query':>20} {'documents':>10} {'count ms':>9} {'top-100 ms':>11}")
+            for name, count, count_ms, search_ms in time_queries(index, args.repeats):
+                print(f"{name:>20} {count:>10} {count_ms:>9.2f} {search_ms:>11.2f}")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Benchmark gazetteer compile, reload and match cost against dictionary size.
+
+Synthetic dictionaries of increasing size are compiled, saved, reloaded and
+matched against the sample texts in ruler-only mode, the latency-critical
+path. The compiled table is compared with spaCy's EntityRuler, whose
+serialized patterns have to be re-tokenized into Docs on every reload.
+Match cost of the compiled table should stay flat as the dictionary grows.
+
+Usage:
+    python scripts/benchmark_gazetteer.py --sizes 1000 10000 100000 300000
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import spacy
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.gazetteer import add_gazetteer, compile_gazetteer
+
+SAMPLES = ROOT / "data" / "samples" / "sample_texts.json"
+LABELS = ["ORG", "PERSON", "GPE", "PRODUCT"]
+
+
+def synthetic_terms(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(n):
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))).title()
+                 for _ in range(rng.randint(1, 3))]
+        yield " ".join(words), LABELS[i % len(LABELS)]
+
+
+def load_texts():
+    items = json.loads(SAMPLES.read_text(encoding="utf8"))
+    terms = [(name, "ORG") for item in items for name in item.get("expected_entities", [])]
+    return [item["text"] for item in items], terms
+
+
+def time_matching(component, nlp, texts, repeats):
+    docs = [nlp.make_doc(text) for text in texts]
+    tokens = sum(len(doc) for doc in docs) * repeats
+    matches = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for doc in docs:
+            doc.ents = []
+            matches += len(component(doc).ents)
+    return (time.perf_counter() - start) / tokens * 1e6, matches / (len(docs) * repeats)
+
+
+def bench(size, texts, known_terms, repeats, entity_ruler):
+    terms = list(synthetic_terms(size)) + known_terms
+    result = {"size": size}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        gazetteer = compile_gazetteer(terms, spacy.blank("en"), output_dir=Path(tmp) / "gazetteer")
+        result["compile_s"] = time.perf_counter() - start
+        result["terms"] = len(gazetteer)
+
+        nlp = spacy.blank("en")
+        start = time.perf_counter()
+        component = add_gazetteer(nlp, Path(tmp) / "gazetteer")
+        result["reload_s"] = time.perf_counter() - start
+        result["match_us"], result["ents"] = time_matching(component, nlp, texts, repeats)
+
+        if entity_ruler:
+            ruler_nlp = spacy.blank("en")
+            ruler = ruler_nlp.add_pipe("entity_ruler", config={"phrase_matcher_attr": "LOWER"})
+            ruler.add_patterns([{"label": label, "pattern": term} for term, label in terms])
+            ruler.to_disk(Path(tmp) / "ruler")
+
+            reload_nlp = spacy.blank("en")
+            start = time.perf_counter()
+            reloaded = reload_nlp.add_pipe("entity_ruler", config={"phrase_matcher_attr": "LOWER"})
+            reloaded.from_disk(Path(tmp) / "ruler")
+            result["ruler_reload_s"] = time.perf_counter() - start
+            result["ruler_match_us"], _ = time_matching(reloaded, reload_nlp, texts, repeats)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=50, help="Passes over the sample texts")
+    parser.add_argument("--no-entity-ruler", action="store_true", help="Skip the EntityRuler baseline")
+    args = parser.parse_args()
+
+    texts, known_terms = load_texts()
+    header = f"{'terms':>8} {'compile s':>10} {'reload s':>9} {'us/token':>9} {'ents/doc':>9}"
+    if not args.no_entity_ruler:
+        header += f" | {'ruler reload s':>14} {'ruler us/token':>14}"
+    print(header)
+    for size in args.sizes:
+        r = bench(size, texts, known_terms, args.repeats, not args.no_entity_ruler)
+        line = (f"{r['terms']:>8} {r['compile_s']:>10.3f} {r['reload_s']:>9.3f} "
+                f"{r['match_us']:>9.2f} {r['ents']:>9.2f}")
+        if not args.no_entity_ruler:
+            line += f" | {r['ruler_reload_s']:>14.3f} {r['ruler_match_us']:>14.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
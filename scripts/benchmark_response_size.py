@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""Measure response bytes and latency for each compression codec and the no-echo option.
+
+Sends batches of large documents built from the sample texts to the
+in-process API for every combination of Accept-Encoding and include_text,
+and reports the bytes on the wire, server latency, client decode+parse time
+and the transfer time over a link of the given bandwidth.
+
+Usage:
+    python scripts/benchmark_response_size.py --model models/custom --doc-chars 20000 --batch 16
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+SAMPLES = ROOT / "data" / "samples" / "sample_texts.json"
+ENCODINGS = ["identity", "gzip", "zstd"]
+
+
+def build_documents(doc_chars: int, batch: int):
+    texts = [item["text"] for item in json.loads(SAMPLES.read_text(encoding="utf8"))]
+    documents = []
+    for offset in range(batch):
+        parts, size, i = [], 0, offset
+        while size < doc_chars:
+            parts.append(texts[i % len(texts)])
+            size += len(parts[-1]) + 1
+            i += 1
+        documents.append(" ".join(parts))
+    return documents
+
+
+def decode(encoding: str, raw: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(raw)
+    if encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=os.getenv("CUSTOM_MODEL_PATH"), help="Custom model path (default: MODEL_NAME)")
+    parser.add_argument("--doc-chars", type=int, default=20000, help="Characters per document")
+    parser.add_argument("--batch", type=int, default=16, help="Documents per /extract/batch request")
+    parser.add_argument("--repeats", type=int, default=10, help="Requests per combination")
+    parser.add_argument("--mbps", type=float, default=100.0, help="Link bandwidth for the transfer estimate")
+    args = parser.parse_args()
+
+    if args.model:
+        os.environ["CUSTOM_MODEL_PATH"] = args.model
+    from fastapi.testclient import TestClient
+    from ner_service import main as service
+    from ner_service.compression import SUPPORTED_ENCODINGS
+
+    documents = build_documents(args.doc_chars, args.batch)
+    encodings = [e for e in ENCODINGS if e == "identity" or e in SUPPORTED_ENCODINGS]
+    print(f"{args.batch} documents of ~{args.doc_chars} chars per request, {args.repeats} requests each\n")
+    print(f"{'include_text':>12} {'encoding':>9} {'bytes':>10} {'ratio':>6} {'server ms':>10} "
+          f"{'decode ms':>10} {'transfer ms':>12} {'total ms':>9}")
+
+    with TestClient(service.app) as client:
+        baseline = None
+        for include_text in (True, False):
+            for encoding in encodings:
+                body = {"texts": documents, "include_text": include_text}
+                headers = {"Accept-Encoding": encoding}
+                latencies, decode_times, sizes = [], [], []
+                for _ in range(args.repeats):
+                    start = time.perf_counter()
+                    with client.stream("POST", "/extract/batch", json=body, headers=headers) as response:
+                        raw = b"".join(response.iter_raw())
+                    latencies.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    json.loads(decode(response.headers.get("content-encoding", "identity"), raw))
+                    decode_times.append(time.perf_counter() - start)
+                    sizes.append(len(raw))
+                size = statistics.median(sizes)
+                baseline = baseline or size
+                server = statistics.median(latencies) * 1000
+                decode_ms = statistics.median(decode_times) * 1000
+                transfer = size * 8 / (args.mbps * 1e6) * 1000
+                print(f"{str(include_text):>12} {encoding:>9} {size:>10.0f} {baseline / size:>6.1f} {server:>10.1f} "
+                      f"{decode_ms:>10.2f} {transfer:>12.2f} {server + decode_ms + transfer:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""Compile an alias dictionary into a memory-mapped alias index.
+
+Input is a .jsonl file of {"alias": ..., "id": ..., "label": ...} objects
+(label optional) or a tab-separated "alias<TAB>id[<TAB>label]" file. Aliases
+are normalized (case and whitespace) and hashed once; the service maps the
+file read-only, so worker processes share a single copy.
+
+Usage:
+    python scripts/build_alias_index.py aliases.jsonl models/aliases.nalias
+
+Serve it with:
+    ALIAS_INDEX_PATH=models/aliases.nalias uvicorn src.ner_service.main:app
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.aliases import compile_aliases, read_aliases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("aliases", help="Alias file (.jsonl or tab-separated)")
+    parser.add_argument("output", help="Output index file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    header = compile_aliases(read_aliases(args.aliases), args.output)
+    elapsed = time.perf_counter() - start
+    size = Path(args.output).stat().st_size
+    print(f"Compiled {header['aliases']} aliases of {header['ids']} ids into {args.output} "
+          f"({size / 1e6:.1f} MB) in {elapsed:.2f}s")
+    if header["duplicates"]:
+        print(f"Skipped {header['duplicates']} duplicate aliases (first entry kept)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Add extracted entities to an on-disk entity index, or merge its segments.
+
+Input is either stored extraction results (JSONL with one result per line,
+or a JSON array / `/extract/batch` response, each result holding "entities"
+and optionally an id field) or a corpus that is run through the model in
+batches (JSON, JSONL or one text per line; documents are numbered in corpus
+order). Every run appends new segments, so an index grows incrementally;
+--merge combines segments for faster queries.
+
+Usage:
+    python scripts/build_entity_index.py indexes/news --results results.jsonl
+    python scripts/build_entity_index.py indexes/news --corpus news.txt --custom-model-path models/model.nerpack
+    python scripts/build_entity_index.py indexes/news --merge
+"""
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.entity_index import EntityIndex, EntityIndexWriter, merge_segments
+from training.corpus import iter_records
+
+
+def _iter_results(path: str):
+    with open(path, encoding="utf8") as fp:
+        if Path(path).suffix == ".jsonl":
+            for line in fp:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(fp)
+    yield from data["results"] if isinstance(data, dict) else data
+
+
+def _iter_texts(path: str):
+    if Path(path).suffix in (".json", ".jsonl"):
+        for text, _ in iter_records(path):
+            yield text
+    else:
+        with open(path, encoding="utf8") as fp:
+            for line in fp:
+                if line.strip():
+                    yield line.rstrip("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("index", help="Index directory (created if missing)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--results", default=None, help="Stored extraction results to index")
+    source.add_argument("--corpus", default=None, help="Corpus to extract entities from and index")
+    parser.add_argument("--id-field", default="id", help="Result field holding the document id")
+    parser.add_argument("--model", default="en_core_web_sm", help="spaCy model name")
+    parser.add_argument("--custom-model-path", default=None, help="Custom model directory or packed file")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per model batch")
+    parser.add_argument("--segment-size", type=int, default=100_000, help="Documents per segment")
+    parser.add_argument("--merge", action="store_true", help="Merge all segments into one afterwards")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.results or args.corpus:
+        with EntityIndexWriter(args.index, segment_size=args.segment_size) as writer:
+            before = writer.documents
+            if args.results:
+                for result in _iter_results(args.results):
+                    writer.add(result.get(args.id_field, writer.documents), result["entities"])
+            else:
+                from ner_service.ner_model import NERModel
+
+                model = NERModel(model_name=args.model, custom_model_path=args.custom_model_path)
+                texts = _iter_texts(args.corpus)
+                while batch := list(islice(texts, args.batch_size)):
+                    writer.add_results(model.batch_extract_entities(batch))
+        print(f"Indexed {writer.documents - before} documents in {time.perf_counter() - start:.2f}s")
+    if args.merge:
+        start = time.perf_counter()
+        merge_segments(args.index)
+        print(f"Merged segments in {time.perf_counter() - start:.2f}s")
+
+    index = EntityIndex(args.index)
+    stats = index.stats()
+    index.close()
+    print(f"{stats['documents']} documents, {stats['terms']} terms, {stats['mentions']} mentions "
+          f"in {stats['segments']} segments ({stats['bytes'] / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
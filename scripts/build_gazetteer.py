@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""Compile a gazetteer term file into a fast-loading gazetteer table.
+
+Input is a .jsonl/.json file in EntityRuler pattern format or a tab-separated
+"term<TAB>label" file. Terms are split with the target model's tokenizer once;
+the service then reloads the compiled table without tokenizing anything.
+
+Usage:
+    python scripts/build_gazetteer.py terms.jsonl models/gazetteer --model en_core_web_sm
+
+Serve it with:
+    GAZETTEER_PATH=models/gazetteer uvicorn src.ner_service.main:app
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import spacy
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.gazetteer import compile_gazetteer, read_terms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("terms", help="Term file (.jsonl, .json or tab-separated)")
+    parser.add_argument("output", help="Output directory for the compiled gazetteer")
+    parser.add_argument("--model", default="en_core_web_sm",
+                        help="Model whose tokenizer is used (falls back to a blank pipeline)")
+    parser.add_argument("--lang", default="en", help="Language of the blank fallback pipeline")
+    parser.add_argument("--attr", default="LOWER", help="Match attribute: ORTH, LOWER, NORM or SHAPE")
+    args = parser.parse_args()
+
+    try:
+        nlp = spacy.load(args.model)
+    except OSError:
+        print(f"Model {args.model} not found, using a blank '{args.lang}' tokenizer")
+        nlp = spacy.blank(args.lang)
+
+    start = time.perf_counter()
+    gazetteer = compile_gazetteer(read_terms(args.terms), nlp, attr=args.attr, output_dir=args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Compiled {len(gazetteer)} terms ({', '.join(gazetteer.labels)}) into {args.output} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
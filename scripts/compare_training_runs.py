@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Compare training throughput across telemetry logs and flag regressions.
+
+Reads the JSONL logs written by `NERTrainer.train(..., telemetry_log=...)`
+and prints one row per run: median words/sec and examples/sec (the first
+iteration is treated as warm-up), the share of time per phase and peak
+memory. Exits with status 1 when a run's words/sec falls more than
+--threshold below the baseline run (the first one).
+
+Usage:
+    python scripts/compare_training_runs.py logs/baseline.jsonl logs/candidate.jsonl --threshold 0.1
+"""
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from training.telemetry import read_log
+
+
+def run_stats(run):
+    iterations = run["iterations"][1:] or run["iterations"]
+    phases = {}
+    for record in iterations:
+        for name, seconds in record["phases"].items():
+            phases[name] = phases.get(name, 0.0) + seconds
+    total = sum(record["seconds"] for record in iterations) or 1.0
+    return {
+        "words_per_sec": statistics.median(record["words_per_sec"] for record in iterations),
+        "examples_per_sec": statistics.median(record["examples_per_sec"] for record in iterations),
+        "phases": {name: seconds / total for name, seconds in phases.items()},
+        "peak_rss_mb": max(record["peak_rss_mb"] for record in iterations)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="Telemetry JSONL logs; every run in them is compared")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed words/sec drop against the baseline")
+    args = parser.parse_args()
+
+    rows = []
+    for log in args.logs:
+        for index, run in enumerate(read_log(log)):
+            if run["iterations"]:
+                rows.append((f"{Path(log).name}#{index}", run_stats(run)))
+    if not rows:
+        parser.error("No iterations found in the given logs")
+
+    baseline = rows[0][1]["words_per_sec"]
+    regressed = False
+    print(f"{'run':>28} {'words/s':>9} {'examples/s':>11} {'change':>7} {'peak MB':>8}  phases")
+    for name, stats in rows:
+        change = stats["words_per_sec"] / baseline - 1 if baseline else 0.0
+        flag = ""
+        if change < -args.threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        phases = ", ".join(f"{phase} {share:.0%}" for phase, share in stats["phases"].items())
+        print(f"{name:>28} {stats['words_per_sec']:>9.0f} {stats['examples_per_sec']:>11.1f} "
+              f"{change:>+7.1%} {stats['peak_rss_mb']:>8.0f}  {phases}{flag}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Remove near-duplicate records from a training file and report train/dev/test leakage.
+
+Records are compared by MinHash over character shingles with LSH
+bucketing, in memory that stays bounded for millions of records. One record
+of every near-duplicate cluster is kept; training records that also appear
+(nearly) in a dev/test file are removed unless --keep-leaked is given. The
+dev/test files themselves are left untouched. The JSON report lists counts,
+the largest clusters and the leaked pairs.
+
+Usage:
+    python scripts/dedup_corpus.py data/train.json data/train.dedup.json --eval data/dev.json data/test.json
+    python scripts/dedup_corpus.py data/train.jsonl data/train.dedup.jsonl --threshold 0.9 --report dedup.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from training.dedup import deduplicate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Training file (JSON array or JSONL)")
+    parser.add_argument("output", help="Deduplicated file to write (.json or .jsonl)")
+    parser.add_argument("--eval", nargs="*", default=[], help="Dev/test files checked for leakage")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Jaccard similarity of near-duplicates")
+    parser.add_argument("--num-perm", type=int, default=128, help="MinHash signature length")
+    parser.add_argument("--shingle-size", type=int, default=5, help="Characters per shingle")
+    parser.add_argument("--keep-leaked", action="store_true", help="Keep training records that leak into dev/test")
+    parser.add_argument("--examples", type=int, default=20, help="Clusters and leaked pairs listed in the report")
+    parser.add_argument("--work-dir", default=None, help="Directory for the memory-mapped signatures")
+    parser.add_argument("--report", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = deduplicate(
+        args.source,
+        args.output,
+        eval_paths=args.eval,
+        threshold=args.threshold,
+        num_perm=args.num_perm,
+        shingle_size=args.shingle_size,
+        drop_leaked=not args.keep_leaked,
+        max_examples=args.examples,
+        work_dir=args.work_dir
+    )
+    train = report["train"]
+    print(f"{train['kept']} of {train['records']} records kept: {train['removed_duplicates']} near-duplicates "
+          f"and {train['removed_leaked']} leaked records removed")
+    print(f"{train['clusters']} clusters ({train['records_in_clusters']} records, largest {train['largest_cluster']}), "
+          f"{train['annotation_mismatches']} with differently annotated members")
+    for path, leakage in report["leakage"].items():
+        print(f"{path}: {leakage['leaked']} of {leakage['records']} records ({leakage['rate']:.1%}) "
+              f"have a near-duplicate in {args.source}")
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2), encoding="utf8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Count entity mentions and top entities per label over a corpus in fixed memory.
+
+Each worker process runs the model over its shard of the corpus (every
+N-th record) and keeps only a Count-Min Sketch of mention counts and a
+Space-Saving top-k summary per label; the shard summaries are merged into one
+report. The corpus is a JSON array or JSONL file (the `data/train.json`
+format or objects with "text") or a plain text file with one text per line.
+
+Usage:
+    python scripts/entity_analytics.py corpus.jsonl --workers 4 --top 20
+    python scripts/entity_analytics.py news.txt --custom-model-path models/model.nerpack --count ORG Apple
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.analytics import EntityAnalytics
+from ner_service.ner_model import NERModel
+from training.corpus import iter_records
+
+
+def _iter_texts(path: str):
+    if Path(path).suffix in (".json", ".jsonl"):
+        for text, _ in iter_records(path):
+            yield text
+    else:
+        with open(path, encoding="utf8") as fp:
+            for line in fp:
+                if line.strip():
+                    yield line.rstrip("\n")
+
+
+def _analyze_shard(path: str, shard: int, shards: int, model_options: dict, analytics_options: dict,
+                   batch_size: int) -> bytes:
+    model = NERModel(**model_options)
+    analytics = model.aggregate_entities(
+        islice(_iter_texts(path), shard, None, shards), EntityAnalytics(**analytics_options), batch_size=batch_size
+    )
+    return analytics.to_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="JSON, JSONL or plain text corpus")
+    parser.add_argument("--model", default="en_core_web_sm", help="spaCy model name")
+    parser.add_argument("--custom-model-path", default=None, help="Custom model directory or packed file")
+    parser.add_argument("--gazetteer", default=None, help="Compiled gazetteer directory or term file")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, one corpus shard each")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per model batch")
+    parser.add_argument("--top-k", type=int, default=100, help="Entities tracked per label")
+    parser.add_argument("--width", type=int, default=2 ** 16, help="Count-Min Sketch width")
+    parser.add_argument("--depth", type=int, default=4, help="Count-Min Sketch depth")
+    parser.add_argument("--top", type=int, default=10, help="Entities listed per label")
+    parser.add_argument("--count", nargs=2, action="append", default=[], metavar=("LABEL", "TEXT"),
+                        help="Also print the estimated mentions of an entity")
+    parser.add_argument("--output", default=None, help="Save the merged analytics to this file for later merging")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    model_options = {"model_name": args.model, "custom_model_path": args.custom_model_path,
+                     "gazetteer_path": args.gazetteer}
+    analytics_options = {"top_k": args.top_k, "width": args.width, "depth": args.depth}
+    jobs = [(args.corpus, shard, args.workers, model_options, analytics_options, args.batch_size)
+            for shard in range(args.workers)]
+    if args.workers == 1:
+        shards = [_analyze_shard(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(args.workers) as executor:
+            shards = list(executor.map(_analyze_shard, *zip(*jobs)))
+    analytics = EntityAnalytics.from_bytes(shards[0])
+    for data in shards[1:]:
+        analytics.merge(EntityAnalytics.from_bytes(data))
+
+    if args.output:
+        Path(args.output).write_bytes(analytics.to_bytes())
+    report = analytics.report(args.top)
+    report["counts"] = [{"label": label, "text": text, "count": analytics.count(label, text)}
+                        for label, text in args.count]
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['texts']} texts, {report['mentions']} entity mentions")
+    for label, summary in report["labels"].items():
+        top = ", ".join(f"{entry['text']} ({entry['count']})" for entry in summary["top"])
+        print(f"{label:>12} {summary['mentions']:>8}  {top}")
+    for entry in report["counts"]:
+        print(f"{entry['label']} {entry['text']!r}: ~{entry['count']} mentions")
+
+
+if __name__ == "__main__":
+    main()
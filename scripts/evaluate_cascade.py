@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Compare a fast/large model cascade with always running the large model.
+
+Runs the large model and the cascade at each threshold over a corpus in the
+`data/train.json` format ([text, {"entities": [[start, end, label], ...]}])
+and reports the escalation rate, latency per text and entity-level agreement
+with the large model, plus F1 against the gold entities when the corpus has
+any.
+
+Usage:
+    python scripts/evaluate_cascade.py --fast models/slim --large en_core_web_sm --data data/dev.json
+    python scripts/evaluate_cascade.py --fast models/slim.nerpack --thresholds 0.8 0.9 0.95 0.99
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import spacy
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.cascade import ModelCascade, evaluate_cascade
+from ner_service.fast_load import is_packed, load_packed
+
+
+def _load(model: str):
+    return load_packed(model) if is_packed(model) else spacy.load(model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fast", required=True, help="Fast model (name, directory or packed file)")
+    parser.add_argument("--large", default="en_core_web_sm", help="Large model (name, directory or packed file)")
+    parser.add_argument("--data", default=str(ROOT / "data" / "train.json"), help="Labeled corpus")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.9], help="Confidence thresholds to compare")
+    parser.add_argument("--beam-width", type=int, default=4, help="Beams used to score the fast model")
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per call")
+    parser.add_argument("--json", action="store_true", help="Print the full reports as JSON")
+    args = parser.parse_args()
+
+    examples = [(text, annots) for text, annots in json.loads(Path(args.data).read_text(encoding="utf8"))]
+    fast, large = _load(args.fast), _load(args.large)
+    reports = [
+        evaluate_cascade(ModelCascade(fast, threshold=threshold, beam_width=args.beam_width), large, examples,
+                         batch_size=args.batch_size)
+        for threshold in args.thresholds
+    ]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"{len(examples)} texts from {args.data}, large model {reports[0]['latency_ms_per_text']['large']:.2f} ms/text"
+          + (f", F1 {reports[0]['gold']['large']['f1']:.3f} against gold" if "gold" in reports[0] else ""))
+    print(f"{'threshold':>10} {'escalated':>10} {'ms/text':>8} {'speedup':>8} {'agree F1':>9} {'gold F1':>8}")
+    for report in reports:
+        latency = report["latency_ms_per_text"]
+        speedup = latency["large"] / latency["cascade"] if latency["cascade"] else 0.0
+        gold = f"{report['gold']['cascade']['f1']:>8.3f}" if "gold" in report else f"{'-':>8}"
+        print(f"{report['threshold']:>10} {report['escalation_rate']:>10.2%} {latency['cascade']:>8.2f} "
+              f"{speedup:>7.2f}x {report['agreement_with_large']['f1']:>9.3f} {gold}")
+
+
+if __name__ == "__main__":
+    main()
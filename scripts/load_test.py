@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+"""Load-test the service and check the results against latency and error SLOs.
+
+Replays a weighted mix of /extract, /extract/batch and /health requests with
+text lengths and batch sizes drawn from configurable distributions (texts are
+stitched together from the sample texts). Two load models are supported:
+
+- closed loop (--concurrency N): N clients each send their next request as
+  soon as the previous one returns, so the offered load adapts to the server;
+- open loop (--rate R): requests arrive as a Poisson process at R per second
+  regardless of how fast the server answers. Latency is measured from the
+  scheduled arrival, so queueing delay is not hidden when the server falls
+  behind (coordinated omission); arrivals beyond --max-in-flight are counted
+  as client-side drops.
+
+Targets are the ASGI app in-process (default), a base URL, or a Unix socket.
+In-process, the generator shares the event loop and CPU with the service, so
+use a socket target for absolute numbers.
+
+--sweep runs one step per concurrency or rate level and marks the saturation
+point: the first level whose throughput gains less than --knee over the
+previous one, or that breaks an SLO. SLOs are given as metric=limit, optionally
+prefixed by a scenario (p50_ms, p95_ms, p99_ms, p999_ms, mean_ms, error_rate
+as maxima; throughput_rps as minimum). The exit code is 1 when the SLOs fail
+(with --sweep: when no level meets them).
+
+Usage:
+    python scripts/load_test.py --model models/model.nerpack --concurrency 8 --duration 30 \\
+        --slo p99_ms=500 --slo extract.p95_ms=200 --slo error_rate=0.01
+    python scripts/load_test.py --url http://127.0.0.1:8000 --rate 50 --duration 60
+    python scripts/load_test.py --uds /tmp/ner.sock --sweep 1,2,4,8,16 --json report.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import httpx
+
+from ner_service.metrics import LatencyHistogram
+
+SAMPLES = ROOT / "data" / "samples" / "sample_texts.json"
+# Statuses the service uses to shed load (overloaded, deadline expired)
+SHED_STATUSES = {429, 503, 504}
+SCENARIOS = ("extract", "batch", "health")
+MAX_METRICS = {"p50_ms", "p95_ms", "p99_ms", "p999_ms", "mean_ms", "error_rate"}
+MIN_METRICS = {"throughput_rps"}
+
+
+def parse_weighted(spec: str, cast=float) -> Tuple[List, List[float]]:
+    """Parse "value:weight,value:weight" (weights default to 1)"""
+    values, weights = [], []
+    for item in spec.split(","):
+        value, _, weight = item.partition(":")
+        values.append(cast(value))
+        weights.append(float(weight) if weight else 1.0)
+    return values, weights
+
+
+def parse_mix(spec: str) -> Tuple[List[str], List[float]]:
+    """Parse "scenario=weight,..." into scenarios and weights"""
+    scenarios, weights = [], []
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        scenarios.append(name)
+        weights.append(float(weight) if weight else 1.0)
+    return scenarios, weights
+
+
+def parse_slos(specs: List[str]) -> Dict[Tuple[str, str], float]:
+    """Parse ["[scenario.]metric=limit", ...] into {(scenario or "all", metric): limit}"""
+    slos = {}
+    for spec in specs:
+        key, _, limit = spec.partition("=")
+        scenario, _, metric = key.strip().rpartition(".")
+        if metric not in MAX_METRICS | MIN_METRICS:
+            raise argparse.ArgumentTypeError(f"Unknown SLO metric: {metric}")
+        if scenario not in ("", "all") + SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown SLO scenario: {scenario}")
+        try:
+            value = float(limit)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid SLO {spec!r}, expected [scenario.]metric=number")
+        if not math.isfinite(value) or value < 0:
+            raise argparse.ArgumentTypeError(f"SLO limit must be a non-negative number: {spec!r}")
+        slos[(scenario or "all", metric)] = value
+    return slos
+
+
+class Workload:
+    """Pool of pre-built requests following the configured mix"""
+
+    def __init__(self, mix: str, text_chars: str, batch_sizes: str, pool: int = 1000, seed: int = 0):
+        rng = random.Random(seed)
+        self.samples = [item["text"] for item in json.loads(SAMPLES.read_text(encoding="utf8"))]
+        scenarios, weights = parse_mix(mix)
+        lengths, length_weights = parse_weighted(text_chars, int)
+        sizes, size_weights = parse_weighted(batch_sizes, int)
+
+        def text():
+            # +-50% around the drawn length so requests do not all align
+            target = max(1, int(rng.choices(lengths, length_weights)[0] * rng.uniform(0.5, 1.5)))
+            parts, size, index = [], 0, rng.randrange(len(self.samples))
+            while size < target:
+                parts.append(self.samples[index % len(self.samples)])
+                size += len(parts[-1]) + 1
+                index += 1
+            return " ".join(parts)[:target].rsplit(" ", 1)[0] or parts[0]
+
+        self.requests = []
+        for _ in range(pool):
+            scenario = rng.choices(scenarios, weights)[0]
+            if scenario == "extract":
+                request = ("POST", "/extract", {"text": text()})
+            elif scenario == "batch":
+                count = rng.choices(sizes, size_weights)[0]
+                request = ("POST", "/extract/batch", {"texts": [text() for _ in range(count)]})
+            else:
+                request = ("GET", "/health", None)
+            self.requests.append((scenario, *request))
+        self._next = 0
+
+    def next(self):
+        request = self.requests[self._next % len(self.requests)]
+        self._next += 1
+        return request
+
+
+class Results:
+    """Latency histograms and status counts per scenario for one step"""
+
+    def __init__(self):
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.statuses: Dict[str, Counter] = {}
+        self.client_drops = 0
+        self.seconds = 0.0
+
+    def record(self, scenario: str, status, ms: float):
+        self.latency.setdefault(scenario, LatencyHistogram()).record(ms)
+        self.statuses.setdefault(scenario, Counter())[status] += 1
+
+    def _summary(self, histograms: List[LatencyHistogram], statuses: Counter) -> Dict:
+        merged = LatencyHistogram()
+        for histogram in histograms:
+            merged.merge(histogram)
+        requests = sum(statuses.values())
+        ok = sum(count for status, count in statuses.items() if isinstance(status, int) and status < 400)
+        shed = sum(count for status, count in statuses.items() if status in SHED_STATUSES)
+        return {
+            "requests": requests,
+            "throughput_rps": ok / self.seconds if self.seconds else 0.0,
+            "error_rate": (requests - ok) / requests if requests else 0.0,
+            "shed": shed,
+            "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            "mean_ms": merged.total_ms / merged.count if merged.count else 0.0,
+            "p50_ms": merged.percentile(50),
+            "p95_ms": merged.percentile(95),
+            "p99_ms": merged.percentile(99),
+            "p999_ms": merged.percentile(99.9),
+            "max_ms": merged.max_ms
+        }
+
+    def summary(self) -> Dict:
+        total = Counter()
+        for statuses in self.statuses.values():
+            total.update(statuses)
+        report = {"all": self._summary(list(self.latency.values()), total)}
+        report["all"]["client_drops"] = self.client_drops
+        for scenario in sorted(self.latency):
+            report[scenario] = self._summary([self.latency[scenario]], self.statuses[scenario])
+        return report
+
+
+async def send(client: httpx.AsyncClient, request, results: Results, started: float, record: bool):
+    scenario, method, path, body = request
+    try:
+        response = await client.request(method, path, json=body)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = f"exception:{type(e).__name__}"
+    if record:
+        results.record(scenario, status, (time.perf_counter() - started) * 1000)
+
+
+async def closed_loop(client, workload: Workload, concurrency: int, duration: float, warmup: float) -> Results:
+    results = Results()
+    start = time.perf_counter()
+    measure_from, deadline = start + warmup, start + warmup + duration
+
+    async def user():
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            await send(client, workload.next(), results, now, now >= measure_from)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    results.seconds = time.perf_counter() - measure_from
+    return results
+
+
+async def open_loop(client, workload: Workload, rate: float, duration: float, warmup: float,
+                    max_in_flight: int, seed: int = 0) -> Results:
+    results = Results()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    measure_from, deadline = start + warmup, start + warmup + duration
+    in_flight = set()
+    arrival = start
+    while True:
+        arrival += rng.expovariate(rate)
+        if arrival >= deadline:
+            break
+        delay = arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            results.client_drops += arrival >= measure_from
+            continue
+        task = asyncio.create_task(send(client, workload.next(), results, arrival, arrival >= measure_from))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.wait(in_flight)
+    results.seconds = deadline - measure_from
+    return results
+
+
+def check_slos(report: Dict, slos: Dict[Tuple[str, str], float]) -> List[str]:
+    """Return one message per violated SLO"""
+    violations = []
+    for (scenario, metric), limit in slos.items():
+        if scenario not in report:
+            continue
+        value = report[scenario][metric]
+        failed = value < limit if metric in MIN_METRICS else value > limit
+        if failed:
+            bound = ">=" if metric in MIN_METRICS else "<="
+            violations.append(f"{scenario}.{metric} = {value:.4g}, required {bound} {limit:g}")
+    return violations
+
+
+def find_saturation(steps: List[Dict], knee: float) -> Optional[float]:
+    """
+    First sweep level that breaks an SLO or gains less than knee in throughput
+
+    Args:
+        steps: Sweep steps in level order, each with level, report and violations
+        knee: Relative throughput gain over the previous level below which it counts as saturated
+
+    Returns:
+        The saturation level, or None when the sweep never saturates
+    """
+    previous = None
+    for step in steps:
+        throughput = step["report"]["all"]["throughput_rps"]
+        if step["violations"] or (previous is not None and throughput / max(previous, 1e-9) - 1 < knee):
+            return step["level"]
+        previous = throughput
+    return None
+
+
+def print_report(report: Dict):
+    print(f"{'scenario':>10} {'requests':>9} {'ok/s':>8} {'errors':>7} {'shed':>6} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'max ms':>8}")
+    for scenario, stats in report.items():
+        print(f"{scenario:>10} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['error_rate']:>7.2%} "
+              f"{stats['shed']:>6} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+              f"{stats['p999_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+    if report["all"]["client_drops"]:
+        print(f"client-side drops (max in flight reached): {report['all']['client_drops']}")
+    other = {status: count for status, count in report["all"]["statuses"].items() if not status.startswith("2")}
+    if other:
+        print(f"non-2xx: {other}")
+
+
+def make_client(args) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if args.url:
+        return httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits)
+    if args.uds:
+        transport = httpx.AsyncHTTPTransport(uds=args.uds, limits=limits)
+        return httpx.AsyncClient(base_url="http://localhost", transport=transport, timeout=timeout)
+    if args.model:
+        os.environ["CUSTOM_MODEL_PATH"] = args.model
+    from ner_service import main as service
+    service._ensure_ner_model()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=service.app), base_url="http://service", timeout=timeout)
+
+
+async def run(args) -> int:
+    workload = Workload(args.mix, args.text_chars, args.batch_sizes, args.pool, args.seed)
+    slos = parse_slos(args.slo)
+    open_model = args.rate is not None
+    levels = [float(level) for level in args.sweep.split(",")] if args.sweep else [args.rate if open_model else args.concurrency]
+    steps = []
+
+    async with make_client(args) as client:
+        for level in levels:
+            if open_model:
+                results = await open_loop(client, workload, level, args.duration, args.warmup, args.max_in_flight, args.seed)
+            else:
+                results = await closed_loop(client, workload, int(level), args.duration, args.warmup)
+            report = results.summary()
+            violations = check_slos(report, slos)
+            label = f"rate {level:g}/s" if open_model else f"concurrency {int(level)}"
+            print(f"\n== {label}, {args.duration:g} s ==")
+            print_report(report)
+            for violation in violations:
+                print(f"SLO FAILED: {violation}")
+            steps.append({"level": level, "report": report, "violations": violations})
+
+    saturation = find_saturation(steps, args.knee)
+    passing = [step["level"] for step in steps if not step["violations"]]
+    summary = {
+        "model": "open" if open_model else "closed",
+        "mix": args.mix,
+        "text_chars": args.text_chars,
+        "batch_sizes": args.batch_sizes,
+        "slos": {f"{scenario}.{metric}": limit for (scenario, metric), limit in slos.items()},
+        "steps": steps,
+        "saturation_level": saturation,
+        "max_level_meeting_slos": max(passing) if passing else None,
+        "passed": bool(passing) if args.sweep else not steps[0]["violations"]
+    }
+
+    if args.sweep:
+        print(f"\n{'level':>8} {'ok/s':>8} {'p99 ms':>8} {'errors':>7}  slo")
+        for step in steps:
+            stats = step["report"]["all"]
+            print(f"{step['level']:>8g} {stats['throughput_rps']:>8.1f} {stats['p99_ms']:>8.1f} "
+                  f"{stats['error_rate']:>7.2%}  {'FAIL' if step['violations'] else 'ok'}")
+        print(f"saturation at: {saturation if saturation is not None else 'not reached'}; "
+              f"highest level meeting SLOs: {summary['max_level_meeting_slos']}")
+    if slos:
+        print(f"\nSLO check: {'PASSED' if summary['passed'] else 'FAILED'}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2), encoding="utf8")
+    return 0 if summary["passed"] else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running service")
+    target.add_argument("--uds", help="Unix socket of a running service")
+    parser.add_argument("--model", default=os.getenv("CUSTOM_MODEL_PATH"), help="Custom model for the in-process app")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=4, help="Closed loop: concurrent clients")
+    load.add_argument("--rate", type=float, default=None, help="Open loop: mean arrivals per second")
+    parser.add_argument("--sweep", help="Comma-separated concurrency levels (or rates with --rate) to step through")
+    parser.add_argument("--knee", type=float, default=0.1, help="Throughput gain below which a sweep level counts as saturated")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each step")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop: outstanding requests before dropping arrivals")
+    parser.add_argument("--mix", default="extract=0.7,batch=0.2,health=0.1", help="Scenario weights")
+    parser.add_argument("--text-chars", default="200:0.6,2000:0.3,20000:0.1", help="Text length distribution (chars:weight)")
+    parser.add_argument("--batch-sizes", default="4:0.5,16:0.4,64:0.1", help="Batch size distribution (size:weight)")
+    parser.add_argument("--pool", type=int, default=1000, help="Distinct pre-built requests to cycle through")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout in seconds")
+    parser.add_argument("--slo", action="append", default=[], help="[scenario.]metric=limit, repeatable")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the full report to this file")
+    args = parser.parse_args()
+    try:
+        parse_slos(args.slo)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
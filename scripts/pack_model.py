@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""Pack a spaCy pipeline into a single file for fast service cold starts.
+
+The packed file holds config, vocab, tokenizer and component state with the
+weights stored raw, so `NERModel` can memory-map it instead of running
+`spacy.load`. Point CUSTOM_MODEL_PATH at the file to use it. A packed file
+only loads with the spaCy, thinc and srsly versions that wrote it; re-pack
+after upgrading any of them.
+
+Usage:
+    python scripts/pack_model.py en_core_web_sm models/en_core_web_sm.nerpack
+    python scripts/pack_model.py ./custom_ner_model models/custom.nerpack
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.fast_load import load_packed, pack_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", help="Installed model package or model directory")
+    parser.add_argument("output", help="Packed file to write")
+    parser.add_argument("--no-verify", action="store_true", help="Skip reloading the packed file")
+    args = parser.parse_args()
+
+    header = pack_model(args.model, args.output)
+    size = Path(args.output).stat().st_size
+    print(f"Packed {args.model} ({', '.join(header['components'])}) into {args.output}: {size / 1024 / 1024:.1f} MB")
+    if not args.no_verify:
+        nlp = load_packed(args.output)
+        print(f"Verified: {nlp.pipe_names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""Find documents that mention all given entities in an entity index.
+
+Each query is LABEL=TEXT (an entity, matched case- and
+whitespace-insensitively) or LABEL (any entity of the label).
+
+Usage:
+    python scripts/search_entity_index.py indexes/news "PERSON=Steve Jobs" ORG=Apple
+    python scripts/search_entity_index.py indexes/news ORG=app --prefix --offsets --limit 20
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.entity_index import EntityIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("index", help="Index directory")
+    parser.add_argument("queries", nargs="+", metavar="LABEL[=TEXT]", help="Entities every document must mention")
+    parser.add_argument("--prefix", action="store_true", help="Match entity texts starting with TEXT")
+    parser.add_argument("--limit", type=int, default=10, help="Documents listed (0 lists all)")
+    parser.add_argument("--offsets", action="store_true", help="List the matching mentions of each document")
+    args = parser.parse_args()
+
+    queries = [(query.partition("=")[0], query.partition("=")[2] if "=" in query else None) for query in args.queries]
+    index = EntityIndex(args.index)
+    start = time.perf_counter()
+    total = index.count(*queries, prefix=args.prefix)
+    results = index.search(*queries, prefix=args.prefix, limit=args.limit or None, offsets=args.offsets)
+    elapsed = (time.perf_counter() - start) * 1e3
+    print(f"{total} of {len(index)} documents match ({elapsed:.2f} ms)")
+    for result in results:
+        print(json.dumps(result) if args.offsets else result)
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
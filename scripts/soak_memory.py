@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Soak test: memory of a long-running NERModel over millions of unique texts.
+
+Every text contains fresh random tokens, the worst case for StringStore
+growth. RSS and StringStore size are sampled at regular intervals. Run it
+once unbounded and once with --max-vocab-growth to compare: unbounded, both
+climb steadily; bounded, they level off after the first rebuilds.
+
+Usage:
+    python scripts/soak_memory.py --texts 2000000 --max-vocab-growth 200000
+    python scripts/soak_memory.py --texts 2000000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ner_service.ner_model import NERModel
+from ner_service.server import MB, memory_usage
+
+
+def unique_texts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(n):
+        words = ["".join(rng.choices(string.ascii_lowercase, k=8)) for _ in range(6)]
+        yield f"Report {i}: {' '.join(words)} from Acme in Berlin."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=20, help="Number of measurements")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--custom-model-path", default=None)
+    parser.add_argument("--max-vocab-growth", type=int, default=None)
+    args = parser.parse_args()
+
+    model = NERModel(
+        model_name=args.model,
+        custom_model_path=args.custom_model_path,
+        max_vocab_growth=args.max_vocab_growth
+    )
+    interval = max(args.batch_size, args.texts // args.samples)
+    rss = []
+    texts = unique_texts(args.texts)
+    processed = 0
+    start = time.perf_counter()
+
+    print(f"{'texts':>10} {'rss MB':>9} {'strings':>10} {'rebuilds':>9} {'texts/s':>9}")
+    while processed < args.texts:
+        batch = [text for _, text in zip(range(args.batch_size), texts)]
+        model.batch_extract_entities(batch)
+        processed += len(batch)
+        if processed % interval < args.batch_size or processed >= args.texts:
+            rss.append(memory_usage()["rss"])
+            rate = processed / (time.perf_counter() - start)
+            print(f"{processed:>10} {rss[-1] / MB:>9.1f} {len(model.nlp.vocab.strings):>10} "
+                  f"{model.rebuilds:>9} {rate:>9.0f}")
+
+    half = len(rss) // 2
+    if half:
+        early, late = rss[half], rss[-1]
+        print(f"\nRSS growth over the second half: {(late - early) / MB:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
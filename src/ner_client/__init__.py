@@ -0,0 +1,6 @@
+"""NER Service Client Package"""
+__version__ = "1.0.0"
+
+from .client import AsyncNERClient, NERClient, NERClientError
+
+__all__ = ["AsyncNERClient", "NERClient", "NERClientError"]
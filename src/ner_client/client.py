@@ -0,0 +1,502 @@
+"""
+Python client for the NER service
+Keep-alive connection pooling, sync and asyncio interfaces, coalescing of
+single extract calls into /extract/batch requests, retries with backoff on
+overload responses and pipelined streaming of large batches
+"""
+
+import asyncio
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+# Responses worth retrying: the server sheds load with 503 + Retry-After, proxies use 429
+RETRY_STATUSES = {429, 503}
+
+# Failures where the request did not reach the model; extraction has no side
+# effects, so retrying them on a fresh connection is safe
+RETRY_ERRORS = (httpx.ConnectError, httpx.RemoteProtocolError)
+
+
+class NERClientError(Exception):
+    """Raised when the service answers with an error status"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _chunks(texts: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(texts)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class _BaseClient:
+    """Configuration and request/response handling shared by both clients"""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        timeout: float = 30.0,
+        max_connections: int = 10,
+        max_retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 10.0,
+        max_batch: int = 32,
+        batch_wait_ms: float = 5.0,
+        priority: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize the client
+
+        Args:
+            base_url: URL of the NER service
+            timeout: Seconds to wait for a response
+            max_connections: Pooled keep-alive connections (also the coalesced batches in flight)
+            max_retries: Retries of a request answered with 429/503 or whose connection failed
+            backoff: First retry delay when the server sends no Retry-After; doubles per retry, with jitter
+            max_backoff: Longest wait before a retry, also capping Retry-After
+            max_batch: Most single extract calls coalesced into one batch request (1 disables coalescing)
+            batch_wait_ms: How long a single extract call waits for others to share its batch
+            priority: X-Priority lane for all requests; coalesced calls default to "interactive"
+            headers: Extra headers sent with every request (such as authentication)
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.priority = priority
+        self.headers = dict(headers or {})
+        self.requests = 0
+        self.retries = 0
+        self.coalesced_calls = 0
+        self.coalesced_batches = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, requests: int = 0, retries: int = 0, coalesced_calls: int = 0):
+        with self._stats_lock:
+            self.requests += requests
+            self.retries += retries
+            if coalesced_calls:
+                self.coalesced_calls += coalesced_calls
+                self.coalesced_batches += 1
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def _request_headers(self, priority: Optional[str]) -> Dict[str, str]:
+        priority = self.priority or priority
+        return dict(self.headers, **{"X-Priority": priority}) if priority else self.headers
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        delay = _retry_after(response) if response is not None else None
+        if delay is None:
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+        return min(delay, self.max_backoff)
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> Dict:
+        if response.is_success:
+            return response.json()
+        try:
+            detail = response.json().get("detail", response.text)
+        except ValueError:
+            detail = response.text
+        raise NERClientError(response.status_code, str(detail))
+
+    @staticmethod
+    def _batch_payload(texts: List[str], ruler_only: bool, include_text: bool) -> Dict:
+        return {"texts": texts, "ruler_only": ruler_only, "include_text": include_text}
+
+    def _coalesces(self, include_context: bool) -> bool:
+        # /extract/batch has no context variant
+        return self.max_batch > 1 and not include_context
+
+    def stats(self) -> Dict:
+        """Request, retry and coalescing counters since the client was created"""
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "coalesced_calls": self.coalesced_calls,
+                "coalesced_batches": self.coalesced_batches
+            }
+
+
+class NERClient(_BaseClient):
+    """Thread-safe synchronous client"""
+
+    def __init__(self, base_url: str = "http://localhost:8000", transport: Optional[httpx.BaseTransport] = None,
+                 **kwargs):
+        """
+        Initialize the client
+
+        Args:
+            base_url: URL of the NER service
+            transport: httpx transport to use instead of the network (such as a mock in tests)
+            **kwargs: Further settings of _BaseClient (timeout, max_batch, max_retries, ...)
+        """
+        super().__init__(base_url, **kwargs)
+        self._http = httpx.Client(base_url=base_url, timeout=self.timeout, limits=self._limits(), transport=transport)
+        self._cond = threading.Condition()
+        self._pending: Dict[bool, List] = {}
+        self._first: Dict[bool, float] = {}
+        self._closed = False
+        self._flusher = None
+        self._senders = ThreadPoolExecutor(self.max_connections, thread_name_prefix="ner-client")
+
+    def _request(self, method: str, path: str, json: Optional[Dict] = None, priority: Optional[str] = None) -> Dict:
+        headers = self._request_headers(priority)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                self._count(requests=1)
+                response = self._http.request(method, path, json=json, headers=headers)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return self._parse(response)
+            except RETRY_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+            self._count(retries=1)
+            time.sleep(self._retry_delay(attempt, response))
+
+    def health(self) -> Dict:
+        """Service health"""
+        return self._request("GET", "/health")
+
+    def extract(self, text: str, include_context: bool = False, ruler_only: bool = False) -> Dict:
+        """
+        Extract entities from one text
+
+        Calls made from several threads within batch_wait_ms of each other
+        share one /extract/batch request.
+
+        Args:
+            text: Input text
+            include_context: Also return the text and entity types (sent to /extract, never coalesced)
+            ruler_only: Match only the gazetteer
+
+        Returns:
+            {"entities": [...], "entity_count": n}, plus context fields when requested
+        """
+        if not self._coalesces(include_context):
+            return self._request("POST", "/extract",
+                                 {"text": text, "include_context": include_context, "ruler_only": ruler_only})
+        return self._submit(text, ruler_only).result()
+
+    def extract_batch(self, texts: List[str], ruler_only: bool = False, include_text: bool = True) -> List[Dict]:
+        """
+        Extract entities from several texts in one request
+
+        Args:
+            texts: Input texts
+            ruler_only: Match only the gazetteer
+            include_text: Include entity surface strings
+
+        Returns:
+            One {"entities": [...], "entity_count": n} result per text
+        """
+        return self._request("POST", "/extract/batch", self._batch_payload(texts, ruler_only, include_text))["results"]
+
+    def stream_batch(
+        self,
+        texts: Iterable[str],
+        chunk_size: int = 64,
+        concurrency: int = 2,
+        ruler_only: bool = False,
+        include_text: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Extract entities from a large or unbounded sequence of texts
+
+        Texts are read lazily and sent in chunks with up to `concurrency`
+        requests in flight; results are yielded in input order as soon as
+        their chunk is answered, so neither side holds the whole batch.
+
+        Args:
+            texts: Input texts (any iterable)
+            chunk_size: Texts per request
+            concurrency: Requests in flight
+            ruler_only: Match only the gazetteer
+            include_text: Include entity surface strings
+
+        Returns:
+            Iterator over one result per text
+        """
+        with ThreadPoolExecutor(concurrency, thread_name_prefix="ner-stream") as executor:
+            window = deque()
+            try:
+                for chunk in _chunks(texts, chunk_size):
+                    window.append(executor.submit(self.extract_batch, chunk, ruler_only, include_text))
+                    if len(window) >= concurrency:
+                        yield from window.popleft().result()
+                while window:
+                    yield from window.popleft().result()
+            finally:
+                for future in window:
+                    future.cancel()
+
+    def _submit(self, text: str, ruler_only: bool) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Client is closed")
+            items = self._pending.setdefault(ruler_only, [])
+            items.append((text, future))
+            if len(items) == 1:
+                self._first[ruler_only] = time.monotonic()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="ner-client-batcher", daemon=True)
+                self._flusher.start()
+            self._cond.notify()
+        return future
+
+    def _flush_loop(self):
+        """Hand pending calls to the senders once a batch is full or its first call waited batch_wait"""
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    ready = [
+                        key for key, items in self._pending.items()
+                        if self._closed or len(items) >= self.max_batch or now >= self._first[key] + self.batch_wait
+                    ]
+                    if ready:
+                        batches = [(key, self._pending.pop(key)) for key in ready]
+                        for key in ready:
+                            del self._first[key]
+                        break
+                    if self._closed:
+                        return
+                    timeout = min(self._first.values()) + self.batch_wait - now if self._first else None
+                    self._cond.wait(timeout)
+            for key, items in batches:
+                for start in range(0, len(items), self.max_batch):
+                    self._senders.submit(self._send_coalesced, key, items[start:start + self.max_batch])
+
+    def _send_coalesced(self, ruler_only: bool, items: List):
+        self._count(coalesced_calls=len(items))
+        try:
+            results = self._request(
+                "POST", "/extract/batch", self._batch_payload([text for text, _ in items], ruler_only, True),
+                priority="interactive"
+            )["results"]
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
+
+    def close(self):
+        """Send pending coalesced calls, then close the pooled connections"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        self._senders.shutdown(wait=True)
+        self._http.close()
+
+    def __enter__(self) -> "NERClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncNERClient(_BaseClient):
+    """asyncio client; coalesces extract calls made from concurrent tasks"""
+
+    def __init__(self, base_url: str = "http://localhost:8000",
+                 transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs):
+        """
+        Initialize the client
+
+        Args:
+            base_url: URL of the NER service
+            transport: httpx transport to use instead of the network (such as httpx.ASGITransport)
+            **kwargs: Further settings of _BaseClient (timeout, max_batch, max_retries, ...)
+        """
+        super().__init__(base_url, **kwargs)
+        self._http = httpx.AsyncClient(
+            base_url=base_url, timeout=self.timeout, limits=self._limits(), transport=transport
+        )
+        self._pending: Dict[bool, List] = {}
+        self._timers: Dict[bool, asyncio.TimerHandle] = {}
+        self._tasks = set()
+
+    async def _request(self, method: str, path: str, json: Optional[Dict] = None,
+                       priority: Optional[str] = None) -> Dict:
+        headers = self._request_headers(priority)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                self._count(requests=1)
+                response = await self._http.request(method, path, json=json, headers=headers)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return self._parse(response)
+            except RETRY_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+            self._count(retries=1)
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+    async def health(self) -> Dict:
+        """Service health"""
+        return await self._request("GET", "/health")
+
+    async def extract(self, text: str, include_context: bool = False, ruler_only: bool = False) -> Dict:
+        """
+        Extract entities from one text
+
+        Calls awaited by concurrent tasks within batch_wait_ms of each other
+        share one /extract/batch request.
+
+        Args:
+            text: Input text
+            include_context: Also return the text and entity types (sent to /extract, never coalesced)
+            ruler_only: Match only the gazetteer
+
+        Returns:
+            {"entities": [...], "entity_count": n}, plus context fields when requested
+        """
+        if not self._coalesces(include_context):
+            return await self._request("POST", "/extract",
+                                       {"text": text, "include_context": include_context, "ruler_only": ruler_only})
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        items = self._pending.setdefault(ruler_only, [])
+        items.append((text, future))
+        if len(items) >= self.max_batch:
+            self._flush(ruler_only)
+        elif len(items) == 1:
+            self._timers[ruler_only] = loop.call_later(self.batch_wait, self._flush, ruler_only)
+        return await future
+
+    async def extract_batch(self, texts: List[str], ruler_only: bool = False,
+                            include_text: bool = True) -> List[Dict]:
+        """
+        Extract entities from several texts in one request
+
+        Args:
+            texts: Input texts
+            ruler_only: Match only the gazetteer
+            include_text: Include entity surface strings
+
+        Returns:
+            One {"entities": [...], "entity_count": n} result per text
+        """
+        response = await self._request("POST", "/extract/batch", self._batch_payload(texts, ruler_only, include_text))
+        return response["results"]
+
+    async def stream_batch(
+        self,
+        texts: Iterable[str],
+        chunk_size: int = 64,
+        concurrency: int = 2,
+        ruler_only: bool = False,
+        include_text: bool = True
+    ) -> AsyncIterator[Dict]:
+        """
+        Extract entities from a large or unbounded sequence of texts
+
+        Async counterpart of NERClient.stream_batch: chunks are sent with up
+        to `concurrency` requests in flight and results are yielded in input order.
+
+        Args:
+            texts: Input texts (any iterable)
+            chunk_size: Texts per request
+            concurrency: Requests in flight
+            ruler_only: Match only the gazetteer
+            include_text: Include entity surface strings
+
+        Returns:
+            Async iterator over one result per text
+        """
+        window = deque()
+        try:
+            for chunk in _chunks(texts, chunk_size):
+                window.append(asyncio.ensure_future(self.extract_batch(chunk, ruler_only, include_text)))
+                if len(window) >= concurrency:
+                    for result in await window.popleft():
+                        yield result
+            while window:
+                for result in await window.popleft():
+                    yield result
+        finally:
+            for task in window:
+                task.cancel()
+
+    def _flush(self, ruler_only: bool):
+        timer = self._timers.pop(ruler_only, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(ruler_only, [])
+        if items:
+            task = asyncio.ensure_future(self._send_coalesced(ruler_only, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_coalesced(self, ruler_only: bool, items: List):
+        self._count(coalesced_calls=len(items))
+        try:
+            response = await self._request(
+                "POST", "/extract/batch", self._batch_payload([text for text, _ in items], ruler_only, True),
+                priority="interactive"
+            )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(items, response["results"]):
+            if not future.done():
+                future.set_result(result)
+
+    async def aclose(self):
+        """Send pending coalesced calls, then close the pooled connections"""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "AsyncNERClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
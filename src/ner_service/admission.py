@@ -0,0 +1,270 @@
+"""
+Admission control for the NER service
+Bounds in-flight inference, queues a limited number of waiting requests in
+weighted priority lanes and drops requests whose deadline has passed before
+they reach the model
+"""
+
+import asyncio
+import math
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.metrics import LatencyHistogram
+
+
+class Overloaded(Exception):
+    """Raised when both the in-flight slots and the wait queue are full"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Server overloaded")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before it is admitted"""
+
+
+class Lane:
+    """Wait queue, limits and counters of one priority lane"""
+
+    def __init__(self, weight: float = 1.0, max_queue: int = 64, max_in_flight: Optional[int] = None):
+        """
+        Initialize a lane
+
+        Args:
+            weight: Share of freed slots the lane receives while several lanes are waiting
+            max_queue: Maximum number of requests waiting in this lane
+            max_in_flight: Maximum slots the lane may hold at once (default: all)
+        """
+        if weight <= 0:
+            raise ValueError("Lane weight must be positive")
+        self.weight = weight
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.queue_time = LatencyHistogram()
+        # Stride scheduling: the waiting lane with the lowest pass is served next
+        self.pass_value = 0.0
+        self.waiters = deque()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter, _ in self.waiters if not waiter.done())
+
+    def stats(self) -> Dict:
+        return {
+            "weight": self.weight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "queue_time": self.queue_time.stats()
+        }
+
+
+DEFAULT_LANE = "default"
+
+
+class AdmissionController:
+    """
+    Bounded in-flight slots shared by weighted priority lanes
+
+    Each lane has its own bounded FIFO wait queue. When a slot frees up and
+    several lanes are waiting, lanes are served in proportion to their
+    weights (stride scheduling), so a lane with weight 4 receives four slots
+    for every one of a lane with weight 1, and an idle lane does not build up
+    credit. Without lanes, a single lane gives plain FIFO admission.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        retry_after: float = 1.0,
+        lanes: Optional[Dict[str, Lane]] = None
+    ):
+        """
+        Initialize the admission controller
+
+        Args:
+            max_in_flight: Maximum number of requests running inference at once
+            max_queue: Maximum number of requests waiting for a slot (without lanes)
+            retry_after: Seconds suggested to rejected clients
+            lanes: Priority lanes by name; the first one is the default lane
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.lanes = lanes or {DEFAULT_LANE: Lane(max_queue=max_queue)}
+        self.default_lane = next(iter(self.lanes))
+        self.in_flight = 0
+        self._virtual_time = 0.0
+
+    @property
+    def admitted(self) -> int:
+        return sum(lane.admitted for lane in self.lanes.values())
+
+    @property
+    def rejected(self) -> int:
+        return sum(lane.rejected for lane in self.lanes.values())
+
+    @property
+    def expired(self) -> int:
+        return sum(lane.expired for lane in self.lanes.values())
+
+    def lane(self, name: Optional[str] = None) -> Lane:
+        """Look up a lane by name (the default lane for None)"""
+        try:
+            return self.lanes[name or self.default_lane]
+        except KeyError:
+            raise ValueError(f"Unknown lane: {name}")
+
+    def _eligible(self, lane: Lane) -> bool:
+        return lane.max_in_flight is None or lane.in_flight < lane.max_in_flight
+
+    def _grant(self, lane: Lane):
+        lane.pass_value = max(lane.pass_value, self._virtual_time)
+        self._virtual_time = lane.pass_value
+        lane.pass_value += 1.0 / lane.weight
+        lane.in_flight += 1
+        self.in_flight += 1
+
+    async def acquire(self, deadline: Optional[float] = None, lane: Optional[str] = None, queue_limit: bool = True):
+        """
+        Wait for an inference slot
+
+        Args:
+            deadline: Absolute time.time() after which the request is dropped
+            lane: Priority lane to wait in (default lane when omitted)
+            queue_limit: Reject when the lane's queue is full; continuation
+                slices of an already admitted request pass False
+
+        Raises:
+            Overloaded: The lane's wait queue is full
+            DeadlineExceeded: The deadline passed before a slot was free
+            ValueError: Unknown lane
+        """
+        queue = self.lane(lane)
+        if deadline is not None and deadline <= time.time():
+            queue.expired += 1
+            raise DeadlineExceeded()
+
+        if self.in_flight < self.max_in_flight and self._eligible(queue) and not queue.waiters:
+            self._grant(queue)
+            queue.admitted += 1
+            queue.queue_time.record(0.0)
+            return
+
+        if queue_limit and queue.queued >= queue.max_queue:
+            queue.rejected += 1
+            raise Overloaded(self.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.waiters.append((waiter, time.perf_counter()))
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter, queue)
+            raise
+        if not done:
+            self._abandon(waiter, queue)
+            queue.expired += 1
+            raise DeadlineExceeded()
+        queue.admitted += 1
+
+    def release(self, lane: Optional[str] = None):
+        """Free a slot of the given lane and hand free slots to the lanes' waiters by weight"""
+        queue = self.lane(lane)
+        queue.in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.in_flight < self.max_in_flight:
+            candidates = []
+            for queue in self.lanes.values():
+                while queue.waiters and queue.waiters[0][0].done():
+                    queue.waiters.popleft()
+                if queue.waiters and self._eligible(queue):
+                    candidates.append(queue)
+            if not candidates:
+                return
+            queue = min(candidates, key=lambda q: max(q.pass_value, self._virtual_time))
+            waiter, enqueued = queue.waiters.popleft()
+            self._grant(queue)
+            queue.queue_time.record((time.perf_counter() - enqueued) * 1000)
+            waiter.set_result(None)
+
+    def _abandon(self, waiter: asyncio.Future, queue: Lane):
+        """Withdraw a waiter that gave up; pass on a slot it was already granted"""
+        if waiter.done() and not waiter.cancelled():
+            self.release(next(name for name, lane in self.lanes.items() if lane is queue))
+            return
+        waiter.cancel()
+        for entry in queue.waiters:
+            if entry[0] is waiter:
+                queue.waiters.remove(entry)
+                break
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a slot"""
+        return sum(lane.queued for lane in self.lanes.values())
+
+    def stats(self) -> Dict:
+        """Current occupancy and counters since startup, in total and per lane"""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()}
+        }
+
+
+def parse_deadline(deadline_header: Optional[str], timeout_header: Optional[str]) -> Optional[float]:
+    """
+    Resolve a request deadline from headers
+
+    Args:
+        deadline_header: Absolute deadline as Unix epoch seconds (X-Request-Deadline)
+        timeout_header: Relative budget in milliseconds (X-Request-Timeout-Ms)
+
+    Returns:
+        Absolute deadline as time.time() seconds, or None; the earlier one wins
+
+    Raises:
+        ValueError: A header is not a finite number
+    """
+    def finite(value: str) -> float:
+        # NaN would win min() against a valid deadline and expire the request at once
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError(f"Deadline header is not finite: {value!r}")
+        return number
+
+    deadlines = []
+    if deadline_header:
+        deadlines.append(finite(deadline_header))
+    if timeout_header:
+        deadlines.append(time.time() + finite(timeout_header) / 1000.0)
+    return min(deadlines) if deadlines else None
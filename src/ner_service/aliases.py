@@ -0,0 +1,247 @@
+"""
+Alias index for entity canonicalization
+Compiles an alias dictionary ("Apple Inc.", "Apple", "AAPL" -> one id) into a
+single file holding an open-addressing hash table of normalized-alias hashes;
+the file is memory-mapped, so lookups cost a few probes whatever the
+dictionary size and every worker process shares the same pages
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy
+from spacy.strings import hash_string
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.analytics import KEY_SEPARATOR, normalize_entity_text
+
+MAGIC = b"NERALIAS"
+FORMAT_VERSION = 1
+ALIGN = 64
+# Hash table slots per alias, at most; linear probing stays short below 50% load
+MAX_LOAD = 0.5
+
+# (alias, canonical id, label or None)
+Alias = Tuple[str, str, Optional[str]]
+
+
+def _key(alias: str, label: Optional[str] = None) -> int:
+    """Non-zero 64-bit key of a normalized alias, scoped to a label if one is given"""
+    text = normalize_entity_text(alias)
+    key = hash_string(label + KEY_SEPARATOR + text if label else text)
+    # 0 marks an empty slot
+    return key or 1
+
+
+def read_aliases(path: Union[str, Path]) -> Iterator[Alias]:
+    """
+    Stream aliases from a dictionary file
+
+    Supported formats are JSONL objects ({"alias": "AAPL", "id": "Q312",
+    "label": "ORG"}, label optional) and tab-separated
+    "alias<TAB>id[<TAB>label]" lines.
+
+    Args:
+        path: Path to a .jsonl or tab-separated alias file
+
+    Returns:
+        Iterator of (alias, canonical id, label or None)
+    """
+    path = Path(path)
+    with path.open(encoding="utf8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if path.suffix == ".jsonl":
+                entry = json.loads(line)
+                yield entry["alias"], str(entry["id"]), entry.get("label") or None
+            else:
+                alias, canonical_id, label = (line.split("\t") + [""])[:3]
+                if alias and canonical_id:
+                    yield alias, canonical_id, label or None
+
+
+def compile_aliases(aliases: Iterable[Alias], output_path: Union[str, Path]) -> Dict:
+    """
+    Compile aliases into an index file
+
+    Aliases are matched case- and whitespace-insensitively. An alias with a
+    label only matches entities of that label and wins over the same alias
+    without one; when an alias is listed twice for the same label, the first
+    entry wins. Only 64-bit hashes of the aliases are stored, so the index is
+    compact, and a lookup of an unknown alias that collides with a known one
+    (about 1 in 10^19 per alias) would return its id.
+
+    Args:
+        aliases: (alias, canonical id, label or None) entries
+        output_path: File to write
+
+    Returns:
+        The file header, with build counts
+    """
+    keys, values = [], []
+    id_index: Dict[str, int] = {}
+    scoped = 0
+    for alias, canonical_id, label in aliases:
+        keys.append(_key(alias, label))
+        values.append(id_index.setdefault(canonical_id, len(id_index)))
+        scoped += label is not None
+    entries = len(keys)
+    keys = numpy.array(keys, dtype=numpy.uint64)
+    values = numpy.array(values, dtype=numpy.uint32)
+    keys, first = numpy.unique(keys, return_index=True)
+    values = values[first]
+
+    size = 1 << max(4, int(numpy.ceil(numpy.log2(max(len(keys), 1) / MAX_LOAD))))
+    table_keys = numpy.zeros(size, dtype=numpy.uint64)
+    table_values = numpy.zeros(size, dtype=numpy.uint32)
+    slots = (keys & numpy.uint64(size - 1)).astype(numpy.int64)
+    pending = numpy.arange(len(keys))
+    # Linear probing, one vectorized round per probe step: every pending key
+    # whose slot is free competes for it, the first one wins and the rest move on
+    while pending.size:
+        current = slots[pending]
+        free = table_keys[current] == 0
+        claimed, first = numpy.unique(current[free], return_index=True)
+        winners = pending[free][first]
+        table_keys[claimed] = keys[winners]
+        table_values[claimed] = values[winners]
+        placed = numpy.zeros(len(keys), dtype=bool)
+        placed[winners] = True
+        pending = pending[~placed[pending]]
+        slots[pending] = (slots[pending] + 1) & (size - 1)
+
+    ids = list(id_index)
+    encoded = [canonical_id.encode("utf8") for canonical_id in ids]
+    id_offsets = numpy.zeros(len(ids) + 1, dtype=numpy.uint64)
+    id_offsets[1:] = numpy.cumsum([len(data) for data in encoded])
+    id_data = numpy.frombuffer(b"".join(encoded), dtype=numpy.uint8)
+
+    arrays, chunks, offset = {}, [], 0
+    for name, array in (("keys", table_keys), ("values", table_values), ("id_offsets", id_offsets),
+                        ("id_data", id_data)):
+        padding = -offset % ALIGN
+        chunks.append(b"\0" * padding + array.tobytes())
+        offset += padding
+        arrays[name] = {"offset": offset, "dtype": array.dtype.str, "length": len(array)}
+        offset += array.nbytes
+
+    header = {
+        "format": FORMAT_VERSION,
+        "aliases": len(keys),
+        "duplicates": entries - len(keys),
+        "ids": len(ids),
+        "scoped": scoped > 0,
+        "slots": size,
+        "arrays": arrays
+    }
+    header_bytes = json.dumps(header).encode("utf8")
+    data_start = len(MAGIC) + 8 + len(header_bytes)
+    data_start += -data_start % ALIGN
+
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "wb") as fp:
+        fp.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        fp.write(b"\0" * (data_start - fp.tell()))
+        for chunk in chunks:
+            fp.write(chunk)
+    os.replace(tmp, output)
+    return header
+
+
+class AliasIndex:
+    """Memory-mapped alias index written by compile_aliases"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Map an index file
+
+        The mapping is read-only, so the pages are shared through the page
+        cache by every process that opens the same file.
+
+        Args:
+            path: File written by compile_aliases
+
+        Raises:
+            ValueError: The file is not an alias index
+        """
+        self.path = str(path)
+        with open(path, "rb") as fp:
+            self._buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an alias index")
+        (length,) = struct.unpack_from("<Q", self._buffer, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._buffer[start:start + length])
+        if self.header["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported alias index format {self.header['format']}")
+        data_start = start + length
+        data_start += -data_start % ALIGN
+
+        self._views = [memoryview(self._buffer)]
+        sections = {}
+        for name, spec in self.header["arrays"].items():
+            itemsize = numpy.dtype(spec["dtype"]).itemsize
+            begin = data_start + spec["offset"]
+            sections[name] = self._views[0][begin:begin + spec["length"] * itemsize]
+            self._views.append(sections[name])
+        # memoryview casts give plain Python ints per probe, cheaper than numpy scalars
+        self._keys = sections["keys"].cast("Q")
+        self._values = sections["values"].cast("I")
+        self._id_offsets = sections["id_offsets"].cast("Q")
+        self._id_data = sections["id_data"]
+        self._views += [self._keys, self._values, self._id_offsets]
+        self._mask = self.header["slots"] - 1
+        self._scoped = self.header["scoped"]
+
+    def __len__(self) -> int:
+        return self.header["aliases"]
+
+    def _find(self, key: int) -> Optional[int]:
+        keys = self._keys
+        slot = key & self._mask
+        while True:
+            found = keys[slot]
+            if found == key:
+                return self._values[slot]
+            if found == 0:
+                return None
+            slot = (slot + 1) & self._mask
+
+    def canonical_id(self, index: int) -> str:
+        """The canonical id stored at an id index"""
+        return bytes(self._id_data[self._id_offsets[index]:self._id_offsets[index + 1]]).decode("utf8")
+
+    def lookup(self, text: str, label: Optional[str] = None) -> Optional[str]:
+        """
+        Canonical id of an entity text
+
+        Args:
+            text: Entity text as extracted
+            label: Entity label; aliases compiled for this label are tried first
+
+        Returns:
+            The canonical id, or None for unknown aliases
+        """
+        index = None
+        if label and self._scoped:
+            index = self._find(_key(text, label))
+        if index is None:
+            index = self._find(_key(text))
+        return None if index is None else self.canonical_id(index)
+
+    def close(self):
+        """Release the mapping"""
+        for view in reversed(self._views):
+            view.release()
+        self._buffer.close()
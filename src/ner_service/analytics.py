@@ -0,0 +1,294 @@
+"""
+Streaming entity analytics in fixed memory
+Approximate mention counts (Count-Min Sketch) and heavy hitters per label
+(Space-Saving) over extracted entities; summaries from parallel shards merge
+into one, so a corpus can be aggregated without keeping per-document results
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy
+import srsly
+from spacy.strings import hash_string
+from spacy.tokens import Doc
+
+# Separates label and text in sketch keys; never part of a normalized text
+KEY_SEPARATOR = "\x1f"
+
+
+def normalize_entity_text(text: str) -> str:
+    """Case- and whitespace-insensitive form under which entity mentions are counted"""
+    return " ".join(text.split()).casefold()
+
+
+class CountMinSketch:
+    """Count-Min Sketch: over-estimates a count by more than e/width of the total with probability e^-depth at most"""
+
+    # Hashes buffered before they are added to the table in one vectorized update
+    BUFFER_SIZE = 4096
+
+    def __init__(self, width: int = 2 ** 16, depth: int = 4):
+        """
+        Initialize an empty sketch
+
+        Args:
+            width: Counters per row; the error bound shrinks with the width
+            depth: Rows; the probability of exceeding the bound shrinks with every row
+        """
+        self.width = width
+        self.depth = depth
+        self.table = numpy.zeros((depth, width), dtype=numpy.int64)
+        self.total = 0
+        self._buffer: List[int] = []
+        self._rows = numpy.arange(depth, dtype=numpy.uint64)[:, None]
+
+    def _columns(self, hashes: numpy.ndarray) -> numpy.ndarray:
+        # Double hashing: row i uses h1 + i * h2, from the two halves of a 64-bit hash
+        h1 = hashes & numpy.uint64(0xFFFFFFFF)
+        h2 = (hashes >> numpy.uint64(32)) | numpy.uint64(1)
+        return ((h1 + self._rows * h2) % numpy.uint64(self.width)).astype(numpy.intp)
+
+    def add(self, key: str, count: int = 1):
+        """Count occurrences of a key"""
+        if count == 1:
+            self._buffer.append(hash_string(key))
+            if len(self._buffer) >= self.BUFFER_SIZE:
+                self._flush()
+        else:
+            self._flush()
+            columns = self._columns(numpy.array([hash_string(key)], dtype=numpy.uint64))[:, 0]
+            self.table[numpy.arange(self.depth), columns] += count
+            self.total += count
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = self._columns(numpy.array(self._buffer, dtype=numpy.uint64))
+        for row in range(self.depth):
+            self.table[row] += numpy.bincount(columns[row], minlength=self.width)
+        self.total += len(self._buffer)
+        self._buffer.clear()
+
+    def estimate(self, key: str) -> int:
+        """Upper bound of a key's count"""
+        self._flush()
+        columns = self._columns(numpy.array([hash_string(key)], dtype=numpy.uint64))[:, 0]
+        return int(self.table[numpy.arange(self.depth), columns].min())
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """Add another sketch of the same shape into this one"""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Only sketches of the same width and depth can be merged")
+        self._flush()
+        other._flush()
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters: any key with more than total/capacity occurrences is kept"""
+
+    def __init__(self, capacity: int = 100):
+        """
+        Initialize an empty summary
+
+        Args:
+            capacity: Keys tracked at once
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+        # (count, key) entries; a count may be stale (lower than the key's
+        # current count), which is fixed when the entry reaches the top
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1):
+        """Count occurrences of a key, replacing the least frequent key when full"""
+        self.total += count
+        if key in self.counts:
+            self.counts[key] += count
+            return
+        error = 0
+        if len(self.counts) >= self.capacity:
+            evicted, error = self._pop_min()
+            del self.counts[evicted], self.errors[evicted]
+        self.counts[key] = error + count
+        self.errors[key] = error
+        heapq.heappush(self._heap, (error + count, key))
+
+    def _pop_min(self) -> Tuple[str, int]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+            if key in self.counts:
+                heapq.heappush(self._heap, (self.counts[key], key))
+
+    def _floor(self) -> int:
+        """Upper bound of the count of any key that is not tracked"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Combine with a summary of another shard
+
+        Keys missing from one side are counted with that side's floor, which
+        keeps every count an upper bound and the guarantee of a single summary.
+        """
+        floor, other_floor = self._floor(), other._floor()
+        merged = {}
+        for key in self.counts.keys() | other.counts.keys():
+            count = self.counts.get(key, floor) + other.counts.get(key, other_floor)
+            error = self.errors.get(key, floor) + other.errors.get(key, other_floor)
+            merged[key] = (count, error)
+        top = heapq.nlargest(self.capacity, merged.items(), key=lambda item: (item[1][0], item[0]))
+        self.counts = {key: count for key, (count, _) in top}
+        self.errors = {key: error for key, (_, error) in top}
+        self.total += other.total
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """
+        Most frequent keys
+
+        Args:
+            n: Keys to return (all tracked keys when omitted)
+
+        Returns:
+            (key, count, error) tuples, most frequent first; the true count
+            lies between count - error and count
+        """
+        items = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return [(key, count, self.errors[key]) for key, count in items[:n]]
+
+
+class EntityAnalytics:
+    """Mention counts and top entities per label, mergeable across shards"""
+
+    def __init__(self, top_k: int = 100, width: int = 2 ** 16, depth: int = 4):
+        """
+        Initialize empty analytics
+
+        Args:
+            top_k: Entities tracked per label
+            width: Count-Min Sketch width (counters per row)
+            depth: Count-Min Sketch depth (rows)
+        """
+        self.top_k = top_k
+        self.texts = 0
+        self.label_counts: Dict[str, int] = {}
+        self.sketch = CountMinSketch(width, depth)
+        self.heavy_hitters: Dict[str, SpaceSaving] = {}
+
+    def add(self, label: str, text: str):
+        """Count one entity mention"""
+        key = normalize_entity_text(text)
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        self.sketch.add(label + KEY_SEPARATOR + key)
+        summary = self.heavy_hitters.get(label)
+        if summary is None:
+            summary = self.heavy_hitters[label] = SpaceSaving(self.top_k)
+        summary.add(key)
+
+    def add_doc(self, doc: Doc):
+        """Count the entities of a processed doc"""
+        self.texts += 1
+        for ent in doc.ents:
+            self.add(ent.label_, ent.text)
+
+    def add_entities(self, entities: Iterable[Dict]):
+        """Count the entities of one text in the extract_entities format"""
+        self.texts += 1
+        for entity in entities:
+            self.add(entity["label"], entity["text"])
+
+    def count(self, label: str, text: str) -> int:
+        """Upper bound of the mentions of an entity"""
+        return self.sketch.estimate(label + KEY_SEPARATOR + normalize_entity_text(text))
+
+    def top(self, label: str, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Most mentioned entities of a label as (normalized text, count, error)"""
+        summary = self.heavy_hitters.get(label)
+        return summary.top(n) if summary else []
+
+    def merge(self, other: "EntityAnalytics") -> "EntityAnalytics":
+        """Add the analytics of another shard into these"""
+        if self.top_k != other.top_k:
+            raise ValueError("Only analytics with the same top_k can be merged")
+        self.sketch.merge(other.sketch)
+        self.texts += other.texts
+        for label, count in other.label_counts.items():
+            self.label_counts[label] = self.label_counts.get(label, 0) + count
+        for label, summary in other.heavy_hitters.items():
+            if label in self.heavy_hitters:
+                self.heavy_hitters[label].merge(summary)
+            else:
+                self.heavy_hitters[label] = SpaceSaving(self.top_k).merge(summary)
+        return self
+
+    def report(self, n: int = 10) -> Dict:
+        """
+        Summarize the analytics
+
+        Args:
+            n: Top entities listed per label
+
+        Returns:
+            Dictionary with text and mention counts and the top entities per label
+        """
+        return {
+            "texts": self.texts,
+            "mentions": sum(self.label_counts.values()),
+            "labels": {
+                label: {
+                    "mentions": count,
+                    "top": [{"text": text, "count": c, "error": error} for text, c, error in self.top(label, n)]
+                }
+                for label, count in sorted(self.label_counts.items(), key=lambda item: -item[1])
+            },
+            "sketch": {"width": self.sketch.width, "depth": self.sketch.depth, "bytes": self.sketch.nbytes}
+        }
+
+    def to_bytes(self) -> bytes:
+        """Serialize the analytics, for instance to return them from a worker process"""
+        self.sketch._flush()
+        return srsly.msgpack_dumps({
+            "top_k": self.top_k,
+            "texts": self.texts,
+            "label_counts": self.label_counts,
+            "sketch": {"width": self.sketch.width, "depth": self.sketch.depth, "total": self.sketch.total,
+                       "table": self.sketch.table.tobytes()},
+            "heavy_hitters": {
+                label: {"total": summary.total, "counts": summary.counts, "errors": summary.errors}
+                for label, summary in self.heavy_hitters.items()
+            }
+        })
+
+    @classmethod
+    def from_bytes(cls, bytes_data: bytes) -> "EntityAnalytics":
+        """Load analytics serialized with to_bytes"""
+        msg = srsly.msgpack_loads(bytes_data)
+        sketch = msg["sketch"]
+        analytics = cls(msg["top_k"], sketch["width"], sketch["depth"])
+        analytics.texts = msg["texts"]
+        analytics.label_counts = dict(msg["label_counts"])
+        table = numpy.frombuffer(sketch["table"], dtype=numpy.int64).reshape(sketch["depth"], sketch["width"])
+        analytics.sketch.table = table.copy()
+        analytics.sketch.total = sketch["total"]
+        for label, data in msg["heavy_hitters"].items():
+            summary = analytics.heavy_hitters[label] = SpaceSaving(msg["top_k"])
+            summary.total = data["total"]
+            summary.counts = dict(data["counts"])
+            summary.errors = dict(data["errors"])
+            summary._heap = [(count, key) for key, count in summary.counts.items()]
+            heapq.heapify(summary._heap)
+        return analytics
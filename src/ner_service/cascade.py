@@ -0,0 +1,205 @@
+"""
+Model cascade for the NER service
+A fast pipeline processes every text; only documents whose entity decisions
+it is unsure about are re-run through the larger pipeline
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from spacy.language import Language
+from spacy.pipeline import EntityRecognizer
+from spacy.tokens import Doc
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.metrics import f1
+
+
+def _recognizer(nlp: Language) -> EntityRecognizer:
+    """The transition-based entity recognizer of a pipeline"""
+    for _, proc in nlp.pipeline:
+        if isinstance(proc, EntityRecognizer):
+            return proc
+    raise ValueError("The cascade's fast model needs a statistical 'ner' component")
+
+
+def _spans(doc: Doc) -> set:
+    return {(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents}
+
+
+class ModelCascade:
+    """Fast-first NER: escalates documents below a confidence threshold to a larger pipeline"""
+
+    def __init__(self, nlp: Language, threshold: float = 0.9, beam_width: int = 4):
+        """
+        Initialize the cascade
+
+        Confidence comes from a beam search over the fast model's entity
+        transitions: every span some beam proposes gets the probability mass of
+        the beams that contain it. A document's confidence is that of its least
+        certain decision, max(p, 1 - p) over all proposed spans, so both a
+        doubtful entity and a doubtful non-entity send it to the larger model. The
+        fast model's entities are those of the best beam, not of greedy decoding.
+
+        Args:
+            nlp: Fast pipeline with a statistical "ner" component
+            threshold: Documents with a lower confidence are escalated (0 never, above 1 always)
+            beam_width: Beams used to score the fast model's decisions
+        """
+        _recognizer(nlp)
+        self.nlp = nlp
+        self.threshold = threshold
+        self.beam_width = beam_width
+        self.texts = 0
+        self.escalated = 0
+        self.fast_seconds = 0.0
+        self.large_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _fast(self, nlp: Language, texts: List[str]) -> Tuple[List[Doc], List[float]]:
+        """Run the fast pipeline with beam-search NER; returns docs and their confidences"""
+        docs = [nlp.make_doc(text) for text in texts]
+        confidences = [1.0] * len(docs)
+        # Components are called directly: select_pipes would change the shared pipeline under other threads
+        for _, proc in nlp.pipeline:
+            if isinstance(proc, EntityRecognizer):
+                beams = proc.beam_parse(docs, beam_width=self.beam_width)
+                proc.set_annotations(docs, beams)
+                confidences = [
+                    min((max(p, 1.0 - p) for p in scores.values()), default=1.0)
+                    for scores in proc.scored_ents(beams)
+                ]
+            elif hasattr(proc, "pipe"):
+                docs = list(proc.pipe(docs))
+            else:
+                docs = [proc(doc) for doc in docs]
+        return docs, confidences
+
+    def pipe(
+        self,
+        items: Iterable[Union[str, Doc]],
+        large: Language,
+        finish: Optional[Callable[[Doc], Doc]] = None
+    ) -> Iterator[Doc]:
+        """
+        Process texts through the cascade, keeping input order
+
+        Args:
+            items: Texts, or docs produced by the large pipeline's tokenizer
+            large: Pipeline uncertain documents are escalated to
+            finish: Applied to documents the fast model settles (such as gazetteer matching)
+
+        Returns:
+            Processed docs
+        """
+        items = list(items)
+        if not items:
+            return
+        nlp = self.nlp
+        start = time.perf_counter()
+        docs, confidences = self._fast(nlp, [item.text if isinstance(item, Doc) else item for item in items])
+        if finish is not None:
+            docs = [doc if confidence < self.threshold else finish(doc) for doc, confidence in zip(docs, confidences)]
+        fast_seconds = time.perf_counter() - start
+
+        escalate = [i for i, confidence in enumerate(confidences) if confidence < self.threshold]
+        start = time.perf_counter()
+        for i, doc in zip(escalate, large.pipe(items[i] for i in escalate)):
+            docs[i] = doc
+        large_seconds = time.perf_counter() - start if escalate else 0.0
+
+        with self._lock:
+            self.texts += len(items)
+            self.escalated += len(escalate)
+            self.fast_seconds += fast_seconds
+            self.large_seconds += large_seconds
+        yield from docs
+
+    @property
+    def escalation_rate(self) -> float:
+        """Fraction of texts re-run through the large pipeline"""
+        return self.escalated / self.texts if self.texts else 0.0
+
+    def stats(self) -> Dict:
+        """Escalation and latency statistics since the cascade was created"""
+        with self._lock:
+            per_text = 1000 / self.texts if self.texts else 0.0
+            return {
+                "threshold": self.threshold,
+                "texts": self.texts,
+                "escalated": self.escalated,
+                "escalation_rate": round(self.escalation_rate, 4),
+                "fast_ms_per_text": round(self.fast_seconds * per_text, 3),
+                "large_ms_per_text": round(self.large_seconds * per_text, 3),
+                "blended_ms_per_text": round((self.fast_seconds + self.large_seconds) * per_text, 3)
+            }
+
+
+def evaluate_cascade(
+    cascade: ModelCascade,
+    large: Language,
+    examples: Iterable[Tuple[str, Dict]],
+    batch_size: int = 64
+) -> Dict:
+    """
+    Compare a cascade with always running the large pipeline
+
+    Agreement treats the large pipeline's entities as the reference. When the
+    examples carry gold entities, both the cascade and the large pipeline are
+    also scored against them.
+
+    Args:
+        cascade: Cascade to evaluate (its running statistics are updated)
+        large: Pipeline the cascade escalates to
+        examples: (text, {"entities": [(start, end, label), ...]}) pairs
+        batch_size: Texts per call, as the service would batch them
+
+    Returns:
+        Dictionary with escalation rate, latency per text and entity-level F1
+    """
+    texts: List[str] = []
+    gold: List[set] = []
+    for text, annots in examples:
+        texts.append(text)
+        gold.append({tuple(entity) for entity in annots.get("entities", [])})
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    start = time.perf_counter()
+    large_spans = [_spans(doc) for batch in batches for doc in large.pipe(batch)]
+    large_seconds = time.perf_counter() - start
+
+    escalated, fast_seconds = cascade.escalated, cascade.fast_seconds
+    start = time.perf_counter()
+    cascade_spans = [_spans(doc) for batch in batches for doc in cascade.pipe(batch, large)]
+    blended_seconds = time.perf_counter() - start
+    escalated = cascade.escalated - escalated
+    fast_seconds = cascade.fast_seconds - fast_seconds
+
+    def score(predicted: List[set], reference: List[set]) -> Dict:
+        matched = sum(len(p & r) for p, r in zip(predicted, reference))
+        return f1(matched, sum(map(len, predicted)), sum(map(len, reference)))
+
+    per_text = 1000 / len(texts) if texts else 0.0
+    report = {
+        "texts": len(texts),
+        "threshold": cascade.threshold,
+        "escalated": escalated,
+        "escalation_rate": escalated / len(texts) if texts else 0.0,
+        "latency_ms_per_text": {
+            "large": large_seconds * per_text,
+            "fast": fast_seconds * per_text,
+            "cascade": blended_seconds * per_text
+        },
+        "agreement_with_large": dict(
+            score(cascade_spans, large_spans),
+            identical_rate=sum(c == l for c, l in zip(cascade_spans, large_spans)) / len(texts) if texts else 0.0
+        )
+    }
+    if any(gold):
+        report["gold"] = {"large": score(large_spans, gold), "cascade": score(cascade_spans, gold)}
+    return report
@@ -0,0 +1,212 @@
+"""
+Negotiated response compression for the NER service
+Compresses JSON responses above a size threshold with zstd (when the
+zstandard package is installed) or gzip, whichever the client prefers
+"""
+
+import gzip
+import threading
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+# Encodings in server preference order when the client rates them equally
+SUPPORTED_ENCODINGS = ["zstd", "gzip"] if zstandard else ["gzip"]
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+# Bodies above this size are compressed off the event loop
+THREADPOOL_SIZE = 256 * 1024
+
+
+def negotiate_encoding(accept_encoding: Optional[str], supported: List[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, zstd;q=0.9"
+        supported: Encodings the server can produce, most preferred first
+
+    Returns:
+        Chosen encoding, or None for an uncompressed response
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _vary(headers) -> List:
+    """Response headers with Accept-Encoding added to Vary"""
+    headers = list(headers)
+    for index, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                headers[index] = (key, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
+
+
+class CompressionStats:
+    """Responses and bytes before and after compression, per encoding"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def count(self, encoding: str, raw: int, sent: int):
+        """Record one response of raw bytes sent as sent bytes"""
+        with self._lock:
+            counter = self.counters.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+            counter["responses"] += 1
+            counter["bytes_in"] += raw
+            counter["bytes_out"] += sent
+
+    def stats(self) -> Dict:
+        """Counters since startup"""
+        with self._lock:
+            return {
+                "supported": SUPPORTED_ENCODINGS,
+                "encodings": {name: dict(counter) for name, counter in self.counters.items()}
+            }
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete HTTP responses above a size threshold
+
+    Only single-message JSON or text bodies are buffered; other content types,
+    already-encoded and streaming responses pass through untouched
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 5,
+        zstd_level: int = 3,
+        stats: Optional[CompressionStats] = None
+    ):
+        """
+        Initialize the middleware
+
+        Args:
+            app: Wrapped ASGI application
+            minimum_size: Smallest body in bytes worth compressing
+            gzip_level: gzip compression level (1-9)
+            zstd_level: zstd compression level (1-22)
+            stats: Counters to record into (a private instance when omitted)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.stats = stats or CompressionStats()
+        self._local = threading.local()
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "zstd":
+            # Compressor objects are not thread-safe, so keep one per thread
+            compressor = getattr(self._local, "zstd", None)
+            if compressor is None:
+                compressor = self._local.zstd = zstandard.ZstdCompressor(level=self.zstd_level)
+            return compressor.compress(body)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict((key.lower(), value) for key, value in scope.get("headers", []))
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            async def identity_send(message):
+                if message["type"] == "http.response.start" and self._compressible(message.get("headers", [])):
+                    message = dict(message, headers=_vary(message.get("headers", [])))
+                await send(message)
+
+            await self.app(scope, receive, identity_send)
+            return
+
+        start_message = None
+        body = []
+        passthrough = False
+        sent = 0
+
+        async def buffered_send(message):
+            nonlocal start_message, passthrough, sent
+            if message["type"] == "http.response.start":
+                if self._compressible(message.get("headers", [])):
+                    # Caches must key every compressible response on the encoding, compressed or not
+                    start_message = dict(message, headers=_vary(message.get("headers", [])))
+                    return
+                passthrough = True
+                await send(message)
+                return
+            if message["type"] != "http.response.body" or (start_message is None and not passthrough):
+                await send(message)
+                return
+            more_body = message.get("more_body", False)
+            if not passthrough and more_body and not body:
+                # Streaming responses are forwarded as they are produced, never buffered
+                passthrough = True
+                await send(start_message)
+            if passthrough:
+                sent += len(message.get("body", b""))
+                await send(message)
+                if not more_body:
+                    self.stats.count("identity", sent, sent)
+                return
+            body.append(message.get("body", b""))
+            if more_body:
+                return
+            await self._send_complete(start_message, b"".join(body), encoding, send)
+
+        await self.app(scope, receive, buffered_send)
+
+    @staticmethod
+    def _compressible(headers) -> bool:
+        """Whether a response with these headers is a candidate for compression"""
+        names = {key.lower(): value for key, value in headers}
+        content_type = names.get(b"content-type", b"").decode("latin-1")
+        return b"content-encoding" not in names and content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _send_complete(self, start_message, body: bytes, encoding: str, send):
+        headers = [(key, value) for key, value in start_message.get("headers", [])]
+        if len(body) >= self.minimum_size:
+            if len(body) > THREADPOOL_SIZE:
+                compressed = await run_in_threadpool(self._compress, encoding, body)
+            else:
+                compressed = self._compress(encoding, body)
+            self.stats.count(encoding, len(body), len(compressed))
+            headers = [(key, value) for key, value in headers if key.lower() != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode())
+            ]
+            body = compressed
+        else:
+            self.stats.count("identity", len(body), len(body))
+
+        await send(dict(start_message, headers=headers))
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,43 @@
+"""
+CPU and cgroup helpers shared by the server and offline training
+Counts the CPUs a process may actually use inside a container, so worker
+pools are not sized from every CPU of the host
+"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+
+def available_cpus() -> int:
+    """
+    Number of CPUs this process may use
+
+    Takes the scheduler affinity mask and caps it with a cgroup CPU quota
+    (v2 cpu.max or v1 cfs_quota_us), as set by container runtimes.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")
+    if cpu_max and not cpu_max.startswith("max"):
+        limit, period = cpu_max.split()
+        quota = int(limit) / int(period)
+    else:
+        limit = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if limit and period and int(limit) > 0:
+            quota = int(limit) / int(period)
+    if quota:
+        cpus = min(cpus, max(1, int(quota)))
+    return max(1, cpus)
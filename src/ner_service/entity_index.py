@@ -0,0 +1,453 @@
+"""
+Inverted index over extracted entities
+Maps (label, normalized text) to the documents that mention it, with character
+offsets. Documents are written in batches to immutable, memory-mapped segment
+files that can later be merged; a query only reads the postings of the
+entities it asks for, so corpus searches need no rescans of stored results
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.analytics import KEY_SEPARATOR, normalize_entity_text
+
+MAGIC = b"NERENTIX"
+FORMAT_VERSION = 1
+ALIGN = 64
+MANIFEST = "index.json"
+# Never part of UTF-8 text, so prefix + _END sorts after every term starting with prefix
+_END = b"\xff"
+
+# (label, text); a text of None matches every entity of the label
+Query = Tuple[str, Optional[str]]
+
+
+def _term(label: str, text: Optional[str] = None) -> bytes:
+    """Sort key of an entity, or of the whole label when no text is given"""
+    return (label + KEY_SEPARATOR + (normalize_entity_text(text) if text is not None else "")).encode("utf8")
+
+
+def _pack_strings(strings: Sequence[bytes]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    offsets = numpy.zeros(len(strings) + 1, dtype=numpy.uint64)
+    offsets[1:] = numpy.cumsum([len(data) for data in strings])
+    return offsets, numpy.frombuffer(b"".join(strings), dtype=numpy.uint8)
+
+
+def _write_segment(path: Path, terms: List[bytes], term_ids: numpy.ndarray, docs: numpy.ndarray,
+                   starts: numpy.ndarray, ends: numpy.ndarray, doc_offsets: numpy.ndarray,
+                   doc_data: numpy.ndarray) -> Dict:
+    """Write one segment; term_ids are positions in the sorted terms, one per mention"""
+    order = numpy.lexsort((starts, docs, term_ids))
+    posting_offsets = numpy.zeros(len(terms) + 1, dtype=numpy.uint64)
+    posting_offsets[1:] = numpy.cumsum(numpy.bincount(term_ids, minlength=len(terms)))
+    term_offsets, term_data = _pack_strings(terms)
+
+    arrays, chunks, offset = {}, [], 0
+    for name, values in (("term_offsets", term_offsets), ("term_data", term_data),
+                         ("posting_offsets", posting_offsets),
+                         ("docs", docs[order].astype(numpy.uint32)),
+                         ("starts", starts[order].astype(numpy.uint32)),
+                         ("ends", ends[order].astype(numpy.uint32)),
+                         ("doc_offsets", doc_offsets), ("doc_data", doc_data)):
+        padding = -offset % ALIGN
+        chunks.append(b"\0" * padding + values.tobytes())
+        offset += padding
+        arrays[name] = {"offset": offset, "dtype": values.dtype.str, "length": len(values)}
+        offset += values.nbytes
+
+    header = {
+        "format": FORMAT_VERSION,
+        "documents": len(doc_offsets) - 1,
+        "terms": len(terms),
+        "mentions": len(docs),
+        "arrays": arrays
+    }
+    header_bytes = json.dumps(header).encode("utf8")
+    data_start = len(MAGIC) + 8 + len(header_bytes)
+    data_start += -data_start % ALIGN
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fp:
+        fp.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        fp.write(b"\0" * (data_start - fp.tell()))
+        for chunk in chunks:
+            fp.write(chunk)
+    os.replace(tmp, path)
+    return header
+
+
+def _read_manifest(path: Path) -> Dict:
+    manifest_path = path / MANIFEST
+    if not manifest_path.exists():
+        return {"format": FORMAT_VERSION, "segments": [], "next_segment": 0}
+    manifest = json.loads(manifest_path.read_text(encoding="utf8"))
+    if manifest["format"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported entity index format {manifest['format']}")
+    return manifest
+
+
+def _write_manifest(path: Path, manifest: Dict):
+    tmp = path / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf8")
+    os.replace(tmp, path / MANIFEST)
+
+
+class _Segment:
+    """One memory-mapped segment; document numbers are local to the segment"""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as fp:
+            self._buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an entity index segment")
+        (length,) = struct.unpack_from("<Q", self._buffer, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._buffer[start:start + length])
+        data_start = start + length
+        data_start += -data_start % ALIGN
+        arrays = {
+            name: numpy.frombuffer(self._buffer, dtype=spec["dtype"], count=spec["length"],
+                                   offset=data_start + spec["offset"])
+            for name, spec in self.header["arrays"].items()
+        }
+        self.documents = self.header["documents"]
+        self.term_offsets = arrays["term_offsets"]
+        self.term_data = arrays["term_data"]
+        self.posting_offsets = arrays["posting_offsets"]
+        self.docs = arrays["docs"]
+        self.starts = arrays["starts"]
+        self.ends = arrays["ends"]
+        self.doc_offsets = arrays["doc_offsets"]
+        self.doc_data = arrays["doc_data"]
+
+    def term(self, index: int) -> bytes:
+        return self.term_data[self.term_offsets[index]:self.term_offsets[index + 1]].tobytes()
+
+    def terms(self) -> List[bytes]:
+        data, offsets = self.term_data.tobytes(), self.term_offsets.tolist()
+        return [data[begin:end] for begin, end in zip(offsets, offsets[1:])]
+
+    def doc_id(self, doc: int) -> str:
+        return self.doc_data[self.doc_offsets[doc]:self.doc_offsets[doc + 1]].tobytes().decode("utf8")
+
+    def term_range(self, query: Query, prefix: bool) -> Tuple[int, int]:
+        """Range of sorted terms matching a query"""
+        label, text = query
+        key = _term(label, text)
+        count = self.header["terms"]
+        low = bisect.bisect_left(range(count), key, key=self.term)
+        if text is None or prefix:
+            return low, bisect.bisect_left(range(count), key + _END, lo=low, key=self.term)
+        return low, low + (low < count and self.term(low) == key)
+
+    def postings(self, terms: Tuple[int, int]) -> slice:
+        return slice(int(self.posting_offsets[terms[0]]), int(self.posting_offsets[terms[1]]))
+
+    def term_documents(self, terms: Tuple[int, int]) -> numpy.ndarray:
+        """Sorted documents of a term range, with repeats for a single term"""
+        docs = self.docs[self.postings(terms)]
+        # A single term's postings are sorted by document; a range spans several lists
+        return docs if terms[1] - terms[0] <= 1 else numpy.unique(docs)
+
+    def match(self, ranges: List[Tuple[int, int]]) -> numpy.ndarray:
+        """Sorted documents mentioning an entity of every term range"""
+        # Smallest posting lists first: the candidates shrink fastest, and each
+        # longer list is only binary-searched for the remaining candidates
+        ranges = sorted(ranges, key=lambda terms: int(self.posting_offsets[terms[1]] - self.posting_offsets[terms[0]]))
+        docs = self.term_documents(ranges[0])
+        matched = docs[numpy.concatenate(([True], docs[1:] != docs[:-1]))] if len(docs) else docs
+        for terms in ranges[1:]:
+            docs = self.term_documents(terms)
+            if not len(matched) or not len(docs):
+                return matched[:0]
+            found = numpy.minimum(numpy.searchsorted(docs, matched), len(docs) - 1)
+            matched = matched[docs[found] == matched]
+        return matched
+
+    def mentions(self, ranges: List[Tuple[int, int]], docs: numpy.ndarray) -> Dict[int, List[Dict]]:
+        """Queried mentions of the given documents"""
+        found: Dict[int, List[Dict]] = {int(doc): [] for doc in docs}
+        for terms in ranges:
+            postings = self.postings(terms)
+            if terms[1] - terms[0] == 1:
+                term_docs = self.docs[postings]
+                spans = zip(numpy.searchsorted(term_docs, docs, side="left").tolist(),
+                            numpy.searchsorted(term_docs, docs, side="right").tolist())
+                positions = postings.start + numpy.array(
+                    [position for begin, end in spans for position in range(begin, end)], dtype=numpy.int64
+                )
+            else:
+                positions = postings.start + numpy.nonzero(numpy.isin(self.docs[postings], docs))[0]
+            term_indices = numpy.searchsorted(self.posting_offsets, positions, side="right") - 1
+            for position, term_index in zip(positions.tolist(), term_indices.tolist()):
+                label, text = self.term(term_index).decode("utf8").split(KEY_SEPARATOR, 1)
+                found[int(self.docs[position])].append({
+                    "label": label,
+                    "text": text,
+                    "start": int(self.starts[position]),
+                    "end": int(self.ends[position])
+                })
+        return found
+
+    def close(self):
+        self.term_offsets = self.term_data = self.posting_offsets = None
+        self.docs = self.starts = self.ends = self.doc_offsets = self.doc_data = None
+        self._buffer.close()
+
+
+class EntityIndexWriter:
+    """Adds documents to an entity index directory, one segment per batch"""
+
+    def __init__(self, path: Union[str, Path], segment_size: int = 100_000):
+        """
+        Open an index directory for writing, creating it if needed
+
+        Documents are buffered in memory and written as a new segment every
+        segment_size documents and on flush/close; existing segments are kept,
+        so an index grows incrementally. Document ids are not checked for
+        uniqueness: a document added twice is returned twice. Only one writer
+        may use a directory at a time.
+
+        Args:
+            path: Index directory
+            segment_size: Documents per segment
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self._manifest = _read_manifest(self.path)
+        self.documents = sum(segment["documents"] for segment in self._manifest["segments"])
+        self._reset()
+
+    def _reset(self):
+        self._terms: Dict[bytes, int] = {}
+        self._doc_ids: List[bytes] = []
+        self._term_ids = array("I")
+        self._docs = array("I")
+        self._starts = array("I")
+        self._ends = array("I")
+
+    def add(self, doc_id: str, entities: Iterable[Dict]):
+        """
+        Index the entities of one document
+
+        Args:
+            doc_id: Document id returned by queries
+            entities: Entities in the extract_entities format
+        """
+        doc = len(self._doc_ids)
+        self._doc_ids.append(str(doc_id).encode("utf8"))
+        for entity in entities:
+            term = _term(entity["label"], entity["text"])
+            self._term_ids.append(self._terms.setdefault(term, len(self._terms)))
+            self._docs.append(doc)
+            self._starts.append(entity["start"])
+            self._ends.append(entity["end"])
+        self.documents += 1
+        if len(self._doc_ids) >= self.segment_size:
+            self.flush()
+
+    def add_results(self, results: Iterable[Dict], doc_ids: Optional[Iterable[str]] = None):
+        """
+        Index batch_extract_entities results
+
+        Args:
+            results: Results with "entities" and an optional "id"
+            doc_ids: Document ids, in result order (defaults to each result's
+                "id", or its position in the index)
+        """
+        doc_ids = iter(doc_ids) if doc_ids is not None else None
+        for result in results:
+            doc_id = next(doc_ids) if doc_ids is not None else result.get("id", self.documents)
+            self.add(doc_id, result["entities"])
+
+    def flush(self) -> Optional[Dict]:
+        """
+        Write the buffered documents as a new segment and publish it
+
+        Returns:
+            The segment's manifest entry, or None if nothing was buffered
+        """
+        if not self._doc_ids:
+            return None
+        terms = sorted(self._terms)
+        ranks = numpy.empty(len(terms), dtype=numpy.uint32)
+        ranks[[self._terms[term] for term in terms]] = numpy.arange(len(terms), dtype=numpy.uint32)
+        name = f"segment-{self._manifest['next_segment']:06d}.neidx"
+        doc_offsets, doc_data = _pack_strings(self._doc_ids)
+        header = _write_segment(
+            self.path / name, terms, ranks[numpy.frombuffer(self._term_ids, dtype=numpy.uint32)],
+            numpy.frombuffer(self._docs, dtype=numpy.uint32), numpy.frombuffer(self._starts, dtype=numpy.uint32),
+            numpy.frombuffer(self._ends, dtype=numpy.uint32), doc_offsets, doc_data
+        )
+        entry = {"file": name, "documents": header["documents"], "mentions": header["mentions"]}
+        self._manifest["segments"].append(entry)
+        self._manifest["next_segment"] += 1
+        _write_manifest(self.path, self._manifest)
+        self._reset()
+        return entry
+
+    def close(self):
+        """Flush the remaining documents"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def merge_segments(path: Union[str, Path], max_segments: int = 1) -> Dict:
+    """
+    Merge the newest segments of an index into one
+
+    Fewer segments mean fewer lookups per query. The newest segments are
+    merged until at most max_segments remain, which keeps documents in
+    insertion order. Readers that are already open keep using the old files
+    until they are reopened. The merged postings are built in memory.
+
+    Args:
+        path: Index directory
+        max_segments: Segments left after the merge
+
+    Returns:
+        The updated manifest
+    """
+    path = Path(path)
+    manifest = _read_manifest(path)
+    merged_entries = manifest["segments"][max(max_segments, 1) - 1:]
+    if len(merged_entries) < 2:
+        return manifest
+    segments = [_Segment(path / entry["file"]) for entry in merged_entries]
+    segment_terms = [segment.terms() for segment in segments]
+    terms = sorted(set().union(*segment_terms))
+    rank = {term: index for index, term in enumerate(terms)}
+
+    term_ids, docs, starts, ends, doc_offsets, doc_data = [], [], [], [], [], []
+    doc_base, data_base = 0, 0
+    for segment, local_terms in zip(segments, segment_terms):
+        local_ranks = numpy.array([rank[term] for term in local_terms], dtype=numpy.uint32)
+        term_ids.append(numpy.repeat(local_ranks, numpy.diff(segment.posting_offsets).astype(numpy.int64)))
+        docs.append(segment.docs + numpy.uint32(doc_base))
+        starts.append(numpy.array(segment.starts))
+        ends.append(numpy.array(segment.ends))
+        doc_offsets.append(segment.doc_offsets[:-1] + numpy.uint64(data_base))
+        doc_data.append(numpy.array(segment.doc_data))
+        doc_base += segment.documents
+        data_base += len(segment.doc_data)
+    doc_offsets.append(numpy.array([data_base], dtype=numpy.uint64))
+
+    name = f"segment-{manifest['next_segment']:06d}.neidx"
+    header = _write_segment(
+        path / name, terms, numpy.concatenate(term_ids), numpy.concatenate(docs), numpy.concatenate(starts),
+        numpy.concatenate(ends), numpy.concatenate(doc_offsets), numpy.concatenate(doc_data)
+    )
+    for segment in segments:
+        segment.close()
+
+    manifest["segments"] = manifest["segments"][:len(manifest["segments"]) - len(merged_entries)] + [
+        {"file": name, "documents": header["documents"], "mentions": header["mentions"]}
+    ]
+    manifest["next_segment"] += 1
+    _write_manifest(path, manifest)
+    for entry in merged_entries:
+        (path / entry["file"]).unlink()
+    return manifest
+
+
+class EntityIndex:
+    """Read-only view of an entity index directory"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Map the segments listed in the index manifest
+
+        Args:
+            path: Index directory written by EntityIndexWriter
+
+        Raises:
+            ValueError: The directory holds no entity index
+        """
+        self.path = Path(path)
+        if not (self.path / MANIFEST).exists():
+            raise ValueError(f"{path} is not an entity index")
+        self.manifest = _read_manifest(self.path)
+        self.segments = [_Segment(self.path / entry["file"]) for entry in self.manifest["segments"]]
+
+    def __len__(self) -> int:
+        return sum(segment.documents for segment in self.segments)
+
+    def search(
+        self,
+        *queries: Query,
+        prefix: bool = False,
+        limit: Optional[int] = None,
+        offsets: bool = False
+    ) -> List:
+        """
+        Documents that mention all queried entities
+
+        Args:
+            queries: (label, text) pairs; texts are normalized like extracted
+                ones, and a text of None matches any entity of the label
+            prefix: Match entity texts starting with the queried texts
+            limit: Maximum number of documents to return
+            offsets: Return the matching mentions of each document
+
+        Returns:
+            Document ids in indexing order, or with offsets, dictionaries
+            with "id" and "mentions" (label, normalized text, start, end)
+        """
+        if not queries:
+            raise ValueError("search needs at least one (label, text) query")
+        results = []
+        for segment in self.segments:
+            if limit is not None and len(results) >= limit:
+                break
+            ranges = [segment.term_range(query, prefix) for query in queries]
+            docs = segment.match(ranges)
+            if limit is not None:
+                docs = docs[:limit - len(results)]
+            if not offsets:
+                results.extend(segment.doc_id(doc) for doc in docs.tolist())
+                continue
+            mentions = segment.mentions(ranges, docs)
+            for doc in docs.tolist():
+                found = sorted(mentions[doc], key=lambda mention: (mention["start"], mention["end"]))
+                results.append({"id": segment.doc_id(doc), "mentions": found})
+        return results
+
+    def count(self, *queries: Query, prefix: bool = False) -> int:
+        """Number of documents that mention all queried entities"""
+        if not queries:
+            raise ValueError("count needs at least one (label, text) query")
+        return sum(len(segment.match([segment.term_range(query, prefix) for query in queries]))
+                   for segment in self.segments)
+
+    def stats(self) -> Dict:
+        """Document, term and mention counts and the size on disk"""
+        return {
+            "documents": len(self),
+            "segments": len(self.segments),
+            "terms": sum(segment.header["terms"] for segment in self.segments),
+            "mentions": sum(segment.header["mentions"] for segment in self.segments),
+            "bytes": sum((self.path / entry["file"]).stat().st_size for entry in self.manifest["segments"])
+        }
+
+    def close(self):
+        """Release the mappings"""
+        for segment in self.segments:
+            segment.close()
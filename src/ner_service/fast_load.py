@@ -0,0 +1,287 @@
+"""
+Single-file packed model format for fast cold starts
+Packs a spaCy pipeline's config, vocab, tokenizer and component state into
+one file whose weight arrays are stored raw and aligned, so loading maps them
+from the file instead of unpacking and copying them
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy
+import spacy
+import srsly
+import thinc
+from spacy import util
+from spacy.language import Language
+from spacy.pipeline import EntityRuler
+from spacy.tokenizer import Tokenizer
+from thinc.api import Config, Model
+from thinc.model import deserialize_attr
+from thinc.util import convert_recursive, is_xp_array
+
+MAGIC = b"NERPACK1"
+FORMAT_VERSION = 1
+ALIGN = 64
+PACKED_SUFFIX = ".nerpack"
+DEFAULT_TOKENIZER = "spacy.Tokenizer.v1"
+
+
+def _library_versions() -> Dict[str, str]:
+    """Versions of the libraries whose internals the packed layout depends on"""
+    return {"spacy": spacy.__version__, "thinc": thinc.__version__, "srsly": srsly.__version__}
+
+
+@util.registry.tokenizers("ner_service.BareTokenizer.v1")
+def create_bare_tokenizer():
+    """Tokenizer without language rules, filled from the packed tokenizer state"""
+
+    def tokenizer_factory(nlp):
+        return Tokenizer(nlp.vocab)
+
+    return tokenizer_factory
+
+
+class _Writer:
+    """Lays out byte sections and raw arrays at aligned offsets"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.sections: Dict[str, List[int]] = {}
+        self.arrays: Dict[str, Dict] = {}
+
+    def _append(self, data: bytes) -> int:
+        padding = -self.size % ALIGN
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.size += padding
+        offset = self.size
+        self.chunks.append(data)
+        self.size += len(data)
+        return offset
+
+    def add_bytes(self, name: str, data: bytes):
+        self.sections[name] = [self._append(data), len(data)]
+
+    def add_array(self, name: str, array) -> str:
+        array = numpy.ascontiguousarray(array)
+        self.arrays[name] = {
+            "offset": self._append(array.tobytes()),
+            "dtype": array.dtype.str,
+            "shape": list(array.shape)
+        }
+        return name
+
+
+def _thinc_state(model: Model, prefix: str, writer: _Writer) -> bytes:
+    """Serialize a thinc model with its parameters moved into raw arrays"""
+    msg = model.to_dict()
+    params = []
+    for index, node_params in enumerate(msg["params"]):
+        refs = {}
+        for name, value in node_params.items():
+            refs[name] = None if value is None else writer.add_array(
+                f"{prefix}/{index}/{name}", model.ops.to_numpy(value)
+            )
+        params.append(refs)
+    msg["params"] = params
+    msg = convert_recursive(is_xp_array, model.ops.to_numpy, msg)
+    return srsly.msgpack_dumps(msg)
+
+
+def _restore_thinc(model: Model, msg: Dict, arrays: Dict[str, numpy.ndarray]):
+    """Counterpart of Model.from_dict that keeps mapped parameters instead of copying them"""
+    default_deserializer = deserialize_attr.dispatch(object)
+    nodes = list(model.walk())
+    if len(msg["nodes"]) != len(nodes):
+        raise ValueError("Cannot load packed model: mismatched model structure")
+    for i, node in enumerate(nodes):
+        info = msg["nodes"][i]
+        node.name = info["name"]
+        for dim, value in info["dims"].items():
+            if value is not None:
+                node.set_dim(dim, value)
+        for ref, ref_index in info["refs"].items():
+            node.set_ref(ref, None if ref_index is None else nodes[ref_index])
+        for attr, value in msg["attrs"][i].items():
+            default = node.attrs.get(attr)
+            if deserialize_attr.dispatch(type(default)) is default_deserializer:
+                node.attrs[attr] = srsly.msgpack_loads(value)
+            else:
+                node.attrs[attr] = deserialize_attr(default, value, attr, node)
+        for name, key in msg["params"][i].items():
+            node.set_param(name, None if key is None else arrays[key])
+        for j, shim_bytes in enumerate(msg["shims"][i]):
+            node.shims[j].from_bytes(shim_bytes)
+
+
+def pack_model(model: Union[str, Language], output_path: str) -> Dict:
+    """
+    Write a pipeline as a single packed file
+
+    Args:
+        model: Installed package name, model directory or loaded pipeline
+        output_path: File to write (conventionally with the .nerpack suffix)
+
+    Returns:
+        The file header
+    """
+    nlp = spacy.load(model) if isinstance(model, (str, Path)) else model
+    writer = _Writer()
+    vectors = nlp.vocab.vectors
+    raw_vectors = getattr(vectors, "mode", None) == "default" and isinstance(vectors.data, numpy.ndarray)
+
+    writer.add_bytes("vocab", nlp.vocab.to_bytes(exclude=["vectors"]))
+    if raw_vectors:
+        writer.add_bytes("vectors", vectors.to_bytes(exclude=["strings", "vectors"]))
+        writer.add_array("vectors/data", vectors.data)
+    else:
+        writer.add_bytes("vectors", vectors.to_bytes(exclude=["strings"]))
+    writer.add_bytes("tokenizer", nlp.tokenizer.to_bytes(exclude=["vocab"]))
+
+    components = {}
+    for name, proc in nlp.components:
+        if not hasattr(proc, "to_bytes"):
+            continue
+        if isinstance(getattr(proc, "model", None), Model) and hasattr(proc, "from_bytes"):
+            writer.add_bytes(f"component/{name}", proc.to_bytes(exclude=["vocab", "model"]))
+            writer.add_bytes(f"model/{name}", _thinc_state(proc.model, f"model/{name}", writer))
+            components[name] = "thinc"
+        else:
+            writer.add_bytes(f"component/{name}", proc.to_bytes(exclude=["vocab"]))
+            components[name] = "bytes"
+
+    header = {
+        "format": FORMAT_VERSION,
+        **_library_versions(),
+        "config": nlp.config.to_str(interpolate=False),
+        "meta": nlp.meta,
+        "disabled": list(nlp.disabled),
+        "components": components,
+        "raw_vectors": raw_vectors,
+        "sections": writer.sections,
+        "arrays": writer.arrays
+    }
+    header_bytes = json.dumps(header).encode("utf8")
+    data_start = len(MAGIC) + 8 + len(header_bytes)
+    data_start += -data_start % ALIGN
+
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "wb") as fp:
+        fp.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        fp.write(b"\0" * (data_start - fp.tell()))
+        for chunk in writer.chunks:
+            fp.write(chunk)
+    os.replace(tmp, output)
+    return header
+
+
+def is_packed(path: str) -> bool:
+    """Whether a path is a packed model file"""
+    path = Path(path)
+    if not path.is_file():
+        return False
+    with open(path, "rb") as fp:
+        return fp.read(len(MAGIC)) == MAGIC
+
+
+def _read_header(buffer) -> Tuple[Dict, int]:
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a packed model file")
+    (length,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(bytes(buffer[start:start + length]))
+    data_start = start + length
+    data_start += -data_start % ALIGN
+    return header, data_start
+
+
+def load_packed(path: str) -> Language:
+    """
+    Load a pipeline written by pack_model
+
+    The file is memory-mapped copy-on-write; weight arrays are views into
+    the mapping, so their pages are read lazily and, as inference never
+    writes them, stay shared through the page cache by every process that
+    loads the same file.
+
+    Args:
+        path: Packed model file
+
+    Returns:
+        The loaded pipeline
+
+    Raises:
+        ValueError: The file is not a packed model or was written with another
+            spaCy, thinc or srsly version
+    """
+    with open(path, "rb") as fp:
+        # Copy-on-write, since thinc's kernels only accept writable buffers
+        buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_COPY)
+    header, data_start = _read_header(buffer)
+    if header["format"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported packed model format {header['format']}")
+    # Loading rebuilds thinc models node by node from their serialized
+    # state, so only the exact library versions the file was packed with
+    # are trusted
+    for library, version in _library_versions().items():
+        if header.get(library) != version:
+            raise ValueError(f"Packed with {library} {header.get(library)}, running {version}; re-pack the model")
+
+    view = memoryview(buffer)
+
+    def section(name: str) -> bytes:
+        offset, length = header["sections"][name]
+        return view[data_start + offset:data_start + offset + length]
+
+    arrays = {
+        name: numpy.frombuffer(
+            buffer, dtype=spec["dtype"], count=int(numpy.prod(spec["shape"])), offset=data_start + spec["offset"]
+        ).reshape(spec["shape"])
+        for name, spec in header["arrays"].items()
+    }
+
+    config = Config().from_str(header["config"], interpolate=False)
+    tokenizer_config = config["nlp"]["tokenizer"]
+    # The default tokenizer would compile the language's rules only for
+    # from_bytes to replace them, so start from a bare one
+    if tokenizer_config.get("@tokenizers") == DEFAULT_TOKENIZER:
+        config["nlp"]["tokenizer"] = {"@tokenizers": "ner_service.BareTokenizer.v1"}
+    nlp = util.load_model_from_config(
+        config, meta=header["meta"], disable=header["disabled"], auto_fill=False, validate=False
+    )
+    nlp.config["nlp"]["tokenizer"] = tokenizer_config
+
+    nlp.vocab.from_bytes(section("vocab"), exclude=["vectors"])
+    vectors = nlp.vocab.vectors
+    if header["raw_vectors"]:
+        vectors.from_bytes(section("vectors"), exclude=["strings", "vectors"])
+        vectors.data = arrays["vectors/data"]
+        vectors._sync_unset()
+    else:
+        vectors.from_bytes(section("vectors"), exclude=["strings"])
+    vectors.name = header["meta"].get("vectors", {}).get("name")
+    nlp.tokenizer.from_bytes(section("tokenizer"), exclude=["vocab"])
+
+    for name, proc in nlp.components:
+        kind = header["components"].get(name)
+        if kind == "thinc":
+            proc.from_bytes(section(f"component/{name}"), exclude=["vocab", "model"])
+            _restore_thinc(proc.model, srsly.msgpack_loads(section(f"model/{name}")), arrays)
+        elif kind == "bytes":
+            proc.from_bytes(section(f"component/{name}"), exclude=["vocab"])
+            if isinstance(proc, EntityRuler):
+                # EntityRuler.from_bytes replaces its phrase matcher after
+                # adding the patterns to it, so add them again
+                patterns = proc.patterns
+                proc.clear()
+                proc.add_patterns(patterns)
+    nlp._link_components()
+    return nlp
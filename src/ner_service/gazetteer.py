@@ -0,0 +1,370 @@
+"""
+Gazetteer support for the NER service
+Compiles large dictionaries of known entity names into a hash table of token
+keys that is added to the spaCy pipeline as an entity ruler component
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy
+import srsly
+from spacy.attrs import IDS
+from spacy.language import Language
+from spacy.strings import hash_string
+from spacy.tokens import Doc, Span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Precedence values accepted by add_gazetteer
+PRECEDENCE_MODEL = "model"
+PRECEDENCE_GAZETTEER = "gazetteer"
+PRECEDENCES = (PRECEDENCE_MODEL, PRECEDENCE_GAZETTEER)
+
+# Token attributes that can be matched without running any pipeline component
+LEXICAL_ATTRS = ("ORTH", "LOWER", "NORM", "SHAPE")
+
+# How term keys are hashed, recorded in the table's meta; tables hashed any
+# other way must be recompiled
+KEY_HASH = "murmurhash64a:space-joined-keys"
+
+
+def _term_key(keys) -> int:
+    """Stable 64-bit hash of a sequence of token attribute keys"""
+    return hash_string(" ".join(map(str, keys)))
+
+
+class Gazetteer:
+    """
+    Entity ruler backed by a compiled dictionary of known names
+
+    Each term is tokenized once at compile time and stored as a stable 64-bit
+    hash of its token attribute keys (the same uint64 keys spaCy stores in the
+    StringStore), so compiled tables load under any Python version. Matching
+    is a set lookup per token plus one dict lookup per candidate length, so
+    its cost does not depend on the dictionary size, and reloading only reads
+    a few numpy arrays instead of re-creating a Doc for every term as
+    EntityRuler/PhraseMatcher serialization does.
+    """
+
+    META_FILE = "gazetteer.json"
+    ARRAYS_FILE = "table.npz"
+
+    def __init__(self, name: str = "gazetteer", attr: str = "LOWER", overwrite_ents: bool = False):
+        """
+        Initialize an empty gazetteer
+
+        Args:
+            name: Component name in the pipeline
+            attr: Token attribute used for matching (ORTH for case-sensitive)
+            overwrite_ents: Replace overlapping entities already set on the doc
+        """
+        attr = attr.upper()
+        if attr not in LEXICAL_ATTRS:
+            raise ValueError(f"Unsupported match attribute: {attr}")
+        self.name = name
+        self.attr = attr
+        self.overwrite_ents = overwrite_ents
+        self.label_names: List[str] = []
+        self._label_ids: Dict[str, int] = {}
+        self._table: Dict[int, int] = {}
+        self._first_keys = set()
+        self._lengths: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @property
+    def labels(self) -> List[str]:
+        """Entity labels covered by the gazetteer"""
+        return sorted(self.label_names)
+
+    def add_terms(self, terms: Iterable[Tuple[str, str]], nlp: Language, batch_size: int = 1000):
+        """
+        Compile (term, label) pairs using only the pipeline's tokenizer
+
+        The first label seen for a term wins.
+
+        Args:
+            terms: Iterable of (term, label) pairs
+            nlp: Pipeline whose tokenizer the terms are split with
+            batch_size: Number of terms tokenized per batch
+        """
+        labels: List[str] = []
+
+        def _texts() -> Iterator[str]:
+            for term, label in terms:
+                term = term.strip()
+                if term:
+                    labels.append(label)
+                    yield term
+
+        attr_id = IDS[self.attr]
+        lengths = set(self._lengths)
+        for i, doc in enumerate(nlp.tokenizer.pipe(_texts(), batch_size=batch_size)):
+            keys = tuple(doc.to_array(attr_id).tolist())
+            self._table.setdefault(_term_key(keys), self._label_id(labels[i]))
+            self._first_keys.add(keys[0])
+            lengths.add(len(keys))
+        self._lengths = sorted(lengths, reverse=True)
+
+    def _label_id(self, label: str) -> int:
+        if label not in self._label_ids:
+            self._label_ids[label] = len(self.label_names)
+            self.label_names.append(label)
+        return self._label_ids[label]
+
+    def match(self, doc: Doc) -> List[Span]:
+        """
+        Find the longest non-overlapping gazetteer matches in a doc
+
+        Args:
+            doc: Tokenized doc
+
+        Returns:
+            Matched spans, left to right
+        """
+        keys = doc.to_array(IDS[self.attr]).tolist()
+        n_tokens = len(keys)
+        spans = []
+        i = 0
+        while i < n_tokens:
+            if keys[i] in self._first_keys:
+                for length in self._lengths:
+                    if i + length > n_tokens:
+                        continue
+                    label_id = self._table.get(_term_key(keys[i:i + length]))
+                    if label_id is not None:
+                        spans.append(Span(doc, i, i + length, label=self.label_names[label_id]))
+                        i += length
+                        break
+                else:
+                    i += 1
+            else:
+                i += 1
+        return spans
+
+    def __call__(self, doc: Doc) -> Doc:
+        """Add gazetteer matches to the doc's entities"""
+        return self.apply(doc, self.overwrite_ents)
+
+    def apply(self, doc: Doc, overwrite: bool) -> Doc:
+        """
+        Add gazetteer matches to a doc's entities with an explicit overlap policy
+
+        Args:
+            doc: Doc to annotate
+            overwrite: Replace overlapping entities already set on the doc instead of keeping them
+
+        Returns:
+            The same doc
+        """
+        matches = self.match(doc)
+        if not matches:
+            return doc
+        if overwrite:
+            taken = {i for span in matches for i in range(span.start, span.end)}
+            kept = [ent for ent in doc.ents if not taken.intersection(range(ent.start, ent.end))]
+            doc.ents = sorted(kept + matches, key=lambda span: span.start)
+        else:
+            taken = {i for ent in doc.ents for i in range(ent.start, ent.end)}
+            new = [span for span in matches if not taken.intersection(range(span.start, span.end))]
+            if new:
+                doc.set_ents(new, default="unmodified")
+        return doc
+
+    def pipe(self, stream: Iterable[Doc], batch_size: int = 128) -> Iterator[Doc]:
+        """Apply the gazetteer to a stream of docs"""
+        for doc in stream:
+            yield self(doc)
+
+    def _meta(self) -> Dict:
+        return {
+            "attr": self.attr,
+            "labels": self.label_names,
+            "lengths": self._lengths,
+            "terms": len(self),
+            "hash": KEY_HASH
+        }
+
+    def _arrays(self) -> Dict[str, numpy.ndarray]:
+        return {
+            "keys": numpy.fromiter(self._table.keys(), dtype=numpy.uint64, count=len(self._table)),
+            "label_ids": numpy.fromiter(self._table.values(), dtype=numpy.uint32, count=len(self._table)),
+            "first_keys": numpy.fromiter(self._first_keys, dtype=numpy.uint64, count=len(self._first_keys))
+        }
+
+    def _restore(self, meta: Dict, arrays) -> "Gazetteer":
+        if meta.get("hash") != KEY_HASH:
+            raise ValueError(
+                f"Gazetteer keys were hashed with {meta.get('hash', 'Python hash()')}, "
+                f"this version uses {KEY_HASH}; recompile it"
+            )
+        self.attr = meta["attr"]
+        self.label_names = list(meta["labels"])
+        self._label_ids = {label: i for i, label in enumerate(self.label_names)}
+        self._lengths = list(meta["lengths"])
+        self._table = dict(zip(arrays["keys"].tolist(), arrays["label_ids"].tolist()))
+        self._first_keys = set(arrays["first_keys"].tolist())
+        return self
+
+    def to_disk(self, path: Union[str, Path], exclude: Iterable[str] = tuple()):
+        """
+        Serialize the compiled table to a directory
+
+        Args:
+            path: Output directory
+            exclude: Unused, part of the spaCy serialization protocol
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        numpy.savez(path / self.ARRAYS_FILE, **self._arrays())
+        (path / self.META_FILE).write_text(json.dumps(self._meta(), indent=2), encoding="utf8")
+
+    def from_disk(self, path: Union[str, Path], exclude: Iterable[str] = tuple()) -> "Gazetteer":
+        """
+        Load a table written by to_disk
+
+        Args:
+            path: Directory written by to_disk
+            exclude: Unused, part of the spaCy serialization protocol
+
+        Returns:
+            The gazetteer itself
+        """
+        path = Path(path)
+        meta = json.loads((path / self.META_FILE).read_text(encoding="utf8"))
+        with numpy.load(path / self.ARRAYS_FILE) as arrays:
+            return self._restore(meta, arrays)
+
+    def to_bytes(self, exclude: Iterable[str] = tuple()) -> bytes:
+        """Serialize the compiled table to bytes"""
+        arrays = {key: value.tobytes() for key, value in self._arrays().items()}
+        return srsly.msgpack_dumps({"meta": self._meta(), "arrays": arrays})
+
+    def from_bytes(self, bytes_data: bytes, exclude: Iterable[str] = tuple()) -> "Gazetteer":
+        """Load a table serialized with to_bytes"""
+        msg = srsly.msgpack_loads(bytes_data)
+        dtypes = {"keys": numpy.uint64, "label_ids": numpy.uint32, "first_keys": numpy.uint64}
+        arrays = {key: numpy.frombuffer(msg["arrays"][key], dtype=dtype) for key, dtype in dtypes.items()}
+        return self._restore(msg["meta"], arrays)
+
+
+@Language.factory(
+    "gazetteer",
+    default_config={"attr": "LOWER", "overwrite_ents": False}
+)
+def make_gazetteer(nlp: Language, name: str, attr: str, overwrite_ents: bool) -> Gazetteer:
+    """Factory for the gazetteer pipeline component"""
+    return Gazetteer(name=name, attr=attr, overwrite_ents=overwrite_ents)
+
+
+def add_gazetteer(
+    nlp: Language,
+    path: Union[str, Path],
+    precedence: str = PRECEDENCE_MODEL,
+    attr: str = "LOWER",
+    name: str = "gazetteer"
+) -> Gazetteer:
+    """
+    Add a compiled gazetteer directory or a raw term file to a pipeline
+
+    With "gazetteer" precedence the component runs before the statistical NER,
+    which keeps the gazetteer's entities and predicts around them. With
+    "model" precedence it runs after the NER and only fills spans the model
+    left unlabelled.
+
+    Args:
+        nlp: Pipeline to add the gazetteer to
+        path: Directory written by Gazetteer.to_disk, or a term file
+        precedence: Either "model" or "gazetteer"
+        attr: Match attribute used when compiling a raw term file
+        name: Component name in the pipeline
+
+    Returns:
+        The added gazetteer component
+    """
+    if precedence not in PRECEDENCES:
+        raise ValueError(f"Invalid gazetteer precedence: {precedence}")
+
+    path = Path(path)
+    if path.is_dir():
+        attr = json.loads((path / Gazetteer.META_FILE).read_text(encoding="utf8"))["attr"]
+
+    position = {}
+    if "ner" in nlp.pipe_names:
+        position = {"before": "ner"} if precedence == PRECEDENCE_GAZETTEER else {"after": "ner"}
+    gazetteer = nlp.add_pipe("gazetteer", name=name, config={"attr": attr}, **position)
+
+    if path.is_dir():
+        gazetteer.from_disk(path)
+    else:
+        gazetteer.add_terms(read_terms(path), nlp)
+    return gazetteer
+
+
+def read_terms(path: Union[str, Path]) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (term, label) pairs from a gazetteer term file
+
+    Supported formats are JSONL in EntityRuler pattern format
+    ({"label": "ORG", "pattern": "Apple Inc."}), JSON lists of the same
+    objects, and tab-separated "term<TAB>label" lines. Token patterns are
+    skipped.
+
+    Args:
+        path: Path to a .jsonl, .json or tab-separated term file
+
+    Returns:
+        Iterator of (term, label) pairs
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        for entry in json.loads(path.read_text(encoding="utf8")):
+            if isinstance(entry["pattern"], str):
+                yield entry["pattern"], entry["label"]
+        return
+
+    with path.open(encoding="utf8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.suffix == ".jsonl":
+                entry = json.loads(line)
+                if isinstance(entry["pattern"], str):
+                    yield entry["pattern"], entry["label"]
+            else:
+                term, _, label = line.rpartition("\t")
+                if term:
+                    yield term, label
+
+
+def compile_gazetteer(
+    terms: Iterable[Tuple[str, str]],
+    nlp: Language,
+    attr: str = "LOWER",
+    output_dir: Optional[Union[str, Path]] = None
+) -> Gazetteer:
+    """
+    Compile (term, label) pairs into a standalone gazetteer
+
+    Args:
+        terms: Iterable of (term, label) pairs
+        nlp: Pipeline whose tokenizer the terms are split with
+        attr: Token attribute used for matching
+        output_dir: Directory to save the compiled table to (optional)
+
+    Returns:
+        Compiled gazetteer
+    """
+    gazetteer = Gazetteer(attr=attr)
+    gazetteer.add_terms(terms, nlp)
+    logger.info(f"Compiled gazetteer with {len(gazetteer)} terms and {len(gazetteer.label_names)} labels")
+    if output_dir:
+        gazetteer.to_disk(output_dir)
+        logger.info(f"Gazetteer saved to {output_dir}")
+    return gazetteer
@@ -0,0 +1,87 @@
+"""
+Gunicorn configuration for production serving
+Loads the spaCy model once in the master before forking so workers share its
+pages copy-on-write, sizes the worker pool from available CPUs and memory,
+and recycles workers after a number of requests or above an RSS threshold
+
+Usage:
+    gunicorn -c src/ner_service/gunicorn_conf.py
+
+Environment:
+    WEB_CONCURRENCY      Fixed worker count (default: sized automatically)
+    WORKER_MEMORY_MB     Private memory budget per worker used for sizing (default 200)
+    MAX_REQUESTS         Recycle a worker after this many requests (default 10000, 0 disables)
+    MAX_WORKER_RSS_MB    Recycle a worker whose RSS exceeds this (default 0, disabled)
+"""
+
+import gc
+import os
+import signal
+import sys
+from pathlib import Path
+
+# Make src/ importable for the server helpers when loaded as a config file
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.cpus import available_cpus
+from ner_service.server import MB, RSSWatchdog, available_memory, memory_usage, recommended_workers
+
+APP_MODULE = os.getenv("APP_MODULE", "src.ner_service.main")
+
+wsgi_app = f"{APP_MODULE}:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{os.getenv('SERVER_HOST', '0.0.0.0')}:{os.getenv('SERVER_PORT', '8000')}"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+# Import the app in the master so the model can be loaded before forking
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY") or available_cpus())
+
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
+graceful_timeout = 30
+timeout = 120
+
+WORKER_MEMORY_BYTES = int(os.getenv("WORKER_MEMORY_MB", "200")) * MB
+MAX_WORKER_RSS_BYTES = int(os.getenv("MAX_WORKER_RSS_MB", "0")) * MB
+
+
+def when_ready(server):
+    """Load the model in the master, then size the pool around its shared memory"""
+    app = sys.modules[APP_MODULE]
+    # Measured before the preload: the budget below subtracts the model itself
+    memory = available_memory()
+    before = memory_usage()["rss"]
+    app.preload_model()
+    shared = memory_usage()["rss"] - before
+
+    # Move everything allocated so far out of the collector's generations so
+    # garbage collection in the workers does not write to (and copy) shared pages
+    gc.freeze()
+
+    if not os.getenv("WEB_CONCURRENCY"):
+        server.num_workers = recommended_workers(shared, WORKER_MEMORY_BYTES, memory=memory)
+    # Split the CPUs' inference slots across the workers instead of giving each all of them
+    app.configure_workers(server.num_workers)
+    server.log.info(
+        "Model preloaded (%.0f MB shared), starting %d workers", shared / MB, server.num_workers
+    )
+
+
+def post_fork(server, worker):
+    """Start the RSS watchdog in each worker"""
+    if not MAX_WORKER_RSS_BYTES:
+        return
+
+    def recycle(rss):
+        worker.log.warning(
+            "Worker %s RSS %.0f MB exceeds %.0f MB, recycling", worker.pid, rss / MB, MAX_WORKER_RSS_BYTES / MB
+        )
+        # Graceful shutdown: in-flight requests finish and the master forks a replacement
+        os.kill(worker.pid, signal.SIGTERM)
+
+    RSSWatchdog(MAX_WORKER_RSS_BYTES, recycle).start()
+
+
+def child_exit(server, worker):
+    server.log.info("Worker %s exited", worker.pid)
@@ -0,0 +1,216 @@
+"""
+Incremental re-extraction for edited documents
+Keeps per-segment entity results keyed by document id and content hash, so a
+new version of a document only re-runs NER on the segments that changed
+"""
+
+import hashlib
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Paragraph breaks, and sentence ends used to split long paragraphs
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_segments(text: str, max_segment_chars: int = 2000) -> List[Tuple[int, int]]:
+    """
+    Split a document into paragraph segments
+
+    Paragraphs longer than max_segment_chars are split further at sentence
+    ends. Segments cover the text without gaps, so whitespace between
+    paragraphs belongs to the preceding segment.
+
+    Args:
+        text: Document text
+        max_segment_chars: Paragraph length above which sentence splitting kicks in
+
+    Returns:
+        List of (start, end) character offsets
+    """
+    boundaries = [match.end() for match in PARAGRAPH_BREAK.finditer(text)]
+    segments = []
+    start = 0
+    for end in boundaries + [len(text)]:
+        if end <= start:
+            continue
+        if end - start <= max_segment_chars:
+            segments.append((start, end))
+        else:
+            piece_start = start
+            for match in SENTENCE_BREAK.finditer(text, start, end):
+                if match.end() - piece_start >= max_segment_chars // 2:
+                    segments.append((piece_start, match.end()))
+                    piece_start = match.end()
+            if piece_start < end:
+                segments.append((piece_start, end))
+        start = end
+    return segments
+
+
+class IncrementalExtractor:
+    """Per-document segment cache in front of NERModel.batch_extract_entities"""
+
+    def __init__(self, model, max_documents: int = 1000, context_chars: int = 64, max_segment_chars: int = 2000):
+        """
+        Initialize the extractor
+
+        Args:
+            model: NERModel used for changed segments
+            max_documents: Documents kept in the cache (least recently used are evicted)
+            context_chars: Characters of neighbouring text given to the model around a changed segment
+            max_segment_chars: Paragraph length above which sentence splitting kicks in
+        """
+        self.model = model
+        self.max_documents = max_documents
+        self.context_chars = context_chars
+        self.max_segment_chars = max_segment_chars
+        self._documents: "OrderedDict[str, Dict[Tuple[str, Optional[str]], List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.segments_seen = 0
+        self.segments_reprocessed = 0
+
+    @staticmethod
+    def _hash(segment: str, ruler_only: Optional[bool] = None) -> str:
+        # Results of the two modes differ, so they never share cache entries
+        key = segment if not ruler_only else "ruler_only\0" + segment
+        return hashlib.blake2b(key.encode("utf8"), digest_size=16).hexdigest()
+
+    def _window(self, text: str, start: int, end: int) -> Tuple[int, int]:
+        """Widen a segment by the context margin, snapped outward to whitespace"""
+        lo = max(0, start - self.context_chars)
+        hi = min(len(text), end + self.context_chars)
+        while lo > 0 and not text[lo - 1].isspace():
+            lo -= 1
+        while hi < len(text) and not text[hi].isspace():
+            hi += 1
+        return lo, hi
+
+    @staticmethod
+    def _runs(indices: Set[int]) -> List[Tuple[int, int]]:
+        """Group segment indices into runs of consecutive segments, as (first, last)"""
+        runs = []
+        for i in sorted(indices):
+            if runs and runs[-1][1] == i - 1:
+                runs[-1] = (runs[-1][0], i)
+            else:
+                runs.append((i, i))
+        return runs
+
+    def _extract_runs(self, text: str, segments: List[Tuple[int, int]], rerun: Set[int],
+                      ruler_only: Optional[bool]) -> List[Tuple[Tuple[int, int], List[Dict]]]:
+        """
+        Re-extract runs of segments, widening them until no entity crosses a run edge
+
+        An entity that starts or ends outside its run (a name cut by a
+        sentence split, or one an edit joined to its neighbour) would
+        otherwise be dropped or overlap cached results, so the segments it
+        touches join the run and the run is extracted again.
+
+        Returns:
+            Each run with its entities in absolute offsets
+        """
+        starts = [start for start, _ in segments]
+        while True:
+            runs = self._runs(rerun)
+            windows = [self._window(text, segments[first][0], segments[last][1]) for first, last in runs]
+            results = self.model.batch_extract_entities([text[lo:hi] for lo, hi in windows], ruler_only=ruler_only)
+            extracted, grown = [], False
+            for (first, last), (lo, _), result in zip(runs, windows, results):
+                run_start, run_end = segments[first][0], segments[last][1]
+                entities = []
+                for ent in result["entities"]:
+                    ent = dict(ent, start=ent["start"] + lo, end=ent["end"] + lo)
+                    if ent["end"] <= run_start or ent["start"] >= run_end:
+                        continue
+                    if ent["start"] < run_start or ent["end"] > run_end:
+                        touched = range(bisect_right(starts, ent["start"]) - 1, bisect_left(starts, ent["end"]))
+                        grown |= not rerun.issuperset(touched)
+                        rerun.update(touched)
+                    entities.append(ent)
+                extracted.append(((first, last), entities))
+            if not grown:
+                return extracted
+
+    def extract(self, document_id: str, text: str, ruler_only: Optional[bool] = None) -> Dict:
+        """
+        Extract entities from a new version of a document
+
+        Each entity is cached with the segment it starts in and may run past
+        that segment's end; such segments are cached together with the hash
+        of the segment that follows them. Changed segments are re-extracted
+        together with any neighbour an entity spans, so names crossing a
+        segment boundary are kept.
+
+        Args:
+            document_id: Stable id of the document across versions
+            text: Full text of the current version
+            ruler_only: Override the model's ruler_only setting for this call
+
+        Returns:
+            Dictionary with entities and how many segments were re-processed
+        """
+        segments = split_segments(text, self.max_segment_chars)
+        hashes = [self._hash(text[start:end], ruler_only) for start, end in segments]
+        next_hashes = hashes[1:] + [None]
+
+        with self._lock:
+            cached = self._documents.get(document_id, {})
+
+        # Entities running into the next segment are only valid in front of that same segment
+        known: List[Optional[List[Dict]]] = [
+            cached.get((h, next_h), cached.get((h, None))) for h, next_h in zip(hashes, next_hashes)
+        ]
+        rerun = {i for i, entry in enumerate(known) if entry is None}
+        starts = [start for start, _ in segments]
+        if rerun:
+            for (first, last), entities in self._extract_runs(text, segments, rerun, ruler_only):
+                owned = {i: [] for i in range(first, last + 1)}
+                for ent in entities:
+                    i = bisect_right(starts, ent["start"]) - 1
+                    start = starts[i]
+                    owned[i].append(dict(ent, start=ent["start"] - start, end=ent["end"] - start))
+                for i, segment_entities in owned.items():
+                    known[i] = segment_entities
+
+        entities = []
+        entries: Dict[Tuple[str, Optional[str]], List[Dict]] = {}
+        for (start, end), h, next_h, segment_entities in zip(segments, hashes, next_hashes, known):
+            for ent in segment_entities:
+                entities.append(dict(ent, start=ent["start"] + start, end=ent["end"] + start))
+            crosses = any(ent["end"] > end - start for ent in segment_entities)
+            entries[(h, next_h if crosses else None)] = segment_entities
+
+        with self._lock:
+            self._documents[document_id] = entries
+            self._documents.move_to_end(document_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+            self.segments_seen += len(segments)
+            self.segments_reprocessed += len(rerun)
+
+        return {
+            "entities": entities,
+            "segments": len(segments),
+            "reprocessed_segments": len(rerun)
+        }
+
+    def forget(self, document_id: str) -> bool:
+        """Drop a document's cached segments; returns whether it was cached"""
+        with self._lock:
+            return self._documents.pop(document_id, None) is not None
+
+    def stats(self) -> Dict:
+        """Cache occupancy and the share of segments served from the cache"""
+        with self._lock:
+            seen = self.segments_seen
+            return {
+                "documents": len(self._documents),
+                "max_documents": self.max_documents,
+                "segments_seen": seen,
+                "segments_reprocessed": self.segments_reprocessed,
+                "reuse_rate": (seen - self.segments_reprocessed) / seen if seen else 0.0
+            }
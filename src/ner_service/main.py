@@ -3,13 +3,18 @@ FastAPI Application for Named Entity Recognition Service
 Enterprise-grade REST API for NER with proper error handling and documentation
 """
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 import logging
+import math
+import os
 import sys
+import time
 from pathlib import Path
+from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -20,11 +25,20 @@ from ner_service.models import (
     NERContextResponse,
     BatchNERRequest,
     BatchNERResponse,
+    IncrementalNERRequest,
+    IncrementalNERResponse,
     HealthResponse,
     ErrorResponse,
     Entity
 )
 from ner_service.ner_model import NERModel
+from ner_service.admission import AdmissionController, Lane, Overloaded, DeadlineExceeded, parse_deadline
+from ner_service.cpus import available_cpus
+from ner_service.server import memory_usage
+from ner_service.streaming import StreamLimits, StreamSession
+from ner_service.incremental import IncrementalExtractor
+from ner_service.compression import CompressionMiddleware, CompressionStats
+from ner_service.shadow import ShadowEvaluator
 
 # Configure logging
 logging.basicConfig(
@@ -36,6 +50,225 @@ logger = logging.getLogger(__name__)
 # Global NER model instance
 ner_model: NERModel = None
 
+# Segment cache for /extract/incremental, created with the model
+incremental: IncrementalExtractor = None
+
+# Candidate model receiving mirrored traffic, when SHADOW_MODEL_PATH is set
+shadow: ShadowEvaluator = None
+
+
+def _create_ner_model(custom_model_path: Optional[str] = None) -> NERModel:
+    """Create the NER model from environment configuration"""
+    return NERModel(
+        model_name=os.getenv("MODEL_NAME", "en_core_web_sm"),
+        custom_model_path=custom_model_path or os.getenv("CUSTOM_MODEL_PATH") or None,
+        gazetteer_path=os.getenv("GAZETTEER_PATH") or None,
+        gazetteer_precedence=os.getenv("GAZETTEER_PRECEDENCE", "model"),
+        fast_mode=os.getenv("FAST_MODE", "false").lower() == "true",
+        max_vocab_growth=int(os.getenv("MAX_VOCAB_GROWTH")) if os.getenv("MAX_VOCAB_GROWTH") else None,
+        cascade_model_path=os.getenv("CASCADE_MODEL_PATH") or None,
+        cascade_threshold=float(os.getenv("CASCADE_THRESHOLD", "0.9")),
+        cascade_beam_width=int(os.getenv("CASCADE_BEAM_WIDTH", "4")),
+        alias_index_path=os.getenv("ALIAS_INDEX_PATH") or None
+    )
+
+
+def _create_shadow() -> Optional[ShadowEvaluator]:
+    """
+    Create the shadow evaluator from environment configuration, if one is configured
+
+    The candidate is loaded on its own, without the gazetteer, fast mode,
+    cascade or alias index of the serving model, so the report describes
+    the candidate model itself. It does share MAX_VOCAB_GROWTH, so its
+    StringStore stays bounded like the serving model's.
+    """
+    path = os.getenv("SHADOW_MODEL_PATH")
+    if not path:
+        return None
+    max_vocab_growth = os.getenv("MAX_VOCAB_GROWTH")
+    return ShadowEvaluator(
+        NERModel(custom_model_path=path, max_vocab_growth=int(max_vocab_growth) if max_vocab_growth else None),
+        sample_rate=float(os.getenv("SHADOW_SAMPLE_RATE", "0.01")),
+        max_pending=int(os.getenv("SHADOW_MAX_PENDING", "8"))
+    )
+
+
+def _create_admission_controller(workers: Optional[int] = None) -> AdmissionController:
+    """
+    Create the admission controller with interactive and bulk lanes from environment configuration
+
+    MAX_IN_FLIGHT is per worker process; by default the available CPUs are
+    divided among the server's workers, so all of them together run about one
+    inference per CPU.
+
+    Args:
+        workers: Worker processes sharing the CPUs (default: WEB_CONCURRENCY, else 1)
+    """
+    workers = workers or int(os.getenv("WEB_CONCURRENCY") or 1)
+    max_queue = int(os.getenv("MAX_QUEUE", "64"))
+    bulk_max_in_flight = os.getenv("BULK_MAX_IN_FLIGHT")
+    return AdmissionController(
+        max_in_flight=int(os.getenv("MAX_IN_FLIGHT") or max(1, available_cpus() // workers)),
+        max_queue=max_queue,
+        retry_after=float(os.getenv("RETRY_AFTER_SECONDS", "1")),
+        lanes={
+            "interactive": Lane(weight=float(os.getenv("INTERACTIVE_WEIGHT", "4")), max_queue=max_queue),
+            "bulk": Lane(
+                weight=float(os.getenv("BULK_WEIGHT", "1")),
+                max_queue=int(os.getenv("BULK_MAX_QUEUE") or max_queue),
+                max_in_flight=int(bulk_max_in_flight) if bulk_max_in_flight else None
+            )
+        }
+    )
+
+
+# Bounds concurrent inference; requests beyond capacity are rejected fast
+admission = _create_admission_controller()
+
+# Batches run as slices of this many texts, each admitted separately, so
+# interactive requests can be scheduled between the slices of a large batch
+BULK_SLICE_TEXTS = int(os.getenv("BULK_SLICE_TEXTS", "32"))
+
+
+def _create_stream_limits() -> StreamLimits:
+    """Create WebSocket flow-control limits from environment configuration"""
+    return StreamLimits(
+        max_pending=int(os.getenv("WS_MAX_PENDING", "256")),
+        max_batch=int(os.getenv("WS_MAX_BATCH", "64")),
+        batch_wait_ms=float(os.getenv("WS_BATCH_WAIT_MS", "5")),
+        max_text_chars=int(os.getenv("WS_MAX_TEXT_CHARS", "100000")),
+        batch_timeout_ms=float(os.getenv("WS_BATCH_TIMEOUT_MS", "30000"))
+    )
+
+
+stream_limits = _create_stream_limits()
+
+# Bytes before and after response compression, reported by /metrics
+compression_stats = CompressionStats()
+
+
+def _ensure_incremental(model: NERModel) -> IncrementalExtractor:
+    """Create the incremental extractor from environment configuration on first use"""
+    global incremental
+    if incremental is None or incremental.model is not model:
+        incremental = IncrementalExtractor(
+            model,
+            max_documents=int(os.getenv("INCREMENTAL_MAX_DOCUMENTS", "1000")),
+            context_chars=int(os.getenv("INCREMENTAL_CONTEXT_CHARS", "64"))
+        )
+    return incremental
+
+
+def _request_deadline(raw_request: Request):
+    """Read the client's deadline from the X-Request-Deadline / X-Request-Timeout-Ms headers"""
+    try:
+        return parse_deadline(
+            raw_request.headers.get("x-request-deadline"),
+            raw_request.headers.get("x-request-timeout-ms")
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid deadline header"
+        )
+
+
+def _lane(name: str) -> str:
+    """The named lane, or the controller's default lane when it has no such lane"""
+    return name if name in admission.lanes else admission.default_lane
+
+
+def _request_lane(raw_request: Request, default: str) -> str:
+    """Priority lane of a request: the X-Priority header, or the endpoint's default"""
+    lane = raw_request.headers.get("x-priority")
+    if lane is None:
+        return _lane(default)
+    if lane.lower() not in admission.lanes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid priority, expected one of: {', '.join(admission.lanes)}"
+        )
+    return lane.lower()
+
+
+@asynccontextmanager
+async def _admitted(deadline: Optional[float], lane: str, queue_limit: bool = True):
+    """Hold an inference slot in a priority lane, rejecting the request when overloaded or expired"""
+    try:
+        await admission.acquire(deadline, lane=lane, queue_limit=queue_limit)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server overloaded, retry later",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except DeadlineExceeded:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Request deadline expired before processing"
+        )
+    try:
+        yield
+    finally:
+        admission.release(lane)
+
+
+def _check_ruler_only(model: NERModel, ruler_only: bool):
+    """Reject ruler-only requests when no gazetteer is configured"""
+    if ruler_only and model.gazetteer is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ruler_only requires a gazetteer to be configured"
+        )
+
+
+def _entities(entities_raw, include_text: bool = True):
+    """Convert entity dicts to Entity objects, dropping surface strings if not wanted"""
+    if include_text:
+        return [Entity(**ent) for ent in entities_raw]
+    return [Entity(**dict(ent, text=None)) for ent in entities_raw]
+
+
+def _excluded(entity_fields: set, text: bool = False) -> dict:
+    """Exclude the given fields from every entity of the extraction responses, and the echoed text if asked"""
+    entity = {"__all__": entity_fields}
+    exclude = {"entities": entity, "results": {"__all__": {"entities": entity}}}
+    if text:
+        exclude["text"] = True
+    return exclude
+
+
+def _respond(response, include_text: bool = True, canonical_ids: bool = False):
+    """
+    Serialize a response, leaving out fields the request or the service does not use
+
+    Echoed text fields are dropped when echoing is off, and canonical_id
+    unless an alias index is loaded, so payloads without one are unchanged.
+    Other null fields stay in the schema.
+    """
+    entity_fields = set() if include_text else {"text"}
+    if not canonical_ids:
+        entity_fields.add("canonical_id")
+    return JSONResponse(content=response.model_dump(exclude=_excluded(entity_fields, text=not include_text)))
+
+
+def _load_shadow():
+    """Load the shadow candidate; a failure leaves the service running without it"""
+    global shadow
+    if shadow is not None:
+        return
+    try:
+        shadow = _create_shadow()
+        if shadow:
+            logger.info(f"Shadow model loaded, mirroring {shadow.sample_rate:.1%} of requests")
+    except Exception as e:
+        logger.error(f"Failed to load shadow model: {str(e)}")
+
+
+def _mirror(ruler_only: bool) -> bool:
+    """Whether this request is mirrored to the shadow model"""
+    return shadow is not None and not ruler_only and shadow.should_sample()
+
 
 def _ensure_ner_model() -> NERModel:
     """Ensure the global NER model is initialized (lazy init).
@@ -46,7 +279,7 @@ def _ensure_ner_model() -> NERModel:
     if ner_model is None:
         try:
             logger.info("Lazy-loading NER model...")
-            ner_model = NERModel(model_name="en_core_web_sm")
+            ner_model = _create_ner_model()
             logger.info("NER model lazy-loaded successfully")
         except Exception as e:
             logger.error(f"Failed to lazy-load NER model: {e}")
@@ -54,23 +287,54 @@ def _ensure_ner_model() -> NERModel:
     return ner_model
 
 
+def configure_workers(workers: int):
+    """Size admission control for one of this many worker processes.
+
+    Called by the gunicorn master (see gunicorn_conf.py) once the worker count
+    is known and before forking, so every worker inherits the sized controller.
+    """
+    global admission
+    admission = _create_admission_controller(workers)
+
+
+def preload_model() -> NERModel:
+    """Load the NER model before workers are forked so they share its memory.
+
+    Called by the gunicorn master (see gunicorn_conf.py); each worker's
+    lifespan then reuses the inherited instance instead of loading its own.
+    """
+    global ner_model
+    if ner_model is None:
+        logger.info("Preloading NER model...")
+        ner_model = _create_ner_model()
+        logger.info("NER model preloaded successfully")
+        _load_shadow()
+    return ner_model
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown"""
     # Startup
     global ner_model
-    try:
-        logger.info("Loading NER model...")
-        ner_model = NERModel(model_name="en_core_web_sm")
-        logger.info("NER model loaded successfully")
-    except Exception as e:
-        logger.error(f"Failed to load NER model: {str(e)}")
-        raise
+    if ner_model is not None:
+        logger.info("Using preloaded NER model")
+    else:
+        try:
+            logger.info("Loading NER model...")
+            ner_model = _create_ner_model()
+            logger.info("NER model loaded successfully")
+        except Exception as e:
+            logger.error(f"Failed to load NER model: {str(e)}")
+            raise
+    _load_shadow()
     
     yield
     
     # Shutdown
     logger.info("Shutting down NER service...")
+    if shadow:
+        shadow.close()
 
 
 # Initialize FastAPI app
@@ -92,6 +356,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses with zstd or gzip, as negotiated by Accept-Encoding
+if os.getenv("COMPRESSION", "true").lower() == "true":
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+        stats=compression_stats
+    )
+
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -135,6 +407,44 @@ async def health_check():
         )
 
 
+@app.get("/metrics", tags=["Health"], summary="Runtime statistics")
+async def metrics():
+    """
+    Report runtime statistics of the NER service
+    
+    Returns:
+        Statistics per subsystem
+    """
+    model = ner_model
+    return {
+        "pid": os.getpid(),
+        "memory": memory_usage(),
+        "admission": admission.stats(),
+        "vocab": model.vocab_stats() if model else None,
+        "prefilter": model.prefilter.stats() if model and model.prefilter else None,
+        "cascade": model.cascade.stats() if model and model.cascade else None,
+        "incremental": incremental.stats() if incremental else None,
+        "compression": compression_stats.stats(),
+        "shadow": shadow.report() if shadow else None
+    }
+
+
+@app.get("/shadow/report", tags=["Health"], summary="Shadow model comparison")
+async def shadow_report():
+    """
+    Compare the shadow candidate model with the primary model on mirrored traffic
+    
+    Returns:
+        Latency distributions of both models and entity-level agreement
+    """
+    if shadow is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No shadow model configured"
+        )
+    return shadow.report()
+
+
 from typing import Union
 
 
@@ -144,12 +454,13 @@ from typing import Union
     tags=["NER"],
     summary="Extract named entities from text"
 )
-async def extract_entities(request: NERRequest):
+async def extract_entities(request: NERRequest, raw_request: Request):
     """
     Extract named entities from the provided text
     
     Args:
         request: NER request with text and options
+        raw_request: Incoming HTTP request, read for deadline and priority headers
         
     Returns:
         Extracted entities with metadata
@@ -161,24 +472,39 @@ async def extract_entities(request: NERRequest):
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="NER model not loaded"
             )
+        _check_ruler_only(model, request.ruler_only)
+        mirror = _mirror(request.ruler_only)
+        lane = _request_lane(raw_request, "interactive")
         
         if request.include_context:
-            result = ner_model.extract_entities_with_context(request.text)
+            async with _admitted(_request_deadline(raw_request), lane):
+                start = time.perf_counter()
+                result = await run_in_threadpool(
+                    model.extract_entities_with_context, request.text, ruler_only=request.ruler_only
+                )
+            if mirror:
+                shadow.submit([request.text], [result["entities"]], time.perf_counter() - start)
             # Convert to Entity objects
-            entities = [Entity(**ent) for ent in result["entities"]]
-            return NERContextResponse(
-                text=result["text"],
+            entities = _entities(result["entities"], request.include_text)
+            return _respond(NERContextResponse(
+                text=result["text"] if request.include_text else None,
                 entities=entities,
                 entity_count=result["entity_count"],
                 entity_types=result["entity_types"]
-            )
+            ), request.include_text, model.aliases is not None)
         else:
-            entities_raw = ner_model.extract_entities(request.text)
-            entities = [Entity(**ent) for ent in entities_raw]
-            return NERResponse(
+            async with _admitted(_request_deadline(raw_request), lane):
+                start = time.perf_counter()
+                entities_raw = await run_in_threadpool(
+                    model.extract_entities, request.text, ruler_only=request.ruler_only
+                )
+            if mirror:
+                shadow.submit([request.text], [entities_raw], time.perf_counter() - start)
+            entities = _entities(entities_raw, request.include_text)
+            return _respond(NERResponse(
                 entities=entities,
                 entity_count=len(entities)
-            )
+            ), request.include_text, model.aliases is not None)
     
     except HTTPException:
         raise
@@ -196,12 +522,13 @@ async def extract_entities(request: NERRequest):
     tags=["NER"],
     summary="Extract entities from multiple texts"
 )
-async def extract_entities_batch(request: BatchNERRequest):
+async def extract_entities_batch(request: BatchNERRequest, raw_request: Request):
     """
     Extract named entities from multiple texts in batch
     
     Args:
         request: Batch request with list of texts
+        raw_request: Incoming HTTP request, read for deadline and priority headers
         
     Returns:
         Results for each text
@@ -213,21 +540,40 @@ async def extract_entities_batch(request: BatchNERRequest):
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="NER model not loaded"
             )
+        _check_ruler_only(model, request.ruler_only)
+        mirror = _mirror(request.ruler_only)
+        lane = _request_lane(raw_request, "bulk")
 
-        results_raw = model.batch_extract_entities(request.texts)
+        # Each slice waits for its own slot under the deadline of the whole
+        # request. Only the first may be rejected for a full queue, but any
+        # slice fails with 504 once the deadline passes, dropping the work done
+        deadline = _request_deadline(raw_request)
+        results_raw = []
+        seconds = 0.0
+        for offset in range(0, len(request.texts), BULK_SLICE_TEXTS):
+            async with _admitted(deadline, lane, queue_limit=offset == 0):
+                start = time.perf_counter()
+                results_raw += await run_in_threadpool(
+                    model.batch_extract_entities,
+                    request.texts[offset:offset + BULK_SLICE_TEXTS],
+                    ruler_only=request.ruler_only
+                )
+                seconds += time.perf_counter() - start
+        if mirror:
+            shadow.submit(request.texts, [result["entities"] for result in results_raw], seconds)
         
         results = []
         for result in results_raw:
-            entities = [Entity(**ent) for ent in result["entities"]]
+            entities = _entities(result["entities"], request.include_text)
             results.append(NERResponse(
                 entities=entities,
                 entity_count=len(entities)
             ))
         
-        return BatchNERResponse(
+        return _respond(BatchNERResponse(
             results=results,
             total_texts=len(results)
-        )
+        ), request.include_text, model.aliases is not None)
     
     except HTTPException:
         raise
@@ -239,6 +585,93 @@ async def extract_entities_batch(request: BatchNERRequest):
         )
 
 
+@app.post(
+    "/extract/incremental",
+    response_model=IncrementalNERResponse,
+    tags=["NER"],
+    summary="Extract entities from a new version of an edited document"
+)
+async def extract_entities_incremental(request: IncrementalNERRequest, raw_request: Request):
+    """
+    Extract named entities, re-running the model only on changed segments
+    
+    Results of unchanged paragraphs are reused from earlier versions of the
+    same document_id, with their offsets shifted to the new text.
+    
+    Args:
+        request: Incremental request with document id and full text
+        raw_request: Incoming HTTP request, read for deadline and priority headers
+        
+    Returns:
+        Entities of the whole document and how many segments were re-processed
+    """
+    try:
+        model = ner_model or _ensure_ner_model()
+        if not model:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="NER model not loaded"
+            )
+        _check_ruler_only(model, request.ruler_only)
+        extractor = _ensure_incremental(model)
+
+        async with _admitted(_request_deadline(raw_request), _request_lane(raw_request, "interactive")):
+            result = await run_in_threadpool(
+                extractor.extract, request.document_id, request.text, ruler_only=request.ruler_only
+            )
+
+        entities = _entities(result["entities"], request.include_text)
+        return _respond(IncrementalNERResponse(
+            entities=entities,
+            entity_count=len(entities),
+            segments=result["segments"],
+            reprocessed_segments=result["reprocessed_segments"]
+        ), request.include_text, model.aliases is not None)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in incremental extraction: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing incremental request: {str(e)}"
+        )
+
+
+@app.websocket("/ws/extract")
+async def extract_entities_stream(websocket: WebSocket):
+    """
+    Extract entities from a continuous stream of tagged texts
+    
+    Clients send {"id": ..., "text": ...} messages without waiting for
+    replies. Texts are batched through the model and each reply carries the
+    id of its text: {"id": ..., "entities": [...], "entity_count": n}, or
+    {"id": ..., "error": "..."} (with "retry_after" seconds when overloaded).
+    Replies may arrive out of order.
+    
+    Args:
+        websocket: Incoming WebSocket connection
+    """
+    await websocket.accept()
+    model = ner_model or _ensure_ner_model()
+    if not model:
+        # 1013: try again later
+        await websocket.close(code=1013, reason="NER model not loaded")
+        return
+
+    async def process(texts):
+        lane = _lane("bulk")
+        timeout = stream_limits.batch_timeout
+        await admission.acquire(time.time() + timeout if timeout else None, lane=lane)
+        try:
+            results = await run_in_threadpool(model.batch_extract_entities, texts)
+        finally:
+            admission.release(lane)
+        return [result["entities"] for result in results]
+
+    await StreamSession(websocket, process, stream_limits).run()
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
@@ -0,0 +1,74 @@
+"""
+Shared measurement helpers for the NER service
+Latency histograms and precision/recall/F1 used by shadow evaluation,
+admission control, the cascade and the load test
+"""
+
+import bisect
+from typing import Dict
+
+# Histogram bucket upper bounds in milliseconds, about 10% apart from 0.1 ms to ~60 s
+BUCKETS_MS = [0.1 * 1.1 ** i for i in range(140)]
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucketed latency histogram"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the observations of another histogram to this one"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile"""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(BUCKETS_MS[index], self.max_ms) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def stats(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms
+        }
+
+
+def f1(matched: int, predicted: int, reference: int) -> Dict:
+    """
+    Precision, recall and F1 from match counts
+
+    Args:
+        matched: Predictions that match the reference
+        predicted: Total predictions
+        reference: Total reference items
+
+    Returns:
+        Dictionary with precision, recall and f1 (1.0 for empty sides)
+    """
+    precision = matched / predicted if predicted else 1.0
+    recall = matched / reference if reference else 1.0
+    score = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": score}
@@ -8,17 +8,20 @@ from typing import List, Optional
 
 class Entity(BaseModel):
     """Single entity model"""
-    text: str = Field(..., description="The text of the entity")
+    text: Optional[str] = Field(None, description="The text of the entity (omitted when include_text is false)")
     label: str = Field(..., description="The entity type/label")
     start: int = Field(..., description="Start character position")
     end: int = Field(..., description="End character position")
     label_description: Optional[str] = Field(None, description="Human-readable description of the label")
+    canonical_id: Optional[str] = Field(None, description="Canonical id of the entity (when an alias index is configured)")
 
 
 class NERRequest(BaseModel):
     """Request model for NER extraction"""
     text: str = Field(..., description="Text to extract entities from", min_length=1)
     include_context: bool = Field(default=False, description="Include additional context in response")
+    ruler_only: bool = Field(default=False, description="Match only the gazetteer, skipping the statistical model")
+    include_text: bool = Field(default=True, description="Echo the input text and entity surface strings; clients can slice them by offset instead")
     
     model_config = ConfigDict(
         json_schema_extra={
@@ -55,7 +58,7 @@ class NERResponse(BaseModel):
 
 class NERContextResponse(BaseModel):
     """Extended response model with context"""
-    text: str = Field(..., description="Original input text")
+    text: Optional[str] = Field(None, description="Original input text (omitted when include_text is false)")
     entities: List[Entity] = Field(..., description="List of extracted entities")
     entity_count: int = Field(..., description="Total number of entities found")
     entity_types: List[str] = Field(..., description="Unique entity types found")
@@ -64,6 +67,8 @@ class NERContextResponse(BaseModel):
 class BatchNERRequest(BaseModel):
     """Request model for batch NER extraction"""
     texts: List[str] = Field(..., description="List of texts to process", min_length=1)
+    ruler_only: bool = Field(default=False, description="Match only the gazetteer, skipping the statistical model")
+    include_text: bool = Field(default=True, description="Include entity surface strings; clients can slice them by offset instead")
     
     model_config = ConfigDict(
         json_schema_extra={
@@ -83,6 +88,31 @@ class BatchNERResponse(BaseModel):
     total_texts: int = Field(..., description="Total number of texts processed")
 
 
+class IncrementalNERRequest(BaseModel):
+    """Request model for incremental extraction of an edited document"""
+    document_id: str = Field(..., description="Stable id of the document across versions", min_length=1)
+    text: str = Field(..., description="Full text of the current version", min_length=1)
+    ruler_only: bool = Field(default=False, description="Match only the gazetteer, skipping the statistical model")
+    include_text: bool = Field(default=True, description="Echo entity surface strings; clients can slice them by offset instead")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "document_id": "contract-42",
+                "text": "Apple Inc. was founded by Steve Jobs.\n\nIt is based in Cupertino, California."
+            }
+        }
+    )
+
+
+class IncrementalNERResponse(BaseModel):
+    """Response model for incremental extraction"""
+    entities: List[Entity] = Field(..., description="Entities of the whole current version")
+    entity_count: int = Field(..., description="Total number of entities found")
+    segments: int = Field(..., description="Number of segments in the document")
+    reprocessed_segments: int = Field(..., description="Segments that changed and were re-run through the model")
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str = Field(..., description="Service status")
@@ -4,8 +4,25 @@ This module provides the main NER functionality using spaCy
 """
 
 import spacy
-from typing import List, Dict, Optional
+from spacy.language import Language
+from spacy.tokens import Doc
+from contextlib import nullcontext
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Iterator
 import logging
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.aliases import AliasIndex
+from ner_service.analytics import EntityAnalytics
+from ner_service.cascade import ModelCascade
+from ner_service.fast_load import is_packed, load_packed
+from ner_service.gazetteer import add_gazetteer, PRECEDENCE_GAZETTEER, PRECEDENCE_MODEL
+from ner_service.prefilter import EntityPrefilter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,28 +31,87 @@ logger = logging.getLogger(__name__)
 class NERModel:
     """Named Entity Recognition Model wrapper"""
     
-    def __init__(self, model_name: str = "en_core_web_sm", custom_model_path: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str = "en_core_web_sm",
+        custom_model_path: Optional[str] = None,
+        gazetteer_path: Optional[str] = None,
+        gazetteer_precedence: str = PRECEDENCE_MODEL,
+        ruler_only: bool = False,
+        fast_mode: bool = False,
+        max_vocab_growth: Optional[int] = None,
+        cascade_model_path: Optional[str] = None,
+        cascade_threshold: float = 0.9,
+        cascade_beam_width: int = 4,
+        alias_index_path: Optional[str] = None
+    ):
         """
         Initialize NER model
         
         Args:
             model_name: Name of the spaCy model to load
             custom_model_path: Path to custom trained model (optional)
+            gazetteer_path: Compiled gazetteer directory or term file (optional)
+            gazetteer_precedence: "model" or "gazetteer", which source wins on overlaps
+            ruler_only: Skip the statistical pipeline and match only the gazetteer
+            fast_mode: Skip the statistical pipeline for texts the pre-filter finds entity-free
+            max_vocab_growth: Strings the shared StringStore may gain from requests
+                before the pipeline is rebuilt in the background (optional)
+            cascade_model_path: Fast model (name, directory or packed file) that processes
+                every text first; only uncertain documents run through the main model (optional)
+            cascade_threshold: Fast-model confidence below which a document is escalated
+            cascade_beam_width: Beams used to score the fast model's entity decisions
+            alias_index_path: Compiled alias index; each entity then carries the
+                canonical id of its text, or None when the alias is unknown (optional)
         """
         self.model_name = model_name
         self.custom_model_path = custom_model_path
+        self.gazetteer_path = gazetteer_path
+        self.gazetteer_precedence = gazetteer_precedence
+        self.ruler_only = ruler_only
+        self.max_vocab_growth = max_vocab_growth
+        self.cascade_model_path = cascade_model_path
+        self.alias_index_path = alias_index_path
         self.nlp = None
+        self.gazetteer = None
+        self.prefilter = None
+        self.cascade = None
+        self.aliases = None
+        self.rebuilds = 0
+        self._rebuild_lock = threading.Lock()
         self._load_model()
+        if gazetteer_path:
+            self._load_gazetteer()
+        elif ruler_only:
+            raise ValueError("ruler_only requires a gazetteer_path")
+        if cascade_model_path:
+            self.cascade = ModelCascade(
+                self._load_cascade_pipeline(), threshold=cascade_threshold, beam_width=cascade_beam_width
+            )
+        if alias_index_path:
+            logger.info(f"Mapping alias index from {alias_index_path}")
+            self.aliases = AliasIndex(alias_index_path)
+            logger.info(f"Alias index mapped with {len(self.aliases)} aliases")
+        if fast_mode:
+            self.prefilter = EntityPrefilter(gazetteer=self.gazetteer.match if self.gazetteer else None)
+        self._baseline_strings = len(self.nlp.vocab.strings)
     
     def _load_model(self):
         """Load the spaCy model"""
+        self.nlp = self._load_pipeline()
+
+    def _load_pipeline(self) -> Language:
+        """Load a fresh copy of the configured spaCy pipeline"""
         try:
-            if self.custom_model_path:
+            if self.custom_model_path and is_packed(self.custom_model_path):
+                logger.info(f"Loading packed model from {self.custom_model_path}")
+                return load_packed(self.custom_model_path)
+            elif self.custom_model_path:
                 logger.info(f"Loading custom model from {self.custom_model_path}")
-                self.nlp = spacy.load(self.custom_model_path)
+                return spacy.load(self.custom_model_path)
             else:
                 logger.info(f"Loading pretrained model: {self.model_name}")
-                self.nlp = spacy.load(self.model_name)
+                return spacy.load(self.model_name)
         except OSError:
             logger.warning(f"Model {self.model_name} not found. Attempting to download...")
             # Validate model name to prevent injection
@@ -48,52 +124,179 @@ class NERModel:
                 shell=False,
                 capture_output=True
             )
-            self.nlp = spacy.load(self.model_name)
+            return spacy.load(self.model_name)
+
+    def _load_cascade_pipeline(self) -> Language:
+        """Load a fresh copy of the cascade's fast pipeline"""
+        logger.info(f"Loading cascade fast model from {self.cascade_model_path}")
+        if is_packed(self.cascade_model_path):
+            return load_packed(self.cascade_model_path)
+        return spacy.load(self.cascade_model_path)
+
+    def _load_gazetteer(self):
+        """Load the gazetteer and add it to the pipeline as an entity ruler"""
+        logger.info(f"Loading gazetteer from {self.gazetteer_path}")
+        self.gazetteer = add_gazetteer(self.nlp, self.gazetteer_path, precedence=self.gazetteer_precedence)
+        logger.info(f"Gazetteer loaded with {len(self.gazetteer)} terms")
+
+    def _inference_scope(self):
+        """Scope request strings to a memory zone where spaCy supports it (3.8+)"""
+        if self.max_vocab_growth is not None and hasattr(self.nlp, "memory_zone"):
+            return self.nlp.memory_zone()
+        return nullcontext()
+
+    def _check_vocab_growth(self):
+        """Rebuild the pipeline in the background once request strings pile up"""
+        if self.max_vocab_growth is None:
+            return
+        if self.vocab_growth > self.max_vocab_growth and not self._rebuild_lock.locked():
+            threading.Thread(target=self.rebuild, name="ner-rebuild", daemon=True).start()
+
+    @property
+    def vocab_growth(self) -> int:
+        """Strings added to the StringStore since the pipeline was loaded"""
+        return len(self.nlp.vocab.strings) - self._baseline_strings
+
+    def rebuild(self):
+        """
+        Replace the pipeline with a freshly loaded copy
+
+        Every unseen token string is interned in the shared Vocab/StringStore
+        and never released, so a long-lived process grows without bound. A
+        fresh pipeline starts from the model's own strings again; calls in
+        progress finish on the old pipeline, which is then garbage collected.
+        """
+        if not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            growth = self.vocab_growth
+            nlp = self._load_pipeline()
+            fast_nlp = self._load_cascade_pipeline() if self.cascade is not None else None
+            gazetteer = None
+            if self.gazetteer_path:
+                gazetteer = add_gazetteer(nlp, self.gazetteer_path, precedence=self.gazetteer_precedence)
+            self._baseline_strings = len(nlp.vocab.strings)
+            self.nlp, self.gazetteer = nlp, gazetteer
+            if fast_nlp is not None:
+                self.cascade.nlp = fast_nlp
+            if self.prefilter is not None and gazetteer is not None:
+                self.prefilter.gazetteer = gazetteer.match
+            self.rebuilds += 1
+            logger.info(f"Rebuilt pipeline after {growth} new strings (rebuild {self.rebuilds})")
+        finally:
+            self._rebuild_lock.release()
+
+    def vocab_stats(self) -> Dict:
+        """StringStore size and rebuild counters"""
+        return {
+            "strings": len(self.nlp.vocab.strings),
+            "growth": self.vocab_growth,
+            "max_growth": self.max_vocab_growth,
+            "rebuilds": self.rebuilds
+        }
+
+    def _use_ruler_only(self, ruler_only: Optional[bool]) -> bool:
+        """Resolve a per-call ruler_only override against the instance default"""
+        ruler_only = self.ruler_only if ruler_only is None else ruler_only
+        if ruler_only and self.gazetteer is None:
+            raise ValueError("ruler_only requires a gazetteer to be loaded")
+        return ruler_only
+
+    def _process(self, text: str, ruler_only: Optional[bool] = None) -> Doc:
+        """Run the pipeline, or only the tokenizer and gazetteer, on a text"""
+        # Hold one pipeline for the whole call in case rebuild() swaps it
+        nlp = self.nlp
+        if self._use_ruler_only(ruler_only):
+            return self.gazetteer(nlp.make_doc(text))
+        if self.prefilter is not None:
+            doc = nlp.make_doc(text)
+            if self.prefilter.should_run(doc):
+                return next(self._run(nlp, [doc]))
+            return self._skip(doc)
+        if self.cascade is not None:
+            return next(self._run(nlp, [text]))
+        return nlp(text)
+
+    def _pipe(self, texts: Iterable[str], ruler_only: Optional[bool] = None) -> Iterator[Doc]:
+        """Batch counterpart of _process"""
+        nlp = self.nlp
+        if self._use_ruler_only(ruler_only):
+            return self.gazetteer.pipe(nlp.tokenizer.pipe(texts))
+        if self.prefilter is not None:
+            return self._pipe_filtered(nlp, texts)
+        return self._run(nlp, texts)
+
+    def _run(self, nlp: Language, texts: Iterable) -> Iterator[Doc]:
+        """Run the statistical pipeline, through the cascade when one is configured"""
+        if self.cascade is not None:
+            return self.cascade.pipe(texts, nlp, finish=self._skip)
+        return nlp.pipe(texts)
+
+    def _pipe_filtered(self, nlp: Language, texts: Iterable[str]) -> Iterator[Doc]:
+        """Run the pipeline only on docs the pre-filter flags, keeping input order"""
+        docs = list(nlp.tokenizer.pipe(texts))
+        flagged = [self.prefilter.should_run(doc) for doc in docs]
+        processed = self._run(nlp, [doc for doc, run in zip(docs, flagged) if run])
+        for doc, run in zip(docs, flagged):
+            yield next(processed) if run else self._skip(doc)
+
+    def _skip(self, doc: Doc) -> Doc:
+        """Finish a doc the pre-filter skipped or the cascade settled; gazetteer matches are still applied"""
+        if self.gazetteer is not None:
+            # Outside the pipeline the gazetteer's position cannot decide overlaps
+            # with entities already on the doc, so apply the configured precedence
+            return self.gazetteer.apply(doc, overwrite=self.gazetteer_precedence == PRECEDENCE_GAZETTEER)
+        return doc
+
+    def _entities_from_doc(self, doc: Doc, describe: bool = False) -> List[Dict]:
+        """Convert a processed doc's entities to dictionaries"""
+        entities = []
+        for ent in doc.ents:
+            entity = {
+                "text": ent.text,
+                "label": ent.label_,
+                "start": ent.start_char,
+                "end": ent.end_char
+            }
+            if describe:
+                entity["label_description"] = spacy.explain(ent.label_)
+            if self.aliases is not None:
+                entity["canonical_id"] = self.aliases.lookup(ent.text, ent.label_)
+            entities.append(entity)
+        return entities
     
-    def extract_entities(self, text: str) -> List[Dict[str, str]]:
+    def extract_entities(self, text: str, ruler_only: Optional[bool] = None) -> List[Dict[str, str]]:
         """
         Extract named entities from text
         
         Args:
             text: Input text to process
+            ruler_only: Override the instance's ruler_only setting for this call
             
         Returns:
             List of dictionaries containing entity information
         """
-        doc = self.nlp(text)
-        entities = []
-        
-        for ent in doc.ents:
-            entities.append({
-                "text": ent.text,
-                "label": ent.label_,
-                "start": ent.start_char,
-                "end": ent.end_char
-            })
-        
+        with self._inference_scope():
+            doc = self._process(text, ruler_only)
+            entities = self._entities_from_doc(doc)
+        self._check_vocab_growth()
         return entities
     
-    def extract_entities_with_context(self, text: str) -> Dict:
+    def extract_entities_with_context(self, text: str, ruler_only: Optional[bool] = None) -> Dict:
         """
         Extract entities with additional context
         
         Args:
             text: Input text to process
+            ruler_only: Override the instance's ruler_only setting for this call
             
         Returns:
             Dictionary with entities and metadata
         """
-        doc = self.nlp(text)
-        
-        entities = []
-        for ent in doc.ents:
-            entities.append({
-                "text": ent.text,
-                "label": ent.label_,
-                "start": ent.start_char,
-                "end": ent.end_char,
-                "label_description": spacy.explain(ent.label_)
-            })
+        with self._inference_scope():
+            doc = self._process(text, ruler_only)
+            entities = self._entities_from_doc(doc, describe=True)
+        self._check_vocab_growth()
         
         return {
             "text": text,
@@ -102,32 +305,60 @@ class NERModel:
             "entity_types": list(set([ent["label"] for ent in entities]))
         }
     
-    def batch_extract_entities(self, texts: List[str]) -> List[Dict]:
+    def batch_extract_entities(self, texts: List[str], ruler_only: Optional[bool] = None) -> List[Dict]:
         """
         Process multiple texts in batch
         
         Args:
             texts: List of texts to process
+            ruler_only: Override the instance's ruler_only setting for this call
             
         Returns:
             List of results for each text
         """
         results = []
-        for doc in self.nlp.pipe(texts):
-            entities = []
-            for ent in doc.ents:
-                entities.append({
-                    "text": ent.text,
-                    "label": ent.label_,
-                    "start": ent.start_char,
-                    "end": ent.end_char
+        with self._inference_scope():
+            for doc in self._pipe(texts, ruler_only):
+                results.append({
+                    "text": doc.text,
+                    "entities": self._entities_from_doc(doc)
                 })
-            results.append({
-                "text": doc.text,
-                "entities": entities
-            })
+        self._check_vocab_growth()
         
         return results
+    
+    def aggregate_entities(
+        self,
+        texts: Iterable[str],
+        analytics: Optional[EntityAnalytics] = None,
+        batch_size: int = 256,
+        ruler_only: Optional[bool] = None
+    ) -> EntityAnalytics:
+        """
+        Count entities over a stream of texts without keeping per-text results
+        
+        Texts are read lazily in batches and counted straight from the
+        processed docs, so memory stays fixed however long the stream is.
+        
+        Args:
+            texts: Texts to process (any iterable)
+            analytics: Analytics to add to (new ones when omitted)
+            batch_size: Texts processed per batch
+            ruler_only: Override the instance's ruler_only setting for this call
+            
+        Returns:
+            Mention counts and top entities per label
+        """
+        analytics = analytics if analytics is not None else EntityAnalytics()
+        texts = iter(texts)
+        while True:
+            batch = list(islice(texts, batch_size))
+            if not batch:
+                return analytics
+            with self._inference_scope():
+                for doc in self._pipe(batch, ruler_only):
+                    analytics.add_doc(doc)
+            self._check_vocab_growth()
 
 
 def main():
@@ -0,0 +1,141 @@
+"""
+Cheap pre-filter for the NER fast mode
+Decides from tokenizer output alone whether a text can contain entities, so
+entity-free texts skip the statistical pipeline
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from spacy.language import Language
+from spacy.tokens import Doc
+
+# Tokens that end a sentence; the next capitalized token is not evidence of a name
+SENTENCE_END = {".", "!", "?", "\n", ":", ";", "\"", "'"}
+
+
+class EntityPrefilter:
+    """Tokenizer-level heuristic that flags texts likely to contain entities"""
+
+    def __init__(
+        self,
+        use_casing: bool = True,
+        use_digits: bool = True,
+        use_sentence_initial: bool = True,
+        gazetteer: Optional[Callable[[Doc], list]] = None
+    ):
+        """
+        Initialize the pre-filter
+
+        Args:
+            use_casing: Run the model when a capitalized word appears mid-sentence
+            use_digits: Run the model when a token contains a digit (dates, money, cardinals)
+            use_sentence_initial: Also count capitalized sentence-initial non-stop words
+            gazetteer: Optional match function (such as Gazetteer.match) whose hits trigger the model
+        """
+        self.use_casing = use_casing
+        self.use_digits = use_digits
+        self.use_sentence_initial = use_sentence_initial
+        self.gazetteer = gazetteer
+        self.checked = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def has_candidates(self, doc: Doc) -> bool:
+        """
+        Check a tokenized doc for entity evidence
+
+        Args:
+            doc: Doc produced by the tokenizer only
+
+        Returns:
+            True if the statistical model should run on the doc
+        """
+        sentence_start = True
+        for token in doc:
+            if token.is_space or token.is_punct:
+                sentence_start = sentence_start or token.text in SENTENCE_END or "\n" in token.text
+                continue
+            if self.use_digits and any(c.isdigit() for c in token.text):
+                return True
+            if self.use_casing and token.text[0].isupper() and token.text != "I":
+                if not sentence_start:
+                    return True
+                if self.use_sentence_initial and not token.is_stop:
+                    return True
+            sentence_start = False
+        if self.gazetteer is not None and self.gazetteer(doc):
+            return True
+        return False
+
+    def should_run(self, doc: Doc) -> bool:
+        """Check a doc and record the decision in the skip statistics"""
+        run = self.has_candidates(doc)
+        with self._lock:
+            self.checked += 1
+            if not run:
+                self.skipped += 1
+        return run
+
+    @property
+    def skip_rate(self) -> float:
+        """Fraction of checked texts that skipped the model"""
+        return self.skipped / self.checked if self.checked else 0.0
+
+    def stats(self) -> Dict:
+        """Skip statistics since the pre-filter was created"""
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skip_rate, 4)
+        }
+
+
+def evaluate_prefilter(
+    prefilter: EntityPrefilter,
+    nlp: Language,
+    examples: Iterable[Tuple[str, Dict]]
+) -> Dict:
+    """
+    Measure skip rate and lost recall of a pre-filter on labeled data
+
+    Lost recall counts gold entities that fall in skipped texts, which is the
+    recall the fast mode gives up compared with always running the model.
+
+    Args:
+        prefilter: Pre-filter to evaluate (its running statistics are untouched)
+        nlp: Pipeline whose tokenizer is used
+        examples: (text, {"entities": [(start, end, label), ...]}) pairs
+
+    Returns:
+        Dictionary with skip rate, lost recall and per-label lost counts
+    """
+    texts: List[str] = []
+    annotations: List[Dict] = []
+    for text, annots in examples:
+        texts.append(text)
+        annotations.append(annots)
+
+    total_entities = 0
+    lost_entities = 0
+    skipped = 0
+    lost_by_label: Dict[str, int] = {}
+    for doc, annots in zip(nlp.tokenizer.pipe(texts), annotations):
+        entities = annots.get("entities", [])
+        total_entities += len(entities)
+        if prefilter.has_candidates(doc):
+            continue
+        skipped += 1
+        lost_entities += len(entities)
+        for _, _, label in entities:
+            lost_by_label[label] = lost_by_label.get(label, 0) + 1
+
+    return {
+        "texts": len(texts),
+        "skipped": skipped,
+        "skip_rate": skipped / len(texts) if texts else 0.0,
+        "entities": total_entities,
+        "lost_entities": lost_entities,
+        "recall_lost": lost_entities / total_entities if total_entities else 0.0,
+        "lost_by_label": lost_by_label
+    }
@@ -0,0 +1,198 @@
+"""
+Process and memory helpers for the production server
+Sizes the worker pool from the CPUs and memory available to the container,
+reports per-worker memory split into shared and private pages, and recycles
+workers whose resident memory grows past a threshold
+"""
+
+import argparse
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.cpus import _read, available_cpus
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def available_memory() -> int:
+    """
+    Bytes of memory available to this process
+
+    Uses the cgroup memory limit when one is set, otherwise MemAvailable
+    from /proc/meminfo.
+    """
+    meminfo = {}
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        key, _, value = line.partition(":")
+        meminfo[key] = int(value.split()[0]) * 1024
+    host = meminfo.get("MemAvailable", 0)
+
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        limit = _read(path)
+        if limit and limit != "max" and int(limit) < (1 << 60):
+            usage = _read(path.replace("memory.max", "memory.current").replace("limit_in_bytes", "usage_in_bytes"))
+            limit = int(limit) - int(usage or 0)
+            return min(limit, host) if host else limit
+    return host
+
+
+def recommended_workers(
+    shared_bytes: int,
+    worker_bytes: int,
+    cpus: Optional[int] = None,
+    memory: Optional[int] = None,
+    reserve_fraction: float = 0.1
+) -> int:
+    """
+    Number of workers that fits the available CPUs and memory
+
+    With a preloaded model the model pages are shared copy-on-write, so each
+    additional worker only costs its private memory.
+
+    Args:
+        shared_bytes: Memory loaded once in the master and shared by all workers
+        worker_bytes: Private memory each worker needs on top of the shared pages
+        cpus: Available CPUs (detected when omitted)
+        memory: Available memory in bytes before the shared memory was loaded
+            (detected when omitted, so call this before loading it)
+        reserve_fraction: Share of memory kept free as headroom
+
+    Returns:
+        Worker count, at least 1
+    """
+    cpus = cpus or available_cpus()
+    memory = available_memory() if memory is None else memory
+    budget = memory * (1 - reserve_fraction) - shared_bytes
+    by_memory = int(budget // worker_bytes) if worker_bytes > 0 else cpus
+    return max(1, min(cpus, by_memory))
+
+
+def memory_usage(pid="self") -> Dict[str, int]:
+    """
+    Memory of a process split into shared and private pages
+
+    Args:
+        pid: Process id, or "self"
+
+    Returns:
+        Dictionary with rss, pss, shared and private bytes
+    """
+    fields = {}
+    rollup = _read(f"/proc/{pid}/smaps_rollup")
+    for line in (rollup or "").splitlines()[1:]:
+        key, _, value = line.partition(":")
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            fields[key] = int(parts[0]) * 1024
+
+    if not fields:
+        status = _read(f"/proc/{pid}/status") or ""
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                fields["Rss"] = int(line.split()[1]) * 1024
+
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct child processes of a process"""
+    children = []
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        content = _read(str(task / "children"))
+        if content:
+            children.extend(int(child) for child in content.split())
+    return sorted(children)
+
+
+def memory_report(master_pid: int) -> Dict:
+    """
+    Per-process memory of a master and its workers
+
+    The shared total counts pages that are mapped by more than one process, so
+    the difference between summed rss and summed pss is the memory saved by
+    sharing.
+
+    Args:
+        master_pid: Pid of the server master process
+
+    Returns:
+        Dictionary with the master, per-worker entries and totals in bytes
+    """
+    workers = {pid: memory_usage(pid) for pid in child_pids(master_pid)}
+    processes = [memory_usage(master_pid)] + list(workers.values())
+    rss = sum(p["rss"] for p in processes)
+    pss = sum(p["pss"] for p in processes)
+    return {
+        "master": memory_usage(master_pid),
+        "workers": workers,
+        "total_rss": rss,
+        "total_pss": pss,
+        "saved_by_sharing": max(0, rss - pss)
+    }
+
+
+class RSSWatchdog:
+    """Background thread that fires a callback once RSS crosses a limit"""
+
+    def __init__(self, limit_bytes: int, on_exceed: Callable[[int], None], interval: float = 5.0):
+        """
+        Initialize the watchdog
+
+        Args:
+            limit_bytes: Resident memory limit of the current process
+            on_exceed: Called once with the current RSS when the limit is crossed
+            interval: Seconds between checks
+        """
+        self.limit_bytes = limit_bytes
+        self.on_exceed = on_exceed
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-watchdog", daemon=True)
+
+    def start(self) -> "RSSWatchdog":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = memory_usage()["rss"]
+            if rss > self.limit_bytes:
+                self.on_exceed(rss)
+                return
+
+
+def main():
+    """Print the memory report of a running server"""
+    parser = argparse.ArgumentParser(description="Per-worker memory report of a running NER server")
+    parser.add_argument("master_pid", type=int, help="Pid of the gunicorn master")
+    args = parser.parse_args()
+
+    report = memory_report(args.master_pid)
+    print(f"{'process':>14} {'rss MB':>9} {'pss MB':>9} {'shared MB':>10} {'private MB':>11}")
+    rows = [("master", report["master"])] + [(f"worker {pid}", usage) for pid, usage in report["workers"].items()]
+    for name, usage in rows:
+        print(f"{name:>14} {usage['rss'] / MB:>9.1f} {usage['pss'] / MB:>9.1f} "
+              f"{usage['shared'] / MB:>10.1f} {usage['private'] / MB:>11.1f}")
+    print(f"\nTotal rss {report['total_rss'] / MB:.1f} MB, total pss {report['total_pss'] / MB:.1f} MB, "
+          f"{report['saved_by_sharing'] / MB:.1f} MB saved by sharing")
+
+
+if __name__ == "__main__":
+    main()
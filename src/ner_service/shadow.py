@@ -0,0 +1,157 @@
+"""
+Shadow evaluation of a candidate model against live traffic
+A sampled fraction of requests is replayed on a candidate model in the
+background after the primary model has answered; latency distributions and
+entity-level agreement of both models are collected into a report
+"""
+
+import logging
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.metrics import LatencyHistogram, f1
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ShadowEvaluator:
+    """Mirrors sampled requests to a candidate model on a background thread"""
+
+    def __init__(self, candidate, sample_rate: float = 0.01, max_pending: int = 8, seed: Optional[int] = None):
+        """
+        Initialize the evaluator
+
+        Args:
+            candidate: NERModel under evaluation
+            sample_rate: Fraction of requests mirrored to the candidate
+            max_pending: Mirrored calls queued at most; further samples are dropped
+            seed: Seed for the sampling decision
+        """
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._random = random.Random(seed)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.pending = 0
+        self.mirrored = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latency = {"primary": LatencyHistogram(), "candidate": LatencyHistogram()}
+        self.texts = 0
+        self.identical_texts = 0
+        self.by_label = defaultdict(lambda: {"primary": 0, "candidate": 0, "matched": 0})
+
+    def should_sample(self) -> bool:
+        """Decide whether the current request is mirrored"""
+        return self.sample_rate > 0 and self._random.random() < self.sample_rate
+
+    def submit(self, texts: List[str], primary_entities: List[List[Dict]], primary_seconds: float) -> bool:
+        """
+        Queue a mirrored call without waiting for it
+
+        Args:
+            texts: Texts the primary model processed in one call
+            primary_entities: Primary model's entities per text
+            primary_seconds: Wall time of the primary call
+
+        Returns:
+            Whether the call was queued (False when the backlog is full)
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending += 1
+        self._executor.submit(self._run, list(texts), primary_entities, primary_seconds)
+        return True
+
+    def _run(self, texts: List[str], primary_entities: List[List[Dict]], primary_seconds: float):
+        try:
+            start = time.perf_counter()
+            if len(texts) == 1:
+                candidate_entities = [self.candidate.extract_entities(texts[0])]
+            else:
+                candidate_entities = [result["entities"] for result in self.candidate.batch_extract_entities(texts)]
+            candidate_seconds = time.perf_counter() - start
+            self._record(primary_entities, candidate_entities, primary_seconds, candidate_seconds)
+        except Exception as e:
+            logger.error(f"Shadow model failed: {str(e)}")
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self._idle.notify_all()
+
+    def _record(self, primary_entities, candidate_entities, primary_seconds: float, candidate_seconds: float):
+        with self._lock:
+            self.mirrored += 1
+            self.latency["primary"].record(primary_seconds * 1000)
+            self.latency["candidate"].record(candidate_seconds * 1000)
+            for primary, candidate in zip(primary_entities, candidate_entities):
+                primary_spans = {(ent["start"], ent["end"], ent["label"]) for ent in primary}
+                candidate_spans = {(ent["start"], ent["end"], ent["label"]) for ent in candidate}
+                self.texts += 1
+                self.identical_texts += primary_spans == candidate_spans
+                for _, _, label in primary_spans:
+                    self.by_label[label]["primary"] += 1
+                for _, _, label in candidate_spans:
+                    self.by_label[label]["candidate"] += 1
+                for _, _, label in primary_spans & candidate_spans:
+                    self.by_label[label]["matched"] += 1
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no mirrored call is pending; returns False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def report(self) -> Dict:
+        """
+        Compare the candidate with the primary model
+
+        Agreement treats the primary model's entities as the reference:
+        precision is the share of candidate entities the primary also found,
+        recall the share of primary entities the candidate reproduced.
+
+        Returns:
+            Dictionary with sampling counters, latency per model and agreement
+        """
+        with self._lock:
+            totals = {key: sum(counts[key] for counts in self.by_label.values())
+                      for key in ("primary", "candidate", "matched")}
+            return {
+                "candidate_model": getattr(self.candidate, "model_name", None),
+                "sample_rate": self.sample_rate,
+                "mirrored": self.mirrored,
+                "pending": self.pending,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "latency": {name: histogram.stats() for name, histogram in self.latency.items()},
+                "agreement": {
+                    "texts": self.texts,
+                    "identical_texts": self.identical_texts,
+                    "identical_rate": self.identical_texts / self.texts if self.texts else 0.0,
+                    "entities": totals,
+                    **f1(totals["matched"], totals["candidate"], totals["primary"]),
+                    "by_label": {
+                        label: dict(counts, **f1(counts["matched"], counts["candidate"], counts["primary"]))
+                        for label, counts in sorted(self.by_label.items())
+                    }
+                }
+            }
+
+    def close(self):
+        """Stop the background thread, dropping queued calls"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
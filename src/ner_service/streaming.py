@@ -0,0 +1,182 @@
+"""
+Pipelined extraction over a persistent WebSocket connection
+Clients send tagged texts without waiting for replies; the session batches
+them for nlp.pipe and answers each one, possibly out of order, by its id
+"""
+
+import asyncio
+import json
+import logging
+import math
+import sys
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.admission import DeadlineExceeded, Overloaded
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Processes a batch of texts and returns one entity list per text
+BatchProcessor = Callable[[List[str]], Awaitable[List[List[Dict]]]]
+
+
+class StreamLimits:
+    """Per-connection flow-control limits"""
+
+    def __init__(
+        self,
+        max_pending: int = 256,
+        max_batch: int = 64,
+        batch_wait_ms: float = 5.0,
+        max_text_chars: int = 100000,
+        batch_timeout_ms: float = 30000.0
+    ):
+        """
+        Initialize the limits
+
+        Args:
+            max_pending: Texts received but not yet answered; reading pauses beyond this
+            max_batch: Maximum texts per model batch
+            batch_wait_ms: How long to wait for more texts after the first of a batch
+            max_text_chars: Longest accepted text
+            batch_timeout_ms: How long a batch may wait for an inference slot (0 = no limit)
+        """
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.max_text_chars = max_text_chars
+        self.batch_timeout = batch_timeout_ms / 1000.0
+
+
+class StreamSession:
+    """One WebSocket connection's read, batch and reply loops"""
+
+    def __init__(self, websocket: WebSocket, process: BatchProcessor, limits: StreamLimits):
+        """
+        Initialize the session
+
+        Args:
+            websocket: Accepted WebSocket connection
+            process: Coroutine function running the model on a batch of texts
+            limits: Flow-control limits for this connection
+        """
+        self.websocket = websocket
+        self.process = process
+        self.limits = limits
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending = asyncio.Semaphore(limits.max_pending)
+        self._send_lock = asyncio.Lock()
+        self._tasks = set()
+        self.received = 0
+        self.answered = 0
+
+    async def run(self):
+        """Serve the connection until the client disconnects"""
+        batcher = asyncio.create_task(self._batch_loop())
+        try:
+            await self._read_loop()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            batcher.cancel()
+            for task in list(self._tasks):
+                task.cancel()
+
+    async def _read_loop(self):
+        while True:
+            # Stop reading while too many texts are unanswered, which pushes
+            # back on the client through the socket's receive window
+            await self._pending.acquire()
+            try:
+                message = await self._receive()
+            except ValueError as e:
+                # A bad frame only fails itself; the connection stays open
+                self.received += 1
+                await self._reply({"id": None, "error": str(e)})
+                continue
+            self.received += 1
+            item_id = message.get("id") if isinstance(message, dict) else None
+            error = self._validate(message)
+            if error:
+                await self._reply({"id": item_id, "error": error})
+                continue
+            self._queue.put_nowait((item_id, message["text"]))
+
+    async def _receive(self) -> Any:
+        """Read the next frame as JSON, raising ValueError for binary or malformed frames"""
+        frame = await self.websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000))
+        text = frame.get("text")
+        if text is None:
+            raise ValueError("Messages must be JSON text frames")
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            raise ValueError("Message is not valid JSON")
+
+    def _validate(self, message: Any) -> Optional[str]:
+        if not isinstance(message, dict) or "id" not in message:
+            return "Message must be an object with 'id' and 'text'"
+        text = message.get("text")
+        if not isinstance(text, str) or not text:
+            return "'text' must be a non-empty string"
+        if len(text) > self.limits.max_text_chars:
+            return f"'text' exceeds {self.limits.max_text_chars} characters"
+        return None
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.limits.batch_wait
+            while len(batch) < self.limits.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Batches run concurrently, so a later batch may be answered first
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List):
+        ids = [item_id for item_id, _ in batch]
+        try:
+            results = await self.process([text for _, text in batch])
+            replies = [
+                {"id": item_id, "entities": entities, "entity_count": len(entities)}
+                for item_id, entities in zip(ids, results)
+            ]
+        except Overloaded as e:
+            replies = [
+                {"id": item_id, "error": "Server overloaded, retry later", "retry_after": math.ceil(e.retry_after)}
+                for item_id in ids
+            ]
+        except DeadlineExceeded:
+            replies = [{"id": item_id, "error": "Request deadline expired before processing"} for item_id in ids]
+        except Exception as e:
+            logger.error(f"Error in streamed batch: {str(e)}")
+            replies = [{"id": item_id, "error": str(e) or e.__class__.__name__} for item_id in ids]
+        for reply in replies:
+            await self._reply(reply)
+
+    async def _reply(self, reply: Dict):
+        try:
+            async with self._send_lock:
+                await self.websocket.send_json(reply)
+        except Exception:
+            # The client went away; the read loop ends the session
+            pass
+        finally:
+            self.answered += 1
+            self._pending.release()
@@ -0,0 +1,158 @@
+"""
+Training checkpoints
+Saves the pipeline, the optimizer's moments, averages and update counters and
+the trainer's progress after an iteration, so an interrupted run can resume
+where it stopped instead of starting over
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy
+import spacy
+from spacy.language import Language
+from thinc.api import Model, Optimizer
+from thinc.backends import get_array_ops
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "iteration-"
+STATE_FILE = "state.json"
+OPTIMIZER_FILE = "optimizer.npz"
+
+
+def _nodes(nlp: Language) -> Dict[str, Model]:
+    """Thinc nodes by stable component/position names, since node ids change between processes"""
+    nodes = {}
+    for name, proc in nlp.components:
+        model = getattr(proc, "model", None)
+        if isinstance(model, Model):
+            for index, node in enumerate(model.walk()):
+                nodes.setdefault(f"{name}/{index}", node)
+    return nodes
+
+
+def optimizer_state(nlp: Language, optimizer: Optimizer) -> Tuple[Dict[str, numpy.ndarray], Dict]:
+    """
+    Extract an optimizer's per-parameter state under stable keys
+
+    Args:
+        nlp: Pipeline the optimizer updates
+        optimizer: thinc optimizer
+
+    Returns:
+        (arrays, counters): moment and average arrays, and update counters
+    """
+    keys = {node.id: key for key, node in reversed(list(_nodes(nlp).items()))}
+    arrays, counters = {}, {"nr_update": {}, "last_seen": {}}
+    for kind in ("mom1", "mom2", "averages"):
+        for (node_id, param), value in (getattr(optimizer, kind) or {}).items():
+            if node_id in keys:
+                arrays[f"{kind}|{keys[node_id]}|{param}"] = get_array_ops(value).to_numpy(value)
+    for kind in ("nr_update", "last_seen"):
+        for (node_id, param), value in getattr(optimizer, kind).items():
+            if node_id in keys:
+                counters[kind][f"{keys[node_id]}|{param}"] = int(value)
+    return arrays, counters
+
+
+def restore_optimizer(nlp: Language, optimizer: Optimizer, arrays: Dict[str, numpy.ndarray], counters: Dict):
+    """Load state written by optimizer_state into a fresh optimizer for the same pipeline"""
+    nodes = _nodes(nlp)
+    for name, value in arrays.items():
+        kind, key, param = name.split("|")
+        target = getattr(optimizer, kind)
+        if key in nodes and target is not None:
+            target[(nodes[key].id, param)] = nodes[key].ops.asarray(value)
+    for kind, values in counters.items():
+        for name, value in values.items():
+            key, param = name.split("|")
+            if key in nodes:
+                getattr(optimizer, kind)[(nodes[key].id, param)] = value
+
+
+def save_checkpoint(
+    checkpoint_dir: str,
+    iteration: int,
+    nlp: Language,
+    optimizer: Optimizer,
+    state: Dict,
+    keep: int = 2
+) -> Path:
+    """
+    Write a checkpoint after an iteration
+
+    The checkpoint is written to a temporary directory and renamed into place,
+    so a crash while saving never leaves a partial checkpoint behind.
+
+    Args:
+        checkpoint_dir: Directory holding the run's checkpoints
+        iteration: Number of completed iterations
+        nlp: Pipeline to save
+        optimizer: Optimizer whose state is saved with the pipeline
+        state: JSON-serializable trainer state (RNG state, losses, settings)
+        keep: Most recent checkpoints to keep
+
+    Returns:
+        Path of the new checkpoint
+    """
+    root = Path(checkpoint_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f"{CHECKPOINT_PREFIX}{iteration:04d}"
+    tmp = root / f".{path.name}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    nlp.to_disk(tmp / "model")
+    arrays, counters = optimizer_state(nlp, optimizer)
+    numpy.savez(tmp / OPTIMIZER_FILE, **arrays)
+    with open(tmp / STATE_FILE, "w", encoding="utf8") as fp:
+        json.dump(dict(state, iteration=iteration, optimizer_counters=counters), fp)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+    for old in list_checkpoints(checkpoint_dir)[:-keep] if keep else []:
+        shutil.rmtree(old, ignore_errors=True)
+    logger.info(f"Saved checkpoint {path}")
+    return path
+
+
+def list_checkpoints(checkpoint_dir: str):
+    """Complete checkpoints of a run, oldest first"""
+    root = Path(checkpoint_dir)
+    if not root.is_dir():
+        return []
+    return sorted(
+        path for path in root.iterdir()
+        if path.name.startswith(CHECKPOINT_PREFIX) and (path / STATE_FILE).is_file()
+    )
+
+
+def latest_checkpoint(checkpoint_dir: str) -> Optional[Path]:
+    """Most recent complete checkpoint, or None"""
+    checkpoints = list_checkpoints(checkpoint_dir)
+    return checkpoints[-1] if checkpoints else None
+
+
+def load_checkpoint(path: str) -> Tuple[Language, Dict[str, numpy.ndarray], Dict]:
+    """
+    Load a checkpoint written by save_checkpoint
+
+    Args:
+        path: Checkpoint directory
+
+    Returns:
+        (nlp, optimizer arrays, state); pass the arrays and state["optimizer_counters"]
+        to restore_optimizer once the optimizer has been created
+    """
+    path = Path(path)
+    nlp = spacy.load(path / "model")
+    with numpy.load(path / OPTIMIZER_FILE) as data:
+        arrays = {name: data[name] for name in data.files}
+    with open(path / STATE_FILE, encoding="utf8") as fp:
+        state = json.load(fp)
+    return nlp, arrays, state
@@ -0,0 +1,376 @@
+"""
+Parallel, incremental DocBin corpus builder
+Streams JSON/JSONL annotation files, tokenizes and aligns entity spans in
+worker processes and writes size-capped DocBin shards with a manifest, so
+rebuilding after an edit only converts the records that changed
+"""
+
+import hashlib
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import spacy
+from spacy.tokens import DocBin
+from spacy.util import filter_spans
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ner_service.cpus import available_cpus
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+# (text, [(start, end, label), ...])
+Record = Tuple[str, List[Tuple[int, int, str]]]
+
+
+def iter_json_array(fp, buffer_size: int = MB) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array without loading the whole file
+
+    Args:
+        fp: Text file object positioned at the array
+        buffer_size: Characters read per chunk
+
+    Returns:
+        Iterator over the decoded elements
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = fp.read(buffer_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            fill()
+            continue
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        # A value not followed by a separator may be cut short (e.g. "1." of "1.5")
+        if not eof:
+            after = end
+            while after < len(buffer) and buffer[after].isspace():
+                after += 1
+            if after == len(buffer) or buffer[after] not in ",]":
+                fill()
+                continue
+        yield value
+        pos = end
+
+
+def _normalize(item) -> Record:
+    """Accept [text, {"entities": [...]}] pairs and {"text", "entities"} objects"""
+    if isinstance(item, dict):
+        text = item["text"]
+        entities = item.get("entities", [])
+    else:
+        text, annotations = item
+        entities = annotations.get("entities", [])
+    return text, [(int(start), int(end), str(label)) for start, end, label in entities]
+
+
+def iter_records(path: str) -> Iterator[Record]:
+    """
+    Stream annotation records from a JSON array or JSONL file
+
+    Records are either [text, {"entities": [[start, end, label], ...]}] as in
+    data/train.json, or objects with "text" and optional "entities"; objects
+    without entities (such as data/samples/sample_texts.json) give unannotated docs.
+
+    Args:
+        path: .json or .jsonl file
+
+    Returns:
+        Iterator over (text, entities) records
+    """
+    with open(path, encoding="utf8") as fp:
+        if Path(path).suffix == ".jsonl":
+            for line in fp:
+                if line.strip():
+                    yield _normalize(json.loads(line))
+        else:
+            for item in iter_json_array(fp):
+                yield _normalize(item)
+
+
+def iter_chunks(records: Iterator[Record], chunk_size: int) -> Iterator[List[Record]]:
+    """
+    Group records into content-defined chunks
+
+    A chunk ends after a record whose hash is divisible by chunk_size (or at
+    four times chunk_size), so inserting or editing records only changes the
+    chunks around the edit instead of shifting every later boundary.
+
+    Args:
+        records: Records in input order
+        chunk_size: Average records per chunk
+
+    Returns:
+        Iterator over lists of records
+    """
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        digest = int.from_bytes(_record_hash(record)[:8], "big")
+        if len(chunk) >= 4 * chunk_size or (len(chunk) >= chunk_size // 4 and digest % chunk_size == 0):
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _record_hash(record: Record) -> bytes:
+    return hashlib.sha256(json.dumps(record, ensure_ascii=False).encode("utf8")).digest()
+
+
+def _chunk_hash(chunk: List[Record], settings_hash: str) -> str:
+    digest = hashlib.sha256(settings_hash.encode())
+    for record in chunk:
+        digest.update(_record_hash(record))
+    return digest.hexdigest()
+
+
+def _file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+_worker_nlp = None
+
+
+def _init_worker(lang: str):
+    global _worker_nlp
+    _worker_nlp = spacy.blank(lang)
+
+
+def _convert_chunk(
+    chunk: List[Record],
+    chunk_hash: str,
+    copy: int,
+    output_dir: str,
+    max_shard_bytes: int,
+    alignment_mode: str
+) -> Dict:
+    """
+    Tokenize a chunk, align its spans and write it as one or more DocBin shards
+
+    copy numbers identical chunks of one source in input order, so each of
+    them gets its own shard files.
+    """
+    docs = []
+    dropped = 0
+    for text, entities in chunk:
+        doc = _worker_nlp.make_doc(text)
+        spans = []
+        for start, end, label in entities:
+            span = doc.char_span(start, end, label=label, alignment_mode=alignment_mode)
+            if span is None:
+                dropped += 1
+            else:
+                spans.append(span)
+        kept = filter_spans(spans)
+        dropped += len(spans) - len(kept)
+        doc.ents = kept
+        docs.append(doc)
+
+    # Split in halves until every shard fits the size cap
+    pending = [docs]
+    parts = []
+    while pending:
+        part = pending.pop()
+        data = DocBin(docs=part, store_user_data=False).to_bytes()
+        if len(data) > max_shard_bytes and len(part) > 1:
+            middle = len(part) // 2
+            pending.extend([part[middle:], part[:middle]])
+        else:
+            parts.append((part, data))
+
+    shards = []
+    for index, (part, data) in enumerate(parts):
+        name = f"{chunk_hash[:16]}-{copy}-{index:03d}.spacy"
+        (Path(output_dir) / name).write_bytes(data)
+        shards.append({
+            "path": name,
+            "docs": len(part),
+            "entities": sum(len(doc.ents) for doc in part),
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest()
+        })
+    return {"hash": chunk_hash, "copy": copy, "records": len(chunk), "dropped_spans": dropped, "shards": shards}
+
+
+def load_manifest(output_dir: str) -> Optional[Dict]:
+    """Read a corpus manifest, or None when the directory has none"""
+    path = Path(output_dir) / MANIFEST
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf8"))
+
+
+def _reusable(entry: Dict, output_dir: Path) -> bool:
+    """Whether all shards of a previous chunk are still on disk unchanged"""
+    for shard in entry["shards"]:
+        path = output_dir / shard["path"]
+        if not path.exists() or path.stat().st_size != shard["bytes"] or _file_sha256(path) != shard["sha256"]:
+            return False
+    return True
+
+
+def build_corpus(
+    source: str,
+    output_dir: str,
+    lang: str = "en",
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    max_shard_bytes: int = 64 * MB,
+    alignment_mode: str = "contract"
+) -> Dict:
+    """
+    Convert an annotation file into DocBin shards
+
+    Chunks whose records and settings are unchanged since the last build keep
+    their shards; only new or edited chunks are converted. Shards of the
+    previous build that are no longer referenced are removed; other files in
+    the directory are left alone. The output directory can be passed to
+    `spacy train` as a corpus path, which reads every .spacy file in it.
+
+    Args:
+        source: JSON array or JSONL annotation file
+        output_dir: Directory for shards and manifest.json
+        lang: Language of the blank tokenizer
+        workers: Worker processes (available CPUs when omitted, 1 converts inline)
+        chunk_size: Average records per chunk
+        max_shard_bytes: Largest serialized shard
+        alignment_mode: spaCy char_span alignment for entity offsets
+            ("strict", "contract" or "expand")
+
+    Returns:
+        The manifest, with build statistics under "build"
+    """
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    settings = {"lang": lang, "alignment_mode": alignment_mode, "max_shard_bytes": max_shard_bytes,
+                "spacy": spacy.__version__}
+    settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+    previous = load_manifest(output_dir) or {}
+    known = {(entry["hash"], entry.get("copy", 0)): entry for entry in previous.get("chunks", [])}
+    copies: Dict[str, int] = {}
+    workers = workers or available_cpus()
+
+    entries: List[Optional[Dict]] = []
+    reused = 0
+
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(lang,)) if workers > 1 else None
+    if executor is None:
+        _init_worker(lang)
+    futures = {}
+    try:
+        for index, chunk in enumerate(iter_chunks(iter_records(source), chunk_size)):
+            chunk_hash = _chunk_hash(chunk, settings_hash)
+            # Repeated chunks are separate entries with separate shards, so none is dropped or double-counted
+            copy = copies[chunk_hash] = copies.get(chunk_hash, -1) + 1
+            entries.append(None)
+            entry = known.get((chunk_hash, copy))
+            if entry and _reusable(entry, output):
+                entries[index] = entry
+                reused += 1
+            elif executor is None:
+                entries[index] = _convert_chunk(chunk, chunk_hash, copy, output_dir, max_shard_bytes, alignment_mode)
+            else:
+                # Bound the chunks held in memory while workers catch up
+                if len(futures) >= 2 * workers:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        entries[futures.pop(future)] = future.result()
+                future = executor.submit(
+                    _convert_chunk, chunk, chunk_hash, copy, output_dir, max_shard_bytes, alignment_mode
+                )
+                futures[future] = index
+        for future in futures:
+            entries[futures[future]] = future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    referenced = {shard["path"] for entry in entries for shard in entry["shards"]}
+    # Only delete shards this builder wrote, never other .spacy files sharing the directory
+    for name in {shard["path"] for entry in known.values() for shard in entry["shards"]} - referenced:
+        (output / name).unlink(missing_ok=True)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "source": str(source),
+        "settings": settings,
+        "chunks": entries,
+        "totals": {
+            "records": sum(entry["records"] for entry in entries),
+            "docs": sum(shard["docs"] for entry in entries for shard in entry["shards"]),
+            "entities": sum(shard["entities"] for entry in entries for shard in entry["shards"]),
+            "dropped_spans": sum(entry["dropped_spans"] for entry in entries),
+            "shards": len(referenced),
+            "bytes": sum(shard["bytes"] for entry in entries for shard in entry["shards"])
+        }
+    }
+    (output / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf8")
+
+    manifest["build"] = {
+        "chunks": len(entries), "converted": len(entries) - reused, "reused": reused, "workers": workers
+    }
+    logger.info(
+        f"Built {output}: {manifest['totals']['docs']} docs in {len(referenced)} shards, "
+        f"{len(entries) - reused} chunks converted, {reused} reused"
+    )
+    return manifest
+
+
+def iter_docs(output_dir: str, vocab) -> Iterator:
+    """
+    Read the docs of a built corpus in manifest order
+
+    Args:
+        output_dir: Directory written by build_corpus
+        vocab: Vocab to attach the docs to (e.g. nlp.vocab)
+
+    Returns:
+        Iterator over Doc objects
+    """
+    manifest = load_manifest(output_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No {MANIFEST} in {output_dir}")
+    for entry in manifest["chunks"]:
+        for shard in entry["shards"]:
+            yield from DocBin().from_disk(Path(output_dir) / shard["path"]).get_docs(vocab)
@@ -0,0 +1,421 @@
+"""
+Near-duplicate detection for training corpora
+MinHash signatures over character shingles are bucketed with LSH, candidate
+pairs are verified against the similarity threshold and merged into clusters;
+one record per cluster is kept, and clusters shared between the training file
+and dev/test files are reported as leakage
+"""
+
+import array
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from training.corpus import iter_records
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = 0.95) -> Tuple[int, int]:
+    """
+    Choose bands and rows per band for a similarity threshold
+
+    A pair with Jaccard similarity s becomes a candidate with probability
+    1 - (1 - s^rows)^bands. More rows per band mean fewer dissimilar
+    candidates to verify, so the largest row count that still catches pairs
+    at the threshold with the given probability is used.
+
+    Args:
+        threshold: Jaccard similarity above which records are near-duplicates
+        num_perm: Signature length
+        recall: Minimum candidate probability of a pair exactly at the threshold
+
+    Returns:
+        (bands, rows) with bands * rows <= num_perm
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """MinHash signatures of normalized character shingles"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1, chunk_shingles: int = 50000):
+        """
+        Initialize the hasher
+
+        Args:
+            num_perm: Signature length (hash functions)
+            shingle_size: Characters per shingle
+            seed: Seed of the hash functions; signatures are only comparable with the same seed
+            chunk_shingles: Shingles hashed at once, bounding the (num_perm x shingles)
+                hash matrix however long a single text is
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.chunk_shingles = chunk_shingles
+        rng = numpy.random.default_rng(seed)
+        # Multiply-shift hashing: odd multipliers, high 32 bits of the product
+        self._a = rng.integers(1, 2 ** 63, size=(num_perm, 1), dtype=numpy.uint64) | numpy.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=(num_perm, 1), dtype=numpy.uint64)
+        self._powers = numpy.uint64(0x100000001B3) ** numpy.arange(shingle_size, dtype=numpy.uint64)
+
+    def shingles(self, text: str) -> numpy.ndarray:
+        """Distinct 64-bit hashes of the lowercased, whitespace-collapsed text's shingles"""
+        normalized = " ".join(text.lower().split())
+        codes = numpy.frombuffer(normalized.encode("utf-32-le"), dtype=numpy.uint32).astype(numpy.uint64)
+        if len(codes) < self.shingle_size:
+            codes = numpy.concatenate([codes, numpy.zeros(self.shingle_size - len(codes), dtype=numpy.uint64)])
+        count = len(codes) - self.shingle_size + 1
+        # Polynomial hash of every window; uint64 arithmetic wraps around
+        hashes = codes[:count] * self._powers[0]
+        for offset in range(1, self.shingle_size):
+            hashes += codes[offset:offset + count] * self._powers[offset]
+        return numpy.unique(hashes)
+
+    def signatures(self, texts: Sequence[str]) -> numpy.ndarray:
+        """MinHash signatures of several texts at once as an (n, num_perm) uint32 array"""
+        shingles = [self.shingles(text) for text in texts]
+        owners = numpy.repeat(numpy.arange(len(texts)), [len(s) for s in shingles])
+        shingles = numpy.concatenate(shingles)
+        result = numpy.full((len(texts), self.num_perm), numpy.iinfo(numpy.uint32).max, dtype=numpy.uint32)
+        for offset in range(0, len(shingles), self.chunk_shingles):
+            chunk = slice(offset, offset + self.chunk_shingles)
+            hashed = self._a * shingles[chunk][None, :]
+            hashed += self._b
+            hashed >>= numpy.uint64(32)
+            # A text may continue from the previous chunk, so fold into its running minimum
+            chunk_owners = owners[chunk]
+            starts = numpy.concatenate([[0], numpy.flatnonzero(chunk_owners[1:] != chunk_owners[:-1]) + 1])
+            rows = chunk_owners[starts]
+            minima = numpy.minimum.reduceat(hashed, starts, axis=1).T.astype(numpy.uint32)
+            result[rows] = numpy.minimum(result[rows], minima)
+        return result
+
+    def signature(self, text: str) -> numpy.ndarray:
+        """MinHash signature of a text as num_perm uint32 values"""
+        return self.signatures([text])[0]
+
+
+def _find(parent: numpy.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _union(parent: numpy.ndarray, a: int, b: int):
+    """Merge two clusters, keeping the lower index as root"""
+    ra, rb = _find(parent, a), _find(parent, b)
+    if ra != rb:
+        parent[max(ra, rb)] = min(ra, rb)
+
+
+def _annotation_key(text: str, entities) -> int:
+    return hash(tuple(sorted((text[start:end], label) for start, end, label in entities)))
+
+
+class NearDuplicateIndex:
+    """
+    Clusters near-duplicate records of one or more annotation files
+
+    Memory stays bounded for millions of records: signatures and band keys
+    are written to memory-mapped files in a work directory, and LSH buckets
+    are formed one band at a time by sorting that band's keys. RAM holds a
+    cluster id and an annotation key per record (16 bytes) throughout, plus
+    24 bytes per record while a band is sorted (its keys, sort order and
+    sorted keys). Texts are signed in batches of batch_chars characters, and a
+    longer text is hashed in chunks of as many shingles.
+
+    Every pair of records sharing a bucket is compared, so a cluster is the
+    transitive closure of all verified candidate pairs. Records with equal
+    signatures are merged without comparison; the remaining comparisons are
+    quadratic in the distinct signatures of a bucket.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1,
+        work_dir: Optional[str] = None,
+        batch_chars: int = 50000
+    ):
+        """
+        Initialize the index
+
+        Args:
+            threshold: Estimated Jaccard similarity at which records count as near-duplicates
+            num_perm: MinHash signature length
+            shingle_size: Characters per shingle
+            seed: Seed of the MinHash functions
+            work_dir: Directory for the memory-mapped arrays (a temporary directory by default)
+            batch_chars: Characters of text signed together in one vectorized batch
+        """
+        self.threshold = threshold
+        self.batch_chars = batch_chars
+        self.hasher = MinHasher(num_perm, shingle_size, seed, chunk_shingles=batch_chars)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._tmp = None if work_dir else tempfile.TemporaryDirectory(prefix="dedup-")
+        self.work_dir = Path(work_dir or self._tmp.name)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        rng = numpy.random.default_rng(seed + 1)
+        self._band_mix = rng.integers(1, 2 ** 63, size=self.rows, dtype=numpy.uint64) | numpy.uint64(1)
+        self.files: List[Dict] = []
+        self.size = 0
+        self.roots: Optional[numpy.ndarray] = None
+        self.annotations: Optional[numpy.ndarray] = None
+
+    def build(self, paths: Sequence[str]) -> "NearDuplicateIndex":
+        """
+        Sign every record of the given files and cluster them
+
+        Args:
+            paths: Annotation files (JSON array or JSONL); records are numbered across files in order
+
+        Returns:
+            The index
+        """
+        annotations = array.array("q")
+        with open(self.work_dir / "signatures.bin", "wb") as signatures, \
+                open(self.work_dir / "bands.bin", "wb") as bands:
+
+            def flush(texts):
+                if texts:
+                    batch = self.hasher.signatures(texts)
+                    signatures.write(batch.tobytes())
+                    bands.write(self._band_keys(batch).tobytes())
+                    texts.clear()
+
+            for path in paths:
+                start = self.size
+                texts, chars = [], 0
+                for text, entities in iter_records(path):
+                    texts.append(text)
+                    chars += len(text)
+                    annotations.append(_annotation_key(text, entities))
+                    self.size += 1
+                    # Bounds the (num_perm x shingles) hash matrix of a batch
+                    if chars >= self.batch_chars:
+                        flush(texts)
+                        chars = 0
+                flush(texts)
+                self.files.append({"path": str(path), "start": start, "end": self.size})
+                logger.info(f"Signed {self.size - start} records of {path}")
+        self.annotations = numpy.frombuffer(annotations, dtype=numpy.int64)
+        self._cluster()
+        return self
+
+    def _band_keys(self, signatures: numpy.ndarray) -> numpy.ndarray:
+        rows = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        return (rows.astype(numpy.uint64) * self._band_mix).sum(axis=2, dtype=numpy.uint64)
+
+    def _cluster(self):
+        parent = numpy.arange(self.size, dtype=numpy.int64)
+        if self.size:
+            signatures = numpy.memmap(self.work_dir / "signatures.bin", dtype=numpy.uint32, mode="r",
+                                      shape=(self.size, self.hasher.num_perm))
+            bands = numpy.memmap(self.work_dir / "bands.bin", dtype=numpy.uint64, mode="r",
+                                 shape=(self.size, self.bands))
+            for band in range(self.bands):
+                keys = numpy.ascontiguousarray(bands[:, band])
+                order = numpy.argsort(keys, kind="stable")
+                sorted_keys = keys[order]
+                edges = numpy.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+                starts = numpy.concatenate([[0], edges])
+                ends = numpy.concatenate([edges, [self.size]])
+                for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                    self._union_similar(parent, order[start:end], signatures)
+            del signatures, bands
+        # Roots have the lowest index of their cluster, so parent[i] <= i and
+        # pointer jumping reaches every root without a per-record Python loop
+        while True:
+            grandparent = parent[parent]
+            if numpy.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        self.roots = parent
+
+    def _union_similar(self, parent: numpy.ndarray, members: numpy.ndarray, signatures: numpy.ndarray):
+        """Merge every pair of a bucket's records (in index order) whose signatures agree above the threshold"""
+        members = [int(member) for member in members]
+        if len({_find(parent, member) for member in members}) == 1:
+            # Already merged through an earlier band
+            return
+        rows = signatures[members]
+        distinct: Dict[bytes, int] = {}
+        for position, member in enumerate(members):
+            first = distinct.setdefault(rows[position].tobytes(), position)
+            _union(parent, members[first], member)
+        firsts = numpy.fromiter(distinct.values(), dtype=numpy.int64, count=len(distinct))
+        unique_rows = rows[firsts]
+        # Compare blocks of rows against all others, bounding the comparison array to ~8 MB
+        block = max(1, 2 ** 23 // (len(firsts) * unique_rows.shape[1]))
+        for offset in range(0, len(firsts) - 1, block):
+            similarity = (unique_rows[offset:offset + block, None, :] == unique_rows[None, :, :]).mean(axis=2)
+            for i, j in zip(*numpy.nonzero(similarity >= self.threshold)):
+                if offset + i < j:
+                    _union(parent, members[firsts[offset + i]], members[firsts[j]])
+
+    def file_slice(self, path: str) -> slice:
+        for entry in self.files:
+            if entry["path"] == str(path):
+                return slice(entry["start"], entry["end"])
+        raise KeyError(path)
+
+    def clusters(self, min_size: int = 2) -> List[numpy.ndarray]:
+        """Record indices of every cluster with at least min_size members, largest first"""
+        order = numpy.argsort(self.roots, kind="stable")
+        sorted_roots = self.roots[order]
+        edges = numpy.flatnonzero(sorted_roots[1:] != sorted_roots[:-1]) + 1
+        groups = [group for group in numpy.split(order, edges) if len(group) >= min_size]
+        return sorted(groups, key=len, reverse=True)
+
+    def close(self):
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+
+def _write_records(path: Path, records):
+    """Write [text, {"entities": [...]}] records as a JSON array or JSONL, streaming"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf8") as fp:
+        if path.suffix == ".jsonl":
+            for text, entities in records:
+                fp.write(json.dumps([text, {"entities": [list(e) for e in entities]}]) + "\n")
+        else:
+            fp.write("[")
+            for i, (text, entities) in enumerate(records):
+                fp.write(("," if i else "") + "\n" + json.dumps([text, {"entities": [list(e) for e in entities]}]))
+            fp.write("\n]\n")
+
+
+def deduplicate(
+    source: str,
+    output: str,
+    eval_paths: Sequence[str] = (),
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    shingle_size: int = 5,
+    drop_leaked: bool = True,
+    max_examples: int = 20,
+    work_dir: Optional[str] = None
+) -> Dict:
+    """
+    Write a deduplicated copy of a training file and report clusters and leakage
+
+    Of every cluster of near-duplicate training records only the first is
+    kept. With drop_leaked, training records that are near-duplicates of any
+    dev/test record are removed as well; the dev/test files are never changed.
+
+    Args:
+        source: Training annotation file (JSON array or JSONL)
+        output: Deduplicated file to write (.json array or .jsonl)
+        eval_paths: Dev/test files checked for leakage
+        threshold: Estimated Jaccard similarity of character shingles at which records are near-duplicates
+        num_perm: MinHash signature length
+        shingle_size: Characters per shingle
+        drop_leaked: Also remove training records leaking into the dev/test files
+        max_examples: Clusters and leaked pairs listed in the report, with their texts
+        work_dir: Directory for the memory-mapped arrays
+
+    Returns:
+        Report with counts, the largest clusters and leakage per dev/test file
+    """
+    index = NearDuplicateIndex(threshold, num_perm, shingle_size, work_dir=work_dir).build([source, *eval_paths])
+    try:
+        roots = index.roots
+        train = index.file_slice(source)
+        n_train = train.stop
+        train_roots = roots[train]
+        positions = numpy.arange(n_train)
+        # Records of all files share one numbering with the training file first,
+        # so a cluster with any training record has a training record as root
+        leaked_roots = numpy.unique(roots[n_train:][roots[n_train:] < n_train])
+        leaked_train = numpy.isin(train_roots, leaked_roots)
+        keep = train_roots == positions
+        if drop_leaked:
+            keep &= ~leaked_train
+
+        train_clusters = [group[group < n_train] for group in index.clusters() if group[1] < n_train]
+        mismatched = int(numpy.unique(train_roots[index.annotations[train] != index.annotations[train_roots]]).size)
+
+        leakage = {}
+        wanted = set()
+        for path in eval_paths:
+            part = index.file_slice(path)
+            eval_roots = roots[part]
+            leaked = numpy.flatnonzero(eval_roots < n_train)
+            pairs = [(int(part.start + i), int(eval_roots[i])) for i in leaked[:max_examples]]
+            wanted.update(i for pair in pairs for i in pair)
+            leakage[path] = {
+                "records": part.stop - part.start,
+                "leaked": int(leaked.size),
+                "rate": leaked.size / (part.stop - part.start) if part.stop > part.start else 0.0,
+                "examples": pairs
+            }
+        examples = [[int(i) for i in group[:3]] for group in train_clusters[:max_examples]]
+        wanted.update(i for group in examples for i in group)
+
+        texts = {}
+        offset = 0
+        for path in [source, *eval_paths]:
+            for i, (text, _) in enumerate(iter_records(path)):
+                if offset + i in wanted:
+                    texts[offset + i] = text
+            offset = index.file_slice(path).stop
+
+        _write_records(
+            Path(output),
+            (record for record, kept in zip(iter_records(source), keep) if kept)
+        )
+        for entry in leakage.values():
+            entry["examples"] = [{"eval_text": texts[e], "train_text": texts[t]} for e, t in entry["examples"]]
+
+        report = {
+            "source": str(source),
+            "output": str(output),
+            "settings": {
+                "threshold": threshold,
+                "num_perm": num_perm,
+                "shingle_size": shingle_size,
+                "bands": index.bands,
+                "rows": index.rows
+            },
+            "train": {
+                "records": n_train,
+                "kept": int(keep.sum()),
+                "removed_duplicates": int(n_train - (train_roots == positions).sum()),
+                "removed_leaked": int((leaked_train & (train_roots == positions)).sum()) if drop_leaked else 0,
+                "clusters": len(train_clusters),
+                "records_in_clusters": int(sum(len(group) for group in train_clusters)),
+                "largest_cluster": len(train_clusters[0]) if train_clusters else 1,
+                "annotation_mismatches": mismatched
+            },
+            "clusters": [
+                {"size": len(group), "texts": [texts[i] for i in example]}
+                for group, example in zip(train_clusters, examples)
+            ],
+            "leakage": leakage
+        }
+        logger.info(
+            f"Kept {report['train']['kept']} of {n_train} records: "
+            f"{report['train']['removed_duplicates']} near-duplicates, {report['train']['removed_leaked']} leaked"
+        )
+        return report
+    finally:
+        index.close()
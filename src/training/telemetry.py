@@ -0,0 +1,187 @@
+"""
+Training throughput telemetry
+Times each training phase, counts words and examples per iteration, tracks
+peak memory and appends one JSON record per event to a log, so training runs
+can be compared and throughput regressions spotted
+"""
+
+import json
+import logging
+import platform
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import spacy
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def peak_rss() -> int:
+    """Peak resident memory of the current process in bytes (0 where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class TrainingTelemetry:
+    """Per-iteration throughput, phase timings and peak memory of a training run"""
+
+    def __init__(self, log_path: Optional[str] = None):
+        """
+        Initialize telemetry
+
+        Args:
+            log_path: JSONL file to append records to (records are only kept in memory when omitted)
+        """
+        self.log_path = Path(log_path) if log_path else None
+        self.iterations: List[Dict] = []
+        self._phases: Dict[str, float] = defaultdict(float)
+        self._batch_sizes: List[int] = []
+        self._words = 0
+        self._started = None
+        self._run_started = None
+
+    def _write(self, record: Dict):
+        if self.log_path:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf8") as fp:
+                fp.write(json.dumps(record) + "\n")
+
+    def start_run(self, **config):
+        """Record the start of a run with its configuration"""
+        self._run_started = time.perf_counter()
+        self._write({
+            "event": "start",
+            "time": time.time(),
+            "spacy": spacy.__version__,
+            "python": platform.python_version(),
+            "config": config
+        })
+
+    def start_iteration(self):
+        """Reset the per-iteration counters"""
+        self._phases = defaultdict(float)
+        self._batch_sizes = []
+        self._words = 0
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the wall time of the enclosed block to the named phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases[name] += time.perf_counter() - start
+
+    def add_batch(self, examples: int, words: int):
+        """Count one batch of examples and its words"""
+        self._batch_sizes.append(examples)
+        self._words += words
+
+    def end_iteration(self, iteration: int, losses: Dict[str, float]) -> Dict:
+        """
+        Close the current iteration and log its record
+
+        Args:
+            iteration: 1-based iteration number
+            losses: Losses accumulated by nlp.update
+
+        Returns:
+            The iteration record
+        """
+        seconds = time.perf_counter() - self._started
+        examples = sum(self._batch_sizes)
+        record = {
+            "event": "iteration",
+            "iteration": iteration,
+            "losses": dict(losses),
+            "seconds": seconds,
+            "examples": examples,
+            "words": self._words,
+            "examples_per_sec": examples / seconds if seconds else 0.0,
+            "words_per_sec": self._words / seconds if seconds else 0.0,
+            "batches": len(self._batch_sizes),
+            "batch_size": {
+                "min": min(self._batch_sizes, default=0),
+                "max": max(self._batch_sizes, default=0),
+                "mean": examples / len(self._batch_sizes) if self._batch_sizes else 0.0
+            },
+            "phases": dict(self._phases),
+            "peak_rss_mb": peak_rss() / MB
+        }
+        self.iterations.append(record)
+        self._write(record)
+        phases = ", ".join(f"{name} {share:.0%}" for name, share in self._shares(self._phases, seconds).items())
+        logger.info(
+            f"Iteration {iteration}: {record['words_per_sec']:.0f} words/s, "
+            f"{record['examples_per_sec']:.1f} examples/s, mean batch {record['batch_size']['mean']:.1f} ({phases})"
+        )
+        return record
+
+    @staticmethod
+    def _shares(phases: Dict[str, float], seconds: float) -> Dict[str, float]:
+        return {name: value / seconds for name, value in phases.items()} if seconds else {}
+
+    def summary(self) -> Dict:
+        """Totals over all iterations, also logged as the run's end record"""
+        seconds = sum(record["seconds"] for record in self.iterations)
+        words = sum(record["words"] for record in self.iterations)
+        examples = sum(record["examples"] for record in self.iterations)
+        phases = defaultdict(float)
+        for record in self.iterations:
+            for name, value in record["phases"].items():
+                phases[name] += value
+        return {
+            "event": "end",
+            "iterations": len(self.iterations),
+            "seconds": seconds,
+            "wall_seconds": time.perf_counter() - self._run_started if self._run_started else seconds,
+            "words_per_sec": words / seconds if seconds else 0.0,
+            "examples_per_sec": examples / seconds if seconds else 0.0,
+            "phases": dict(phases),
+            "phase_shares": self._shares(phases, seconds),
+            "peak_rss_mb": peak_rss() / MB
+        }
+
+    def end_run(self) -> Dict:
+        """Log and return the run summary"""
+        summary = self.summary()
+        self._write(summary)
+        return summary
+
+
+def read_log(path: str) -> List[Dict]:
+    """
+    Read a telemetry log, split into runs
+
+    Args:
+        path: JSONL file written by TrainingTelemetry
+
+    Returns:
+        One dictionary per run with its start record, iterations and end record
+    """
+    runs = []
+    with open(path, encoding="utf8") as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["event"] == "start" or not runs:
+                runs.append({"start": record if record["event"] == "start" else None, "iterations": [], "end": None})
+            if record["event"] == "iteration":
+                runs[-1]["iterations"].append(record)
+            elif record["event"] == "end":
+                runs[-1]["end"] = record
+    return runs
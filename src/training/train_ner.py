@@ -5,12 +5,23 @@ This module provides functionality to train custom NER models using spaCy
 
 import spacy
 from spacy.training import Example
-from spacy.util import minibatch, compounding
+from spacy.util import minibatch, compounding, fix_random_seed
+import hashlib
+import json
 import random
+import sys
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional, Union
 import logging
 
+import numpy
+
+# Add parent directory to path for imports, so the module also runs as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from training.checkpoint import latest_checkpoint, load_checkpoint, restore_optimizer, save_checkpoint
+from training.telemetry import TrainingTelemetry
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -29,12 +40,15 @@ class NERTrainer:
         self.base_model = base_model
         self.new_labels = new_labels or []
         self.nlp = None
+        self.pretrained = False
+        self.telemetry = None
         self._setup_model()
     
     def _setup_model(self):
         """Setup or create the model for training"""
         try:
             self.nlp = spacy.load(self.base_model)
+            self.pretrained = True
             logger.info(f"Loaded base model: {self.base_model}")
         except OSError:
             logger.info(f"Creating blank model")
@@ -55,8 +69,16 @@ class NERTrainer:
         train_data: List[Tuple[str, Dict]],
         output_dir: str,
         n_iter: int = 30,
-        dropout: float = 0.2
-    ):
+        dropout: float = 0.2,
+        telemetry_log: Optional[str] = None,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every: int = 1,
+        keep_checkpoints: int = 2,
+        resume: bool = False,
+        rehearsal_data: Optional[List[Tuple[str, Dict]]] = None,
+        rehearsal_ratio: float = 1.0,
+        seed: Optional[int] = None
+    ) -> Dict:
         """
         Train the NER model
         
@@ -65,8 +87,59 @@ class NERTrainer:
             output_dir: Directory to save the trained model
             n_iter: Number of training iterations
             dropout: Dropout rate for training
+            telemetry_log: JSONL file to append throughput records to
+            checkpoint_dir: Directory to save the pipeline and optimizer state to during training
+            checkpoint_every: Iterations between checkpoints
+            keep_checkpoints: Most recent checkpoints kept in checkpoint_dir
+            resume: Continue from the latest checkpoint in checkpoint_dir if there is one
+            rehearsal_data: Previously learned examples mixed into every iteration to limit forgetting
+            rehearsal_ratio: Rehearsal examples sampled per iteration, relative to len(train_data)
+            seed: Seed for shuffling and rehearsal sampling
+            
+        Returns:
+            Telemetry summary with words/sec, examples/sec, phase times and peak memory
         """
+        if seed is not None:
+            fix_random_seed(seed)
+        rng = random.Random(seed)
+        fingerprint = _fingerprint(train_data, rehearsal_data)
+        initialized = self.pretrained
+        start_iteration = 0
+        restored = None
+        checkpoint = latest_checkpoint(checkpoint_dir) if checkpoint_dir and resume else None
+        if checkpoint:
+            nlp, arrays, state = load_checkpoint(checkpoint)
+            if state["data"] != fingerprint:
+                raise ValueError(f"Checkpoint {checkpoint} was written for different training data")
+            for name in state.get("disabled_for_training", []):
+                if name in nlp.disabled:
+                    nlp.enable_pipe(name)
+            self.nlp = nlp
+            initialized = True
+            start_iteration = state["iteration"]
+            version, internal, gauss = state["rng"]
+            rng.setstate((version, tuple(internal), gauss))
+            # Dropout masks are drawn from numpy's global generator
+            name, keys, pos, has_gauss, cached = state["numpy_rng"]
+            numpy.random.set_state((name, numpy.array(keys, dtype=numpy.uint32), pos, has_gauss, cached))
+            restored = (arrays, state["optimizer_counters"])
+            logger.info(f"Resuming from {checkpoint} after iteration {start_iteration}")
+        elif resume:
+            logger.info(f"No checkpoint in {checkpoint_dir}, starting from scratch")
+        
+        n_rehearsal = min(len(rehearsal_data), round(len(train_data) * rehearsal_ratio)) if rehearsal_data else 0
         logger.info(f"Training NER model for {n_iter} iterations...")
+        self.telemetry = telemetry = TrainingTelemetry(telemetry_log)
+        telemetry.start_run(
+            base_model=self.base_model,
+            n_examples=len(train_data),
+            n_rehearsal=n_rehearsal,
+            n_iter=n_iter,
+            start_iteration=start_iteration,
+            resumed_from=str(checkpoint) if checkpoint else None,
+            dropout=dropout,
+            batch_schedule="compounding(4.0, 32.0, 1.001)"
+        )
         
         # Get NER component
         ner = self.nlp.get_pipe("ner")
@@ -74,26 +147,58 @@ class NERTrainer:
         # Disable other pipelines during training
         other_pipes = [pipe for pipe in self.nlp.pipe_names if pipe != "ner"]
         
-        # Create optimizer
-        optimizer = self.nlp.create_optimizer()
-        
         with self.nlp.disable_pipes(*other_pipes):
-            for iteration in range(n_iter):
-                random.shuffle(train_data)
+            # Create optimizer; a blank pipeline needs its weights initialized first
+            if initialized:
+                optimizer = self.nlp.create_optimizer()
+            else:
+                optimizer = self.nlp.initialize(
+                    lambda: [Example.from_dict(self.nlp.make_doc(text), annots) for text, annots in train_data]
+                )
+            if restored:
+                restore_optimizer(self.nlp, optimizer, *restored)
+            
+            for iteration in range(start_iteration, n_iter):
+                telemetry.start_iteration()
+                with telemetry.phase("shuffle"):
+                    epoch = list(train_data)
+                    if n_rehearsal:
+                        epoch += rng.sample(rehearsal_data, n_rehearsal)
+                    rng.shuffle(epoch)
                 losses = {}
                 
                 # Create batches
-                batches = minibatch(train_data, size=compounding(4.0, 32.0, 1.001))
+                batches = minibatch(epoch, size=compounding(4.0, 32.0, 1.001))
                 
-                for batch in batches:
-                    examples = []
-                    for text, annotations in batch:
-                        doc = self.nlp.make_doc(text)
-                        example = Example.from_dict(doc, annotations)
-                        examples.append(example)
+                while True:
+                    with telemetry.phase("batching"):
+                        batch = next(batches, None)
+                    if batch is None:
+                        break
                     
-                    self.nlp.update(examples, drop=dropout, losses=losses, sgd=optimizer)
+                    with telemetry.phase("examples"):
+                        examples = []
+                        for text, annotations in batch:
+                            doc = self.nlp.make_doc(text)
+                            example = Example.from_dict(doc, annotations)
+                            examples.append(example)
+                    
+                    with telemetry.phase("update"):
+                        self.nlp.update(examples, drop=dropout, losses=losses, sgd=optimizer)
+                    telemetry.add_batch(len(examples), sum(len(example.reference) for example in examples))
+                
+                # Checkpoint before closing the iteration so its time lands in the record
+                if checkpoint_dir and ((iteration + 1) % checkpoint_every == 0 or iteration + 1 == n_iter):
+                    with telemetry.phase("checkpoint"):
+                        save_checkpoint(checkpoint_dir, iteration + 1, self.nlp, optimizer, {
+                            "rng": rng.getstate(),
+                            "numpy_rng": _numpy_rng_state(),
+                            "data": fingerprint,
+                            "losses": losses,
+                            "disabled_for_training": other_pipes
+                        }, keep=keep_checkpoints)
                 
+                telemetry.end_iteration(iteration + 1, losses)
                 logger.info(f"Iteration {iteration + 1}/{n_iter} - Loss: {losses.get('ner', 0):.4f}")
         
         # Save model
@@ -101,6 +206,70 @@ class NERTrainer:
         output_path.mkdir(parents=True, exist_ok=True)
         self.nlp.to_disk(output_path)
         logger.info(f"Model saved to {output_path}")
+        
+        summary = telemetry.end_run()
+        logger.info(
+            f"Training throughput: {summary['words_per_sec']:.0f} words/s, "
+            f"{summary['examples_per_sec']:.1f} examples/s, peak memory {summary['peak_rss_mb']:.0f} MB"
+        )
+        return summary
+    
+    def fine_tune(
+        self,
+        new_data: List[Tuple[str, Dict]],
+        output_dir: str,
+        rehearsal_data: Optional[List[Union[str, Tuple[str, Dict]]]] = None,
+        rehearsal_ratio: float = 1.0,
+        n_iter: int = 10,
+        dropout: float = 0.2,
+        **kwargs
+    ) -> Dict:
+        """
+        Update the loaded model on new examples without retraining from scratch
+        
+        Labels that only occur in the new examples are added to the NER
+        component. Each iteration mixes a fresh sample of rehearsal examples
+        into the new ones so the model keeps what it learned before. Rehearsal
+        items given as plain texts are annotated with the model's own
+        predictions before training, for models whose original training data
+        is not available.
+        
+        Args:
+            new_data: New (text, annotations) examples
+            output_dir: Directory to save the updated model
+            rehearsal_data: Old (text, annotations) examples or unannotated texts
+            rehearsal_ratio: Rehearsal examples sampled per iteration, relative to len(new_data)
+            n_iter: Number of training iterations
+            dropout: Dropout rate for training
+            **kwargs: Further arguments for train (checkpoint_dir, resume, seed, ...)
+            
+        Returns:
+            Telemetry summary of the run
+        """
+        if not self.pretrained:
+            raise ValueError(f"Cannot fine-tune: base model {self.base_model} could not be loaded")
+        ner = self.nlp.get_pipe("ner")
+        for _, annotations in new_data:
+            for _, _, label in annotations.get("entities", []):
+                if label not in ner.labels:
+                    ner.add_label(label)
+        
+        rehearsal = []
+        texts = [item for item in rehearsal_data or [] if isinstance(item, str)]
+        for doc in self.nlp.pipe(texts):
+            rehearsal.append((doc.text, {"entities": [(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents]}))
+        rehearsal += [item for item in rehearsal_data or [] if not isinstance(item, str)]
+        logger.info(f"Fine-tuning on {len(new_data)} new examples with {len(rehearsal)} rehearsal examples")
+        
+        return self.train(
+            new_data,
+            output_dir,
+            n_iter=n_iter,
+            dropout=dropout,
+            rehearsal_data=rehearsal,
+            rehearsal_ratio=rehearsal_ratio,
+            **kwargs
+        )
     
     def evaluate(self, test_data: List[Tuple[str, Dict]]) -> Dict:
         """
@@ -126,6 +295,36 @@ class NERTrainer:
         logger.info(f"  F-Score: {scores.get('ents_f', 0):.4f}")
         
         return scores
+    
+    def cross_validate(self, data: List[Tuple[str, Dict]], k: int = 5, **kwargs) -> Dict:
+        """
+        Cross-validate this trainer's configuration with the folds trained in parallel
+        
+        Every fold starts from this trainer's base model and labels; the
+        trainer's own model is left untouched.
+        
+        Args:
+            data: List of (text, annotations) tuples
+            k: Number of folds
+            **kwargs: Further arguments for training.cross_validation.cross_validate
+                (workers, seed, n_iter, dropout, ...)
+            
+        Returns:
+            Per-fold scores, mean/std of P/R/F overall and per label, and timing
+        """
+        from training.cross_validation import cross_validate
+        return cross_validate(data, k=k, base_model=self.base_model, new_labels=self.new_labels, **kwargs)
+
+
+def _fingerprint(train_data: List[Tuple[str, Dict]], rehearsal_data: Optional[List] = None) -> str:
+    """Hash of the training data, to refuse resuming a checkpoint on different data"""
+    payload = json.dumps([train_data, rehearsal_data or []], sort_keys=True, default=list)
+    return hashlib.sha1(payload.encode("utf8")).hexdigest()
+
+
+def _numpy_rng_state() -> List:
+    name, keys, pos, has_gauss, cached = numpy.random.get_state()
+    return [name, keys.tolist(), pos, has_gauss, cached]
 
 
 def create_sample_training_data() -> List[Tuple[str, Dict]]:
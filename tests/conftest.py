@@ -2,5 +2,25 @@
 import sys
 from pathlib import Path
 
+import pytest
+import spacy
+
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="session")
+def rule_model_path(tmp_path_factory):
+    """Small offline pipeline whose "ner" component is a rule-based stand-in"""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler", name="ner")
+    ruler.add_patterns([
+        {"label": "ORG", "pattern": "Apple Inc."},
+        {"label": "ORG", "pattern": "Google"},
+        {"label": "PERSON", "pattern": "Steve Jobs"},
+        {"label": "GPE", "pattern": "Cupertino"},
+        {"label": "GPE", "pattern": "California"},
+    ])
+    path = tmp_path_factory.mktemp("models") / "rule_model"
+    nlp.to_disk(path)
+    return str(path)
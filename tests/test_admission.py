@@ -0,0 +1,209 @@
+"""
+Tests for admission control and request deadlines
+"""
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from src.ner_service import main
+from src.ner_service.admission import AdmissionController, DeadlineExceeded, Lane, Overloaded, parse_deadline
+from src.ner_service.ner_model import NERModel
+
+
+@pytest.mark.asyncio
+async def test_queue_bounds_and_handoff():
+    """Test requests queue up to the limit and slots are handed over in order"""
+    controller = AdmissionController(max_in_flight=1, max_queue=1)
+    await controller.acquire()
+
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.stats()["queued"] == 1
+
+    with pytest.raises(Overloaded):
+        await controller.acquire()
+
+    controller.release()
+    await waiter
+    assert controller.in_flight == 1
+    controller.release()
+    assert controller.stats()["in_flight"] == 0
+    assert controller.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_expires_in_queue():
+    """Test a queued request is dropped once its deadline passes"""
+    controller = AdmissionController(max_in_flight=1, max_queue=4)
+    await controller.acquire()
+
+    with pytest.raises(DeadlineExceeded):
+        await controller.acquire(deadline=time.time() + 0.05)
+    with pytest.raises(DeadlineExceeded):
+        await controller.acquire(deadline=time.time() - 1)
+
+    assert controller.expired == 2
+    assert controller.queued == 0
+    controller.release()
+    assert controller.in_flight == 0
+
+
+def test_parse_deadline():
+    """Test absolute and relative deadline headers"""
+    assert parse_deadline(None, None) is None
+    assert parse_deadline("100.5", None) == 100.5
+    assert parse_deadline("100.5", "5000") == 100.5
+    assert abs(parse_deadline(None, "1000") - (time.time() + 1)) < 0.5
+    with pytest.raises(ValueError):
+        parse_deadline("soon", None)
+    for value in ("nan", "inf", "-inf"):
+        with pytest.raises(ValueError):
+            parse_deadline(value, "5000")
+        with pytest.raises(ValueError):
+            parse_deadline(None, value)
+
+
+@pytest.mark.asyncio
+async def test_api_load_shedding(rule_model_path, monkeypatch):
+    """Test the API rejects with Retry-After when full and drops expired requests"""
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+    controller = main.AdmissionController(max_in_flight=1, max_queue=0, retry_after=2)
+    monkeypatch.setattr(main, "admission", controller)
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/extract",
+            json={"text": "Steve Jobs"},
+            headers={"X-Request-Deadline": str(time.time() - 1)}
+        )
+        assert response.status_code == 504
+
+        await controller.acquire()
+        response = await client.post("/extract/batch", json={"texts": ["Steve Jobs"]})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+        controller.release()
+
+        response = await client.post("/extract", json={"text": "Steve Jobs"})
+        assert response.status_code == 200
+        assert response.json()["entity_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lanes_share_slots_by_weight():
+    """Test freed slots go to waiting lanes in proportion to their weights"""
+    controller = AdmissionController(max_in_flight=1, max_queue=0, lanes={
+        "interactive": Lane(weight=3, max_queue=100),
+        "bulk": Lane(weight=1, max_queue=100)
+    })
+    await controller.acquire(lane="bulk")
+    order = []
+
+    async def request(lane):
+        await controller.acquire(lane=lane)
+        order.append(lane)
+
+    tasks = [asyncio.create_task(request(lane)) for lane in ["bulk"] * 8 + ["interactive"] * 8]
+    await asyncio.sleep(0)
+    for _ in range(len(tasks) + 1):
+        controller.release(order[-1] if order else "bulk")
+        await asyncio.sleep(0)
+
+    # Roughly three interactive grants per bulk grant, without starving bulk
+    assert order[:8].count("interactive") >= 6
+    assert "bulk" in order[:5]
+    assert sorted(order) == sorted(["bulk"] * 8 + ["interactive"] * 8)
+    stats = controller.stats()["lanes"]
+    assert stats["interactive"]["admitted"] == 8 and stats["interactive"]["queue_time"]["count"] == 8
+    with pytest.raises(ValueError):
+        await controller.acquire(lane="batch")
+
+
+@pytest.mark.asyncio
+async def test_lane_slot_cap_and_continuations():
+    """Test a capped lane leaves slots to others and continuations bypass the queue bound"""
+    controller = AdmissionController(max_in_flight=2, max_queue=0, lanes={
+        "interactive": Lane(max_queue=0),
+        "bulk": Lane(max_queue=0, max_in_flight=1)
+    })
+    await controller.acquire(lane="bulk")
+    with pytest.raises(Overloaded):
+        await controller.acquire(lane="bulk")
+    continuation = asyncio.create_task(controller.acquire(lane="bulk", queue_limit=False))
+    await asyncio.sleep(0)
+
+    await controller.acquire(lane="interactive")
+    assert controller.stats()["lanes"]["bulk"]["queued"] == 1
+    controller.release("bulk")
+    await continuation
+    assert controller.lanes["bulk"].in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_api_interactive_overtakes_bulk_batch(rule_model_path, monkeypatch):
+    """Test an /extract request is served between the slices of a running batch"""
+    model = NERModel(custom_model_path=rule_model_path)
+    batch_extract = model.batch_extract_entities
+
+    def slow_batch(texts, **kwargs):
+        time.sleep(0.05)
+        return batch_extract(texts, **kwargs)
+
+    monkeypatch.setattr(model, "batch_extract_entities", slow_batch)
+    monkeypatch.setattr(main, "ner_model", model)
+    monkeypatch.setattr(main, "BULK_SLICE_TEXTS", 2)
+    controller = main.AdmissionController(max_in_flight=1, max_queue=4, lanes={
+        "interactive": Lane(weight=4, max_queue=4),
+        "bulk": Lane(weight=1, max_queue=4)
+    })
+    monkeypatch.setattr(main, "admission", controller)
+    finished = []
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        async def post(path, body, name, headers=None):
+            response = await client.post(path, json=body, headers=headers)
+            finished.append(name)
+            return response
+
+        bulk = asyncio.create_task(post("/extract/batch", {"texts": ["Steve Jobs"] * 20}, "bulk"))
+        await asyncio.sleep(0.08)
+        interactive = await post("/extract", {"text": "Google"}, "interactive")
+        response = await bulk
+
+        assert interactive.json()["entity_count"] == 1
+        assert response.json()["total_texts"] == 20
+        assert finished == ["interactive", "bulk"]
+        lanes = (await client.get("/metrics")).json()["admission"]["lanes"]
+        assert lanes["bulk"]["admitted"] == 10
+        assert lanes["interactive"]["queue_time"]["max_ms"] < 100
+        invalid = await client.post("/extract", json={"text": "Google"}, headers={"X-Priority": "urgent"})
+        assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_api_batch_deadline_covers_all_slices(rule_model_path, monkeypatch):
+    """Test a relative batch deadline is fixed on arrival rather than renewed per slice"""
+    model = NERModel(custom_model_path=rule_model_path)
+    batch_extract = model.batch_extract_entities
+
+    def slow_batch(texts, **kwargs):
+        time.sleep(0.05)
+        return batch_extract(texts, **kwargs)
+
+    monkeypatch.setattr(model, "batch_extract_entities", slow_batch)
+    monkeypatch.setattr(main, "ner_model", model)
+    monkeypatch.setattr(main, "BULK_SLICE_TEXTS", 2)
+    monkeypatch.setattr(main, "admission", main.AdmissionController(max_in_flight=1, max_queue=4))
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        body = {"texts": ["Steve Jobs"] * 10}
+        expired = await client.post("/extract/batch", json=body, headers={"X-Request-Timeout-Ms": "120"})
+        served = await client.post("/extract/batch", json=body, headers={"X-Request-Timeout-Ms": "5000"})
+
+    assert expired.status_code == 504
+    assert served.json()["total_texts"] == 10
@@ -0,0 +1,79 @@
+"""
+Tests for the alias index
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from src.ner_service.aliases import AliasIndex, compile_aliases, read_aliases
+from src.ner_service.ner_model import NERModel
+
+
+ALIASES = [
+    ("Apple Inc.", "Q312", None),
+    ("Apple", "Q312", "ORG"),
+    ("AAPL", "Q312", None),
+    ("apple", "Q89", None),
+    ("Steve Jobs", "Q19837", "PERSON"),
+    ("Apple", "Q999", "ORG")
+]
+
+
+def test_compile_and_lookup(tmp_path):
+    """Test lookups are normalized, label-scoped aliases win and unknown aliases miss"""
+    header = compile_aliases(ALIASES, tmp_path / "aliases.nalias")
+    assert (header["aliases"], header["duplicates"], header["ids"]) == (5, 1, 4)
+
+    index = AliasIndex(tmp_path / "aliases.nalias")
+    assert len(index) == 5
+    assert index.lookup("apple   INC.") == "Q312"
+    assert index.lookup("Apple", "ORG") == "Q312"
+    assert index.lookup("Apple", "PRODUCT") == "Q89"
+    assert index.lookup("Apple") == "Q89"
+    assert index.lookup("Steve Jobs", "PERSON") == "Q19837"
+    assert index.lookup("Steve Jobs") is None
+    assert index.lookup("Microsoft", "ORG") is None
+    index.close()
+
+    (tmp_path / "other.bin").write_bytes(b"not an index" * 10)
+    with pytest.raises(ValueError):
+        AliasIndex(tmp_path / "other.bin")
+
+
+def test_read_aliases_formats(tmp_path):
+    """Test JSONL and tab-separated alias files"""
+    (tmp_path / "aliases.jsonl").write_text(
+        '{"alias": "AAPL", "id": "Q312", "label": "ORG"}\n\n{"alias": "Apple", "id": 312}\n', encoding="utf8"
+    )
+    (tmp_path / "aliases.tsv").write_text("AAPL\tQ312\tORG\nApple\tQ312\n", encoding="utf8")
+    assert list(read_aliases(tmp_path / "aliases.jsonl")) == [("AAPL", "Q312", "ORG"), ("Apple", "312", None)]
+    assert list(read_aliases(tmp_path / "aliases.tsv")) == [("AAPL", "Q312", "ORG"), ("Apple", "Q312", None)]
+
+
+def test_model_attaches_canonical_ids(rule_model_path, tmp_path):
+    """Test extracted entities carry the canonical id of their text"""
+    compile_aliases(ALIASES, tmp_path / "aliases.nalias")
+    model = NERModel(custom_model_path=rule_model_path, alias_index_path=str(tmp_path / "aliases.nalias"))
+
+    entities = model.extract_entities("Apple Inc. hired Steve Jobs in Cupertino.")
+    assert [(e["text"], e["canonical_id"]) for e in entities] == [
+        ("Apple Inc.", "Q312"), ("Steve Jobs", "Q19837"), ("Cupertino", None)
+    ]
+    batch = model.batch_extract_entities(["Google and Apple Inc."])
+    assert [e["canonical_id"] for e in batch[0]["entities"]] == [None, "Q312"]
+
+
+def test_canonical_id_only_served_with_alias_index(rule_model_path, tmp_path, monkeypatch):
+    """Test responses carry canonical_id only when an alias index is loaded"""
+    from src.ner_service import main
+
+    client = TestClient(main.app)
+    body = {"text": "Apple Inc. hired Steve Jobs in Cupertino."}
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+    assert all("canonical_id" not in e for e in client.post("/extract", json=body).json()["entities"])
+
+    compile_aliases(ALIASES, tmp_path / "aliases.nalias")
+    model = NERModel(custom_model_path=rule_model_path, alias_index_path=str(tmp_path / "aliases.nalias"))
+    monkeypatch.setattr(main, "ner_model", model)
+    batch = client.post("/extract/batch", json={"texts": [body["text"]], "include_text": False}).json()
+    assert [e["canonical_id"] for e in batch["results"][0]["entities"]] == ["Q312", "Q19837", None]
+    assert "text" not in batch["results"][0]["entities"][0]
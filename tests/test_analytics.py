@@ -0,0 +1,75 @@
+"""
+Tests for streaming entity analytics
+"""
+
+import random
+from collections import Counter
+
+from src.ner_service.analytics import CountMinSketch, EntityAnalytics, SpaceSaving
+from src.ner_service.ner_model import NERModel
+
+
+def _zipf_stream(n, seed):
+    rng = random.Random(seed)
+    return [f"key{int(rng.paretovariate(1.2))}" for _ in range(n)]
+
+
+def test_count_min_sketch_bounds_and_merge():
+    """Test estimates never undercount, stay within the error bound and merge like one stream"""
+    left, right = _zipf_stream(5000, 1), _zipf_stream(5000, 2)
+    whole, a, b = CountMinSketch(width=512, depth=4), CountMinSketch(width=512, depth=4), CountMinSketch(width=512, depth=4)
+    for key in left + right:
+        whole.add(key)
+    for key in left:
+        a.add(key)
+    for key in right:
+        b.add(key)
+    b.add("key1", 3)
+
+    exact = Counter(left + right)
+    exact["key1"] += 3
+    merged = a.merge(b)
+    assert merged.total == sum(exact.values())
+    for key, count in exact.items():
+        assert count <= merged.estimate(key) <= count + 2.72 / 512 * merged.total * 2
+    assert merged.estimate("key1") >= whole.estimate("key1") + 3
+
+
+def test_space_saving_finds_heavy_hitters_across_shards():
+    """Test merged shard summaries keep every frequent key with bounded counts"""
+    left, right = _zipf_stream(4000, 3), _zipf_stream(4000, 4)
+    a, b = SpaceSaving(capacity=20), SpaceSaving(capacity=20)
+    for key in left:
+        a.add(key)
+    for key in right:
+        b.add(key)
+    merged = a.merge(b)
+
+    exact = Counter(left + right)
+    tracked = {key: (count, error) for key, count, error in merged.top()}
+    assert len(tracked) <= 20 and merged.total == 8000
+    for key, count in exact.items():
+        if count > merged.total / 20:
+            assert key in tracked
+    for key, (count, error) in tracked.items():
+        assert count - error <= exact[key] <= count
+    assert [key for key, _, _ in merged.top(3)] == [key for key, _ in exact.most_common(3)]
+
+
+def test_model_aggregates_streamed_texts(rule_model_path):
+    """Test entities are counted from a lazy stream and shard analytics merge after serialization"""
+    model = NERModel(custom_model_path=rule_model_path)
+    texts = ["Apple Inc. hired Steve Jobs.", "Google is in California.", "STEVE   JOBS visited Cupertino."] * 10
+
+    whole = model.aggregate_entities((text for text in texts), batch_size=7)
+    first = model.aggregate_entities(texts[:12], EntityAnalytics())
+    second = EntityAnalytics.from_bytes(model.aggregate_entities(texts[12:]).to_bytes())
+    merged = EntityAnalytics.from_bytes(first.merge(second).to_bytes())
+
+    for analytics in (whole, merged):
+        report = analytics.report()
+        assert (report["texts"], report["mentions"]) == (30, 50)
+        assert report["labels"]["PERSON"] == {"mentions": 10, "top": [{"text": "steve jobs", "count": 10, "error": 0}]}
+        assert [entry["text"] for entry in report["labels"]["GPE"]["top"]] == ["california", "cupertino"]
+        assert analytics.count("ORG", "apple inc.") == 10
+        assert analytics.count("ORG", "Steve Jobs") == 0
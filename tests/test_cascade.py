@@ -0,0 +1,96 @@
+"""
+Tests for the fast-first model cascade
+"""
+
+import pytest
+import spacy
+from spacy.training import Example
+
+from src.ner_service.cascade import ModelCascade, evaluate_cascade
+from src.ner_service.ner_model import NERModel
+
+TRAIN = [
+    ("Tim Cook runs Apple Inc. in Cupertino.", [(0, 8, "PERSON"), (14, 24, "ORG"), (28, 37, "GPE")]),
+    ("Steve Jobs founded Apple Inc. in California.", [(0, 10, "PERSON"), (19, 29, "ORG"), (33, 43, "GPE")]),
+]
+TEXTS = ["Tim Cook runs Apple Inc. in Cupertino.", "Google hired Steve Jobs.", "nothing to see here"]
+
+
+@pytest.fixture(scope="module")
+def fast_model_path(tmp_path_factory):
+    """Small trained tok2vec + ner pipeline standing in for a slim model"""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("tok2vec")
+    nlp.add_pipe("ner")
+    examples = [Example.from_dict(nlp.make_doc(text), {"entities": ents}) for text, ents in TRAIN]
+    optimizer = nlp.initialize(lambda: examples)
+    for _ in range(15):
+        nlp.update(examples, sgd=optimizer)
+    path = tmp_path_factory.mktemp("models") / "fast_model"
+    nlp.to_disk(path)
+    return str(path)
+
+
+def _spans(docs):
+    return [[(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents] for doc in docs]
+
+
+def test_threshold_controls_escalation(fast_model_path, rule_model_path):
+    """Test threshold 0 keeps the fast model's entities and a threshold above 1 escalates every text"""
+    fast = spacy.load(fast_model_path)
+    fast_docs, _ = ModelCascade(fast)._fast(fast, TEXTS)
+    never = NERModel(custom_model_path=rule_model_path, cascade_model_path=fast_model_path, cascade_threshold=0.0)
+    always = NERModel(custom_model_path=rule_model_path, cascade_model_path=fast_model_path, cascade_threshold=1.01)
+    large = NERModel(custom_model_path=rule_model_path)
+
+    fast_entities = [[{"text": e.text, "label": e.label_, "start": e.start_char, "end": e.end_char} for e in doc.ents]
+                     for doc in fast_docs]
+    assert [r["entities"] for r in never.batch_extract_entities(TEXTS)] == fast_entities
+    assert always.batch_extract_entities(TEXTS) == large.batch_extract_entities(TEXTS)
+    assert always.extract_entities(TEXTS[1]) == large.extract_entities(TEXTS[1])
+
+    assert never.cascade.stats()["escalated"] == 0
+    stats = always.cascade.stats()
+    assert (stats["texts"], stats["escalated"], stats["escalation_rate"]) == (4, 4, 1.0)
+    assert stats["blended_ms_per_text"] >= stats["large_ms_per_text"] > 0
+
+
+def test_uncertain_documents_escalate(fast_model_path, rule_model_path):
+    """Test only documents below the threshold are re-run and the report compares with the large model"""
+    fast, large = spacy.load(fast_model_path), spacy.load(rule_model_path)
+    cascade = ModelCascade(fast, threshold=0.99)
+    _, confidences = cascade._fast(fast, TEXTS)
+    assert all(0.5 <= confidence <= 1.0 for confidence in confidences)
+
+    docs = list(cascade.pipe(TEXTS, large))
+    escalated = [confidence < 0.99 for confidence in confidences]
+    expected = [large_doc if escalate else fast_doc for escalate, fast_doc, large_doc
+                in zip(escalated, cascade._fast(fast, TEXTS)[0], large.pipe(TEXTS))]
+    assert _spans(docs) == _spans(expected)
+    assert cascade.escalated == sum(escalated)
+
+    report = evaluate_cascade(ModelCascade(fast, threshold=1.01), large, [(text, {"entities": []}) for text in TEXTS])
+    assert report["escalation_rate"] == 1.0
+    assert report["agreement_with_large"]["f1"] == 1.0
+    assert report["agreement_with_large"]["identical_rate"] == 1.0
+    assert "gold" not in report
+
+
+def test_fast_model_needs_statistical_ner(rule_model_path):
+    """Test a pipeline without a transition-based recognizer cannot score its decisions"""
+    with pytest.raises(ValueError):
+        NERModel(custom_model_path=rule_model_path, cascade_model_path=rule_model_path)
+
+
+@pytest.mark.parametrize("precedence, label", [("gazetteer", "EXECUTIVE"), ("model", "PERSON")])
+def test_gazetteer_precedence_on_settled_and_escalated_documents(fast_model_path, tmp_path, precedence, label):
+    """Test documents the fast model settles resolve gazetteer overlaps like escalated ones"""
+    terms = tmp_path / "terms.tsv"
+    terms.write_text("Tim Cook\tEXECUTIVE\n", encoding="utf8")
+
+    for threshold in (0.0, 1.01):
+        model = NERModel(custom_model_path=fast_model_path, cascade_model_path=fast_model_path,
+                         cascade_threshold=threshold, gazetteer_path=str(terms), gazetteer_precedence=precedence)
+        entities = model.batch_extract_entities(TEXTS[:1])[0]["entities"]
+        assert (entities[0]["text"], entities[0]["label"]) == ("Tim Cook", label)
+        assert model.cascade.stats()["escalated"] == (1 if threshold else 0)
@@ -0,0 +1,65 @@
+"""
+Tests for checkpointed, resumable and incremental training
+"""
+
+import numpy
+import pytest
+
+from src.training.checkpoint import list_checkpoints
+from src.training.telemetry import read_log
+from src.training.train_ner import NERTrainer, create_sample_training_data
+
+
+def _trainer():
+    return NERTrainer(base_model="blank_model_for_tests", new_labels=["ORG", "PERSON", "GPE"])
+
+
+def _weights(nlp):
+    return [node.get_param(name) for node in nlp.get_pipe("ner").model.walk()
+            for name in node.param_names if node.has_param(name)]
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path):
+    """Test stopping after two iterations and resuming reproduces the same weights"""
+    data = create_sample_training_data()
+    uninterrupted = _trainer()
+    uninterrupted.train(list(data), str(tmp_path / "full"), n_iter=4, seed=7)
+
+    _trainer().train(list(data), str(tmp_path / "partial"), n_iter=2, seed=7,
+                     checkpoint_dir=str(tmp_path / "ckpt"), keep_checkpoints=1, telemetry_log=str(tmp_path / "log.jsonl"))
+    assert [path.name for path in list_checkpoints(str(tmp_path / "ckpt"))] == ["iteration-0002"]
+    assert all("checkpoint" in record["phases"] for record in read_log(str(tmp_path / "log.jsonl"))[0]["iterations"])
+
+    resumed = _trainer()
+    resumed.train(list(data), str(tmp_path / "resumed"), n_iter=4, seed=7,
+                  checkpoint_dir=str(tmp_path / "ckpt"), resume=True)
+
+    assert resumed.telemetry.summary()["iterations"] == 2
+    for a, b in zip(_weights(uninterrupted.nlp), _weights(resumed.nlp)):
+        numpy.testing.assert_allclose(a, b, rtol=1e-5, atol=1e-6)
+
+
+def test_resume_refuses_different_data(tmp_path):
+    """Test a checkpoint is not applied to other training data"""
+    data = create_sample_training_data()
+    _trainer().train(list(data), str(tmp_path / "model"), n_iter=1, checkpoint_dir=str(tmp_path / "ckpt"))
+
+    with pytest.raises(ValueError):
+        _trainer().train(data[:3], str(tmp_path / "model"), n_iter=2, checkpoint_dir=str(tmp_path / "ckpt"), resume=True)
+
+
+def test_fine_tune_adds_labels_and_rehearses(tmp_path):
+    """Test fine-tuning a saved model learns a new label while rehearsing old data"""
+    data = create_sample_training_data()
+    _trainer().train(list(data), str(tmp_path / "base"), n_iter=2, seed=1)
+
+    trainer = NERTrainer(base_model=str(tmp_path / "base"))
+    new = [("Acme Robotics builds robots.", {"entities": [(0, 13, "COMPANY")]})]
+    summary = trainer.fine_tune(new, str(tmp_path / "tuned"), rehearsal_data=data + ["Tesla is in Austin."],
+                                rehearsal_ratio=3, n_iter=2, seed=1)
+
+    assert "COMPANY" in trainer.nlp.get_pipe("ner").labels
+    assert trainer.telemetry.iterations[0]["examples"] == 4
+    assert summary["iterations"] == 2
+    with pytest.raises(ValueError):
+        _trainer().fine_tune(new, str(tmp_path / "x"))
@@ -0,0 +1,97 @@
+"""
+Tests for the NER service client library
+"""
+
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+from src.ner_client import AsyncNERClient, NERClient, NERClientError
+from src.ner_service import main
+from src.ner_service.ner_model import NERModel
+
+
+def _batch_handler(requests):
+    """Mock /extract/batch answering each text with one entity named after it"""
+    def handle(request):
+        requests.append(request)
+        texts = json.loads(request.content)["texts"]
+        return httpx.Response(200, json={"results": [
+            {"entities": [{"text": text, "label": "ORG", "start": 0, "end": len(text)}], "entity_count": 1}
+            for text in texts
+        ], "total_texts": len(texts)})
+    return handle
+
+
+def test_sync_calls_coalesce_into_batches():
+    """Test concurrent single extract calls share batch requests and get their own results"""
+    requests = []
+    client = NERClient(transport=httpx.MockTransport(_batch_handler(requests)), max_batch=8, batch_wait_ms=50)
+    results = {}
+
+    def call(i):
+        results[i] = client.extract(f"text {i}")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+
+    assert all(results[i]["entities"][0]["text"] == f"text {i}" for i in range(20))
+    assert 3 <= len(requests) < 20
+    assert all(len(json.loads(r.content)["texts"]) <= 8 for r in requests)
+    assert all(r.url.path == "/extract/batch" and r.headers["x-priority"] == "interactive" for r in requests)
+    assert client.stats()["coalesced_calls"] == 20
+
+
+def test_retries_honour_retry_after():
+    """Test 503/429 answers are retried after Retry-After and give up after max_retries"""
+    answers = iter([httpx.Response(503, headers={"Retry-After": "0"}), httpx.Response(429)])
+    handler = _batch_handler([])
+    client = NERClient(transport=httpx.MockTransport(lambda request: next(answers, None) or handler(request)),
+                       backoff=0.001)
+    assert client.extract_batch(["Acme"])[0]["entity_count"] == 1
+    assert client.stats()["retries"] == 2
+    client.close()
+
+    overloaded = httpx.MockTransport(
+        lambda request: httpx.Response(503, json={"detail": "Server overloaded"}, headers={"Retry-After": "0"})
+    )
+    with NERClient(transport=overloaded, max_retries=2, max_batch=1) as client:
+        with pytest.raises(NERClientError) as error:
+            client.extract("Acme")
+    assert error.value.status_code == 503 and error.value.detail == "Server overloaded"
+    assert client.stats()["requests"] == 3
+
+
+def test_stream_batch_keeps_order_in_chunks():
+    """Test a lazily produced batch is sent in chunks and yielded in input order"""
+    requests = []
+    texts = (f"text {i}" for i in range(25))
+    with NERClient(transport=httpx.MockTransport(_batch_handler(requests))) as client:
+        results = list(client.stream_batch(texts, chunk_size=10, concurrency=3))
+
+    assert [result["entities"][0]["text"] for result in results] == [f"text {i}" for i in range(25)]
+    assert sorted(len(json.loads(r.content)["texts"]) for r in requests) == [5, 10, 10]
+
+
+@pytest.mark.asyncio
+async def test_async_client_against_service(rule_model_path, monkeypatch):
+    """Test the async client coalesces concurrent calls into the service's batch endpoint"""
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+    async with AsyncNERClient("http://test", transport=httpx.ASGITransport(app=main.app), batch_wait_ms=20) as client:
+        texts = ["Steve Jobs", "Google", "nothing", "Apple Inc. in Cupertino"] * 3
+        results = await asyncio.gather(*(client.extract(text) for text in texts))
+        context = await client.extract("Steve Jobs", include_context=True)
+        streamed = [result async for result in client.stream_batch(texts, chunk_size=5)]
+
+    assert [result["entity_count"] for result in results] == [1, 1, 0, 2] * 3
+    assert results[3]["entities"][1] == {"text": "Cupertino", "label": "GPE", "start": 14, "end": 23,
+                                         "label_description": None}
+    assert context["entity_types"] == ["PERSON"]
+    assert streamed == results
+    assert client.stats()["coalesced_batches"] == 1
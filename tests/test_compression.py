@@ -0,0 +1,92 @@
+"""
+Tests for response compression and the no-echo option
+"""
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ner_service.compression import negotiate_encoding
+
+TEXT = "Apple Inc. was founded by Steve Jobs in Cupertino, California. " * 40
+
+
+def test_negotiate_encoding():
+    """Test q-values, wildcards and server preference"""
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("br") is None
+    assert negotiate_encoding("gzip;q=0.5, zstd;q=0", ["zstd", "gzip"]) == "gzip"
+    assert negotiate_encoding("gzip, zstd", ["zstd", "gzip"]) == "zstd"
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+
+
+@pytest.fixture
+def client(rule_model_path, monkeypatch):
+    from src.ner_service import main
+
+    monkeypatch.setattr(main, "ner_model", main.NERModel(custom_model_path=rule_model_path))
+    return TestClient(main.app)
+
+
+def test_large_responses_are_gzipped(client):
+    """Test responses above the threshold are compressed and all of them vary on the encoding"""
+    with client.stream("POST", "/extract", json={"text": TEXT, "include_context": True},
+                       headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert b'"entity_count":160' in gzip.decompress(raw)
+
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    small = client.post("/extract", json={"text": "Google"}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+    plain = client.post("/extract", json={"text": TEXT}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert client.get("/metrics").json()["compression"]["encodings"]["gzip"]["responses"] >= 1
+
+
+def test_include_text_false_omits_echoes(client):
+    """Test input text and entity surface strings are left out on request"""
+    context = client.post("/extract", json={"text": TEXT, "include_context": True, "include_text": False}).json()
+    batch = client.post("/extract/batch", json={"texts": ["Steve Jobs"], "include_text": False}).json()
+
+    assert "text" not in context
+    assert "text" not in context["entities"][0]
+    assert (context["entities"][0]["start"], context["entities"][0]["end"]) == (0, 10)
+    assert batch["results"][0]["entities"] == [
+        {"label": "PERSON", "start": 0, "end": 10, "label_description": None}
+    ]
+
+
+def test_streaming_and_binary_responses_pass_through():
+    """Test streamed and non-text bodies are forwarded as sent, without buffering"""
+    import asyncio
+
+    from src.ner_service.compression import CompressionMiddleware
+
+    async def app(scope, receive, send):
+        content_type = b"application/json" if scope["path"] == "/stream" else b"application/octet-stream"
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": b"x" * 4096, "more_body": True})
+        await send({"type": "http.response.body", "body": b"x" * 4096})
+
+    async def request(middleware, path):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "path": path, "headers": [(b"accept-encoding", b"gzip")]}
+        await middleware(scope, None, send)
+        return sent
+
+    middleware = CompressionMiddleware(app)
+    for path in ("/stream", "/binary"):
+        sent = asyncio.run(request(middleware, path))
+        assert [message.get("more_body", False) for message in sent[1:]] == [True, False]
+        assert b"content-encoding" not in dict(sent[0]["headers"])
+    assert middleware.stats.stats()["encodings"] == {"identity": {"responses": 2, "bytes_in": 16384, "bytes_out": 16384}}
@@ -0,0 +1,93 @@
+"""
+Tests for the sharded DocBin corpus builder
+"""
+
+import importlib
+import io
+import json
+import os
+
+import spacy
+
+from src.training.corpus import build_corpus, iter_docs, iter_json_array
+
+RECORDS = [
+    [f"Company{i} hired Person{i} in Paris.", {"entities": [[0, len(f"Company{i}"), "ORG"], [100, 120, "GPE"]]}]
+    for i in range(60)
+]
+
+
+def test_iter_json_array_streams_small_buffers():
+    """Test elements are decoded across buffer boundaries"""
+    data = [[1234567, {"a": "x" * 10}], "tail", 42]
+    assert list(iter_json_array(io.StringIO(json.dumps(data)), buffer_size=3)) == data
+
+
+def test_iter_json_array_numbers_cut_at_any_boundary():
+    """Test numbers, literals and nested values split by every small buffer size decode whole"""
+    data = [1.5, -2e-3, 1234567, "a, b]", {"x": [0.25, 22]}, True, None, [[]]]
+    text = "[ " + " ,\n ".join(json.dumps(value) for value in data) + " ]"
+    for buffer_size in range(1, 12):
+        assert list(iter_json_array(io.StringIO(text), buffer_size=buffer_size)) == data
+
+
+def test_build_corpus_shards_and_manifest(tmp_path):
+    """Test docs, entities and dropped spans are recorded and shards are capped"""
+    source = tmp_path / "train.json"
+    source.write_text(json.dumps(RECORDS), encoding="utf8")
+
+    manifest = build_corpus(str(source), str(tmp_path / "out"), workers=1, chunk_size=8, max_shard_bytes=2000)
+
+    assert manifest["totals"]["docs"] == 60
+    assert manifest["totals"]["entities"] == 60
+    assert manifest["totals"]["dropped_spans"] == 60
+    assert all(shard["bytes"] <= 2000 for entry in manifest["chunks"] for shard in entry["shards"])
+    docs = list(iter_docs(str(tmp_path / "out"), spacy.blank("en").vocab))
+    assert [doc.text for doc in docs] == [text for text, _ in RECORDS]
+    assert docs[5].ents[0].text == "Company5"
+
+
+def test_rebuild_only_converts_changed_chunks(tmp_path):
+    """Test an edited JSONL record leaves other chunks untouched"""
+    source = tmp_path / "train.jsonl"
+    source.write_text("\n".join(json.dumps(record) for record in RECORDS), encoding="utf8")
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "train.spacy").write_bytes(b"unrelated corpus")
+    first = build_corpus(str(source), str(tmp_path / "out"), workers=2, chunk_size=8)
+
+    edited = list(RECORDS)
+    edited[30] = ["Something else entirely.", {"entities": []}]
+    source.write_text("\n".join(json.dumps(record) for record in edited), encoding="utf8")
+    second = build_corpus(str(source), str(tmp_path / "out"), workers=2, chunk_size=8)
+
+    assert first["build"]["converted"] == first["build"]["chunks"] > 2
+    assert 1 <= second["build"]["converted"] <= 2
+    assert second["build"]["reused"] == second["build"]["chunks"] - second["build"]["converted"]
+    assert len(list((tmp_path / "out").glob("*.spacy"))) == second["totals"]["shards"] + 1
+    assert (tmp_path / "out" / "train.spacy").read_bytes() == b"unrelated corpus"
+
+
+def test_default_workers_follow_cpu_quota(tmp_path, monkeypatch):
+    """Test the builder defaults to the container's CPU quota rather than every CPU of the host"""
+    source = tmp_path / "train.json"
+    source.write_text(json.dumps(RECORDS[:8]), encoding="utf8")
+    cpus = importlib.import_module("ner_service.cpus")
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.setattr(cpus, "_read", lambda path: "100000 100000" if path.endswith("cpu.max") else None)
+
+    assert build_corpus(str(source), str(tmp_path / "out"), chunk_size=8)["build"]["workers"] == 1
+
+
+def test_repeated_chunks_get_their_own_shards(tmp_path):
+    """Test identical chunks are written, counted and reused separately"""
+    source = tmp_path / "train.jsonl"
+    source.write_text("\n".join(json.dumps(record) for record in RECORDS[:2] + RECORDS[:1] * 2), encoding="utf8")
+
+    first = build_corpus(str(source), str(tmp_path / "out"), workers=2, chunk_size=1)
+    paths = [shard["path"] for entry in first["chunks"] for shard in entry["shards"]]
+
+    assert first["totals"]["docs"] == 4 and first["totals"]["shards"] == 4
+    assert len(set(paths)) == 4 and len(list((tmp_path / "out").glob("*.spacy"))) == 4
+    docs = list(iter_docs(str(tmp_path / "out"), spacy.blank("en").vocab))
+    assert [doc.text for doc in docs] == [RECORDS[0][0], RECORDS[1][0], RECORDS[0][0], RECORDS[0][0]]
+    assert build_corpus(str(source), str(tmp_path / "out"), workers=1, chunk_size=1)["build"]["reused"] == 4
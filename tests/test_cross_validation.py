@@ -0,0 +1,55 @@
+"""
+Tests for parallel k-fold cross-validation
+"""
+
+import importlib
+import os
+
+import pytest
+
+from src.training.cross_validation import kfold_splits
+from src.training.train_ner import NERTrainer, create_sample_training_data
+
+
+def test_kfold_splits_partition_records():
+    """Test every record is held out exactly once and never trained on in its own fold"""
+    splits = kfold_splits(11, 3, seed=4)
+
+    held_out = sorted(index for _, test in splits for index in test)
+    assert held_out == list(range(11))
+    assert sorted(len(test) for _, test in splits) == [3, 4, 4]
+    for train, test in splits:
+        assert not set(train) & set(test) and len(train) + len(test) == 11
+    assert kfold_splits(11, 3, seed=4) == splits
+    with pytest.raises(ValueError):
+        kfold_splits(3, 4)
+
+
+def test_parallel_folds_match_serial_run(tmp_path):
+    """Test folds trained in worker processes score as when run inline, with aggregated statistics"""
+    data = create_sample_training_data() * 2
+    trainer = NERTrainer(base_model="blank_model_for_tests", new_labels=["ORG", "PERSON", "GPE"])
+
+    parallel = trainer.cross_validate(data, k=3, workers=2, n_iter=2, seed=3, output_dir=str(tmp_path / "cv"))
+    serial = trainer.cross_validate(data, k=3, workers=1, n_iter=2, seed=3)
+
+    assert parallel["workers"] == 2 and serial["workers"] == 1
+    assert [fold["overall"] for fold in parallel["folds"]] == [fold["overall"] for fold in serial["folds"]]
+    assert parallel["per_label"] == serial["per_label"]
+    assert (tmp_path / "cv" / "fold-2" / "meta.json").is_file()
+    f_scores = [fold["overall"]["f"] for fold in parallel["folds"]]
+    assert parallel["overall"]["f"]["mean"] == pytest.approx(sum(f_scores) / 3)
+    assert set(parallel["per_label"]["ORG"]) == {"folds", "p", "r", "f"}
+    timing = parallel["timing"]
+    assert timing["serial_seconds"] == pytest.approx(sum(fold["seconds"] for fold in parallel["folds"]))
+    assert timing["saved_seconds"] >= 0
+
+
+def test_default_workers_follow_cpu_quota(monkeypatch):
+    """Test folds default to the container's CPU quota rather than every CPU in the affinity mask"""
+    trainer = NERTrainer(base_model="blank_model_for_tests", new_labels=["ORG", "PERSON", "GPE"])
+    cpus = importlib.import_module("ner_service.cpus")
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.setattr(cpus, "_read", lambda path: "100000 100000" if path.endswith("cpu.max") else None)
+
+    assert trainer.cross_validate(create_sample_training_data(), k=3, n_iter=1)["workers"] == 1
@@ -0,0 +1,77 @@
+"""
+Tests for near-duplicate detection in training corpora
+"""
+
+import json
+
+import numpy
+
+from src.training.corpus import iter_records
+from src.training.dedup import MinHasher, NearDuplicateIndex, deduplicate, lsh_params
+
+BASE = [f"Company{i} opened an office in City{i} with {i * 7} employees last spring." for i in range(50)]
+
+
+def _write(path, records):
+    path.write_text(json.dumps(records), encoding="utf8")
+    return str(path)
+
+
+def test_minhash_estimates_similarity():
+    """Test near-identical texts agree on most signature values and unrelated ones do not"""
+    hasher = MinHasher(num_perm=256)
+    a, b, c = hasher.signatures([BASE[0], BASE[0].upper() + " Really.", "Nothing like the training data at all."])
+
+    assert (a == b).mean() > 0.7
+    assert (a == c).mean() < 0.2
+    assert (hasher.signature(BASE[0]) == a).all()
+    # A text longer than a chunk of shingles gets the same signature in pieces
+    long_text = " ".join(BASE)
+    chunked = MinHasher(num_perm=256, chunk_shingles=7).signatures([BASE[1], long_text, BASE[2]])
+    assert (chunked == hasher.signatures([BASE[1], long_text, BASE[2]])).all()
+    bands, rows = lsh_params(0.8, 128)
+    assert bands * rows <= 128 and 1 - (1 - 0.8 ** rows) ** bands >= 0.95
+
+
+def test_index_clusters_near_duplicates(tmp_path):
+    """Test variants of one record form a cluster rooted at its first occurrence"""
+    records = [[text, {"entities": []}] for text in BASE] + [[BASE[3] + "!", {"entities": []}], [BASE[3], {"entities": []}]]
+    index = NearDuplicateIndex(work_dir=str(tmp_path / "work")).build([_write(tmp_path / "train.json", records)])
+
+    assert [list(group) for group in index.clusters()] == [[3, 50, 51]]
+    assert index.roots[51] == 3
+
+
+def test_index_compares_every_pair_in_a_bucket(tmp_path):
+    """Test bucket members similar to each other but not to the first member are merged"""
+    rng = numpy.random.default_rng(0)
+    head, member = rng.integers(0, 2 ** 32, size=(2, 128), dtype=numpy.uint32)
+    variant = member.copy()
+    variant[:10] += 1
+    index = NearDuplicateIndex(work_dir=str(tmp_path / "work"))
+    parent = numpy.arange(4)
+
+    index._union_similar(parent, numpy.arange(4), numpy.stack([head, member, variant, member]))
+
+    assert list(parent) == [0, 1, 1, 1]
+
+
+def test_deduplicate_writes_corpus_and_leakage_report(tmp_path):
+    """Test duplicates and leaked records are dropped and reported, dev is only read"""
+    train = [[text, {"entities": [[0, text.index(" "), "ORG"]]}] for text in BASE]
+    train.append([BASE[10].replace("spring", "spring!"), {"entities": [[0, 9, "PERSON"]]}])
+    dev = [[BASE[20].lower(), {"entities": []}], ["Nothing like the training data at all.", {"entities": []}]]
+
+    report = deduplicate(
+        _write(tmp_path / "train.json", train), str(tmp_path / "out.jsonl"), [_write(tmp_path / "dev.json", dev)]
+    )
+
+    kept = [text for text, _ in iter_records(str(tmp_path / "out.jsonl"))]
+    assert kept == [text for i, text in enumerate(BASE) if i != 20]
+    assert report["train"]["removed_duplicates"] == 1
+    assert report["train"]["removed_leaked"] == 1
+    assert report["train"]["annotation_mismatches"] == 1
+    leakage = report["leakage"][str(tmp_path / "dev.json")]
+    assert (leakage["leaked"], leakage["records"]) == (1, 2)
+    assert leakage["examples"] == [{"eval_text": BASE[20].lower(), "train_text": BASE[20]}]
+    assert report["clusters"][0]["size"] == 2
@@ -0,0 +1,88 @@
+"""
+Tests for the entity inverted index
+"""
+
+import random
+
+import pytest
+from src.ner_service.entity_index import EntityIndex, EntityIndexWriter, merge_segments
+from src.ner_service.ner_model import NERModel
+
+
+def _entities(*mentions):
+    return [{"text": text, "label": label, "start": start, "end": start + len(text)} for text, label, start in mentions]
+
+
+def test_queries_across_segments_and_after_merge(tmp_path):
+    """Test lookups, label and prefix queries, conjunctions and offsets before and after merging"""
+    with EntityIndexWriter(tmp_path / "index", segment_size=2) as writer:
+        writer.add("a", _entities(("Steve Jobs", "PERSON", 0), ("Apple", "ORG", 20)))
+        writer.add("b", _entities(("Apple", "ORG", 0)))
+        writer.add("c", [])
+    with EntityIndexWriter(tmp_path / "index") as writer:
+        writer.add_results([{"entities": _entities(("steve  JOBS", "PERSON", 5), ("Apple Inc.", "ORG", 30),
+                                                   ("Apple", "ORG", 50))}])
+
+    for merged in (False, True):
+        if merged:
+            assert len(merge_segments(tmp_path / "index")["segments"]) == 1
+        index = EntityIndex(tmp_path / "index")
+        assert (len(index), index.stats()["segments"]) == (4, 1 if merged else 3)
+        assert index.search(("PERSON", "Steve Jobs"), ("ORG", "apple")) == ["a", "3"]
+        assert index.search(("ORG", "APPLE"), limit=2) == ["a", "b"]
+        assert index.search(("ORG", None)) == ["a", "b", "3"]
+        assert index.search(("PERSON", None), ("ORG", "Google")) == []
+        assert index.count(("ORG", "apple inc")) == 0
+        assert index.count(("ORG", "apple inc"), prefix=True) == 1
+        assert index.search(("ORG", "apple"), ("PERSON", "steve jobs"), offsets=True)[1] == {"id": "3", "mentions": [
+            {"label": "PERSON", "text": "steve jobs", "start": 5, "end": 16},
+            {"label": "ORG", "text": "apple", "start": 50, "end": 55}
+        ]}
+        assert index.search(("ORG", "apple"), prefix=True, offsets=True)[2]["mentions"] == [
+            {"label": "ORG", "text": "apple inc.", "start": 30, "end": 40},
+            {"label": "ORG", "text": "apple", "start": 50, "end": 55}
+        ]
+        index.close()
+
+    with pytest.raises(ValueError):
+        EntityIndex(tmp_path)
+
+
+def test_conjunctions_match_a_scan(tmp_path):
+    """Test conjunctive queries return exactly the documents a full scan finds, in order"""
+    rng = random.Random(0)
+    names = {"PERSON": ["ann", "bob", "cy"], "ORG": ["acme", "apex", "zed corp"], "GPE": ["oslo", "rome"]}
+    documents = []
+    with EntityIndexWriter(tmp_path / "index", segment_size=37) as writer:
+        for i in range(300):
+            mentions = [(rng.choice(names[label]), label, 10 * j)
+                        for j, label in enumerate(rng.choices(list(names), k=rng.randint(0, 5)))]
+            documents.append({(label, text) for text, label, _ in mentions})
+            writer.add(f"doc{i}", _entities(*mentions))
+    merge_segments(tmp_path / "index", max_segments=4)
+
+    index = EntityIndex(tmp_path / "index")
+    assert index.stats()["segments"] == 4
+    for queries in ([("PERSON", "ann")], [("PERSON", "bob"), ("ORG", "acme")],
+                    [("PERSON", "cy"), ("GPE", "rome"), ("ORG", "zed corp")], [("ORG", "apex"), ("GPE", None)]):
+        expected = [f"doc{i}" for i, terms in enumerate(documents)
+                    if all(any(label == l and text in (None, t) for l, t in terms) for label, text in queries)]
+        assert index.search(*queries) == expected
+        assert index.count(*queries) == len(expected)
+    index.close()
+
+
+def test_index_model_results(rule_model_path, tmp_path):
+    """Test batch extraction results are indexed with their offsets"""
+    model = NERModel(custom_model_path=rule_model_path)
+    texts = ["Apple Inc. hired Steve Jobs.", "Google is in California.", "Steve Jobs visited Cupertino."]
+    with EntityIndexWriter(tmp_path / "index") as writer:
+        writer.add_results(model.batch_extract_entities(texts), doc_ids=["x", "y", "z"])
+
+    index = EntityIndex(tmp_path / "index")
+    assert index.search(("PERSON", "steve jobs")) == ["x", "z"]
+    assert index.search(("GPE", None), ("PERSON", "Steve Jobs"), offsets=True) == [{"id": "z", "mentions": [
+        {"label": "PERSON", "text": "steve jobs", "start": 0, "end": 10},
+        {"label": "GPE", "text": "cupertino", "start": 19, "end": 28}
+    ]}]
+    index.close()
@@ -0,0 +1,79 @@
+"""
+Tests for the packed model format
+"""
+
+import numpy
+import pytest
+import spacy
+import srsly
+import thinc
+from spacy.training import Example
+
+from src.ner_service.fast_load import is_packed, load_packed, pack_model
+from src.ner_service.ner_model import NERModel
+
+TEXT = "Apple Inc. was founded by Steve Jobs in Cupertino, California."
+
+
+def _entities(nlp, text):
+    return [(ent.text, ent.label_, ent.start_char, ent.end_char) for ent in nlp(text).ents]
+
+
+def test_rule_model_round_trip(rule_model_path, tmp_path):
+    """Test a packed rule-based pipeline tokenizes and extracts as the original"""
+    packed = tmp_path / "rule.nerpack"
+    pack_model(rule_model_path, str(packed))
+    original, loaded = spacy.load(rule_model_path), load_packed(str(packed))
+
+    assert is_packed(str(packed)) and not is_packed(rule_model_path)
+    assert loaded.pipe_names == original.pipe_names
+    assert [t.text for t in loaded("Don't stop, U.S.A.!")] == [t.text for t in original("Don't stop, U.S.A.!")]
+    assert _entities(loaded, TEXT) == _entities(original, TEXT)
+
+
+def test_statistical_model_maps_weights(tmp_path):
+    """Test a trained pipeline gives identical predictions with weights mapped from the file"""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("ner")
+    examples = [Example.from_dict(nlp.make_doc(TEXT), {"entities": [(0, 10, "ORG"), (26, 36, "PERSON")]})]
+    optimizer = nlp.initialize(lambda: examples)
+    for _ in range(5):
+        nlp.update(examples, sgd=optimizer)
+
+    packed = tmp_path / "ner.nerpack"
+    pack_model(nlp, str(packed))
+    loaded = load_packed(str(packed))
+
+    texts = [TEXT, "Google hired someone in California."]
+    assert [_entities(loaded, text) for text in texts] == [_entities(nlp, text) for text in texts]
+    params = [node.get_param(name) for node in loaded.get_pipe("ner").model.walk()
+              for name in node.param_names if node.has_param(name)]
+    assert params and all(isinstance(p, numpy.ndarray) and not p.flags.owndata for p in params)
+
+
+def test_ner_model_loads_packed_file(rule_model_path, tmp_path):
+    """Test NERModel accepts a packed file as custom model path"""
+    packed = tmp_path / "model.nerpack"
+    pack_model(rule_model_path, str(packed))
+    model = NERModel(custom_model_path=str(packed))
+
+    assert [ent["label"] for ent in model.extract_entities(TEXT)] == ["ORG", "PERSON", "GPE", "GPE"]
+
+
+def test_rejects_foreign_files(tmp_path, rule_model_path):
+    """Test files without the magic or from other spaCy, thinc or srsly versions are refused"""
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a packed model")
+    with pytest.raises(ValueError):
+        load_packed(str(other))
+
+    packed = tmp_path / "rule.nerpack"
+    pack_model(rule_model_path, str(packed))
+    data = packed.read_bytes()
+    for library in (spacy, thinc, srsly):
+        # Same length, so the header size stays valid
+        version = f'"{library.__name__}": "{library.__version__}"'.encode()
+        other_version = version[:-2] + (b"8" if version[-2:-1] == b"9" else b"9") + b'"'
+        packed.write_bytes(data.replace(version, other_version, 1))
+        with pytest.raises(ValueError, match=f"{library.__name__} .*re-pack"):
+            load_packed(str(packed))
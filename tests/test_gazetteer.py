@@ -0,0 +1,132 @@
+"""
+Tests for gazetteer compilation and the entity ruler fast path
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+import spacy
+from spacy.strings import hash_string
+from src.ner_service.gazetteer import KEY_HASH, Gazetteer, compile_gazetteer, read_terms
+from src.ner_service.ner_model import NERModel
+
+
+TERMS = [
+    ("Apple", "COMPANY"),
+    ("Cupertino", "CITY"),
+    ("Tim Cook", "PERSON"),
+]
+
+
+@pytest.fixture
+def gazetteer_dir(tmp_path):
+    """Compiled gazetteer directory"""
+    compile_gazetteer(TERMS, spacy.blank("en"), output_dir=tmp_path / "gazetteer")
+    return str(tmp_path / "gazetteer")
+
+
+def test_compile_and_reload(gazetteer_dir):
+    """Test a compiled gazetteer round-trips through disk and bytes"""
+    gazetteer = Gazetteer().from_disk(gazetteer_dir)
+
+    assert len(gazetteer) == 3
+    assert gazetteer.labels == ["CITY", "COMPANY", "PERSON"]
+    assert gazetteer.attr == "LOWER"
+
+    restored = Gazetteer().from_bytes(gazetteer.to_bytes())
+    doc = restored(spacy.blank("en")("TIM COOK visited Cupertino"))
+    assert [(ent.text, ent.label_) for ent in doc.ents] == [("TIM COOK", "PERSON"), ("Cupertino", "CITY")]
+
+
+def test_table_uses_stable_hash(gazetteer_dir):
+    """Test term keys are hashed independently of the interpreter and other hashes are refused"""
+    meta_path = Path(gazetteer_dir) / Gazetteer.META_FILE
+    meta = json.loads(meta_path.read_text())
+    assert meta["hash"] == KEY_HASH
+
+    gazetteer = Gazetteer().from_disk(gazetteer_dir)
+    keys = spacy.blank("en")("Tim Cook").to_array("LOWER").tolist()
+    assert gazetteer._table[hash_string(" ".join(map(str, keys)))] == gazetteer.label_names.index("PERSON")
+
+    del meta["hash"]
+    meta["hash_bits"] = 64
+    meta_path.write_text(json.dumps(meta))
+    with pytest.raises(ValueError):
+        Gazetteer().from_disk(gazetteer_dir)
+
+
+def test_longest_match():
+    """Test the longest term wins when terms share a prefix"""
+    nlp = spacy.blank("en")
+    gazetteer = compile_gazetteer([("New York", "GPE"), ("New York Times", "ORG")], nlp)
+
+    spans = gazetteer.match(nlp("I read the New York Times in New York"))
+    assert [(span.text, span.label_) for span in spans] == [("New York Times", "ORG"), ("New York", "GPE")]
+
+
+def test_read_terms_formats(tmp_path):
+    """Test JSONL and tab-separated term files"""
+    jsonl = tmp_path / "terms.jsonl"
+    jsonl.write_text('{"label": "ORG", "pattern": "Apple"}\n{"label": "ORG", "pattern": [{"LOWER": "x"}]}\n')
+    tsv = tmp_path / "terms.tsv"
+    tsv.write_text("Steve Jobs\tPERSON\n\n")
+
+    assert list(read_terms(jsonl)) == [("Apple", "ORG")]
+    assert list(read_terms(tsv)) == [("Steve Jobs", "PERSON")]
+
+
+def test_model_precedence(rule_model_path, gazetteer_dir):
+    """Test the statistical model wins on overlaps by default"""
+    model = NERModel(custom_model_path=rule_model_path, gazetteer_path=gazetteer_dir)
+    entities = model.extract_entities("Apple Inc. hired Tim Cook in Cupertino.")
+    labels = {ent["text"]: ent["label"] for ent in entities}
+
+    assert labels["Apple Inc."] == "ORG"
+    assert labels["Tim Cook"] == "PERSON"
+    assert labels["Cupertino"] == "GPE"
+
+
+def test_gazetteer_precedence(rule_model_path, gazetteer_dir):
+    """Test the gazetteer wins on overlaps when configured"""
+    model = NERModel(
+        custom_model_path=rule_model_path,
+        gazetteer_path=gazetteer_dir,
+        gazetteer_precedence="gazetteer"
+    )
+    entities = model.extract_entities("Tim Cook lives in Cupertino.")
+    labels = {ent["text"]: ent["label"] for ent in entities}
+
+    assert labels["Cupertino"] == "CITY"
+
+
+def test_ruler_only(rule_model_path, gazetteer_dir):
+    """Test ruler-only mode returns only gazetteer matches"""
+    model = NERModel(custom_model_path=rule_model_path, gazetteer_path=gazetteer_dir, ruler_only=True)
+
+    entities = model.extract_entities("Steve Jobs founded apple in Cupertino.")
+    assert [(ent["text"], ent["label"]) for ent in entities] == [("apple", "COMPANY"), ("Cupertino", "CITY")]
+
+    results = model.batch_extract_entities(["Steve Jobs", "Tim Cook"], ruler_only=False)
+    assert results[0]["entities"][0]["label"] == "PERSON"
+
+
+def test_ruler_only_requires_gazetteer(rule_model_path):
+    """Test ruler-only mode without a gazetteer is rejected"""
+    model = NERModel(custom_model_path=rule_model_path)
+
+    with pytest.raises(ValueError):
+        model.extract_entities("Steve Jobs", ruler_only=True)
+
+
+@pytest.mark.asyncio
+async def test_api_ruler_only_without_gazetteer(rule_model_path, monkeypatch):
+    """Test the API rejects ruler-only requests when no gazetteer is configured"""
+    from httpx import AsyncClient, ASGITransport
+    from src.ner_service import main
+
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/extract", json={"text": "Steve Jobs", "ruler_only": True})
+        assert response.status_code == 400
@@ -0,0 +1,164 @@
+"""
+Tests for incremental re-extraction
+"""
+
+import re
+
+from fastapi.testclient import TestClient
+
+from src.ner_service.incremental import IncrementalExtractor, split_segments
+from src.ner_service.ner_model import NERModel
+
+PARAGRAPHS = [
+    "Apple Inc. was founded by Steve Jobs.",
+    "The weather was mild that year.",
+    "Its headquarters are in Cupertino, California."
+]
+
+
+def test_split_segments_covers_text():
+    """Test segments are contiguous and long paragraphs are split at sentences"""
+    text = "\n\n".join(PARAGRAPHS) + "\n\n" + "Short one. " * 50
+    segments = split_segments(text, max_segment_chars=200)
+
+    assert segments[0][0] == 0 and segments[-1][1] == len(text)
+    assert all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
+    assert all(end - start <= 200 for start, end in segments)
+    assert len(segments) > len(PARAGRAPHS) + 1
+
+
+def test_only_changed_segments_rerun(rule_model_path):
+    """Test an edit re-runs one segment and shifts later entities"""
+    extractor = IncrementalExtractor(NERModel(custom_model_path=rule_model_path), context_chars=16)
+    first = extractor.extract("doc", "\n\n".join(PARAGRAPHS))
+    assert first["reprocessed_segments"] == 3
+
+    edited = "\n\n".join([PARAGRAPHS[0], "The weather was unusually mild that year.", PARAGRAPHS[2]])
+    second = extractor.extract("doc", edited)
+
+    assert second["segments"] == 3
+    assert second["reprocessed_segments"] == 1
+    assert [(ent["text"], ent["label"]) for ent in second["entities"]] == [
+        ("Apple Inc.", "ORG"), ("Steve Jobs", "PERSON"), ("Cupertino", "GPE"), ("California", "GPE")
+    ]
+    for ent in second["entities"]:
+        assert edited[ent["start"]:ent["end"]] == ent["text"]
+    assert extractor.stats()["segments_reprocessed"] == 4
+
+
+class _SaintModel:
+    """Stand-in model that finds "St. John", a name a sentence split cuts in two"""
+
+    pattern = r"St\. John"
+
+    def __init__(self):
+        self.calls = []
+
+    def batch_extract_entities(self, texts, ruler_only=None):
+        self.calls.append((texts, ruler_only))
+        return [{"text": text, "entities": [
+            {"text": m.group(), "label": "FAC", "start": m.start(), "end": m.end()}
+            for m in re.finditer(self.pattern, text)
+        ]} for text in texts]
+
+
+def test_entities_crossing_segment_boundaries(rule_model_path):
+    """Test names cut by a sentence split are kept, also when an edit touches either side"""
+    model = _SaintModel()
+    extractor = IncrementalExtractor(model, context_chars=8, max_segment_chars=40)
+    sentences = ["We met at the church of St. ", "John in the old city. ", "Then we had lunch near the port."]
+    text = "".join(sentences)
+    assert len(split_segments(text, 40)) == 3
+
+    def names(result, text):
+        return [text[ent["start"]:ent["end"]] for ent in result["entities"]]
+
+    assert names(extractor.extract("doc", text), text) == ["St. John"]
+
+    # Edits after the name, of the segment holding its second half, and of its first half
+    sentences[2] = "Then we had a long lunch near the port."
+    edited = "".join(sentences)
+    result = extractor.extract("doc", edited)
+    assert names(result, edited) == ["St. John"] and result["reprocessed_segments"] == 1
+
+    sentences[1] = "John in the new city. "
+    edited = "".join(sentences)
+    result = extractor.extract("doc", edited)
+    assert names(result, edited) == ["St. John"] and result["reprocessed_segments"] == 2
+
+    sentences[0] = "We met at the chapel of St. "
+    edited = "".join(sentences)
+    result = extractor.extract("doc", edited)
+    assert names(result, edited) == ["St. John"] and result["reprocessed_segments"] == 2
+
+    result = extractor.extract("doc", edited, ruler_only=True)
+    assert names(result, edited) == ["St. John"] and result["reprocessed_segments"] == 3
+    assert model.calls[-1][1] is True
+
+
+class _DoctorModel(_SaintModel):
+    """Stand-in model that finds doctors' names"""
+
+    pattern = r"Dr\. [A-Z]\w+"
+
+
+def test_repeated_segments_keep_their_own_entities():
+    """Test identical segments followed by different text do not share cached entities"""
+    extractor = IncrementalExtractor(_DoctorModel(), context_chars=8, max_segment_chars=20)
+    text = "Please call Dr. Smith tomorrow morning ok. Please call Dr. Jones tomorrow morning ok."
+    segments = split_segments(text, 20)
+    assert text[slice(*segments[0])] == text[slice(*segments[2])]
+
+    def names(result, text):
+        assert all(ent["end"] <= len(text) for ent in result["entities"])
+        return [(text[ent["start"]:ent["end"]], ent["text"]) for ent in result["entities"]]
+
+    expected = [("Dr. Smith", "Dr. Smith"), ("Dr. Jones", "Dr. Jones")]
+    assert names(extractor.extract("doc", text), text) == expected
+    result = extractor.extract("doc", text)
+    assert names(result, text) == expected and result["reprocessed_segments"] == 0
+
+    edited = text.replace("Jones", "Brown")
+    result = extractor.extract("doc", edited)
+    assert names(result, edited) == [("Dr. Smith", "Dr. Smith"), ("Dr. Brown", "Dr. Brown")]
+    assert result["reprocessed_segments"] == 2
+
+    # The repeated segment is the last one, so a replayed crossing entity would run past the text
+    tail = text + " Please call Dr. "
+    result = extractor.extract("doc", tail)
+    assert names(result, tail) == expected
+
+
+def test_documents_are_evicted(rule_model_path):
+    """Test the cache is bounded and keyed by document id"""
+    extractor = IncrementalExtractor(NERModel(custom_model_path=rule_model_path), max_documents=1)
+    extractor.extract("a", PARAGRAPHS[0])
+    extractor.extract("b", PARAGRAPHS[0])
+
+    assert extractor.extract("a", PARAGRAPHS[0])["reprocessed_segments"] == 1
+    assert extractor.stats()["documents"] == 1
+    assert extractor.forget("a") is True
+
+
+def test_incremental_endpoint(rule_model_path, monkeypatch):
+    """Test the incremental endpoint reuses cached segments"""
+    from src.ner_service import main
+
+    monkeypatch.setattr(main, "ner_model", main.NERModel(custom_model_path=rule_model_path))
+    monkeypatch.setattr(main, "incremental", None)
+    client = TestClient(main.app)
+
+    body = {"document_id": "doc", "text": "\n\n".join(PARAGRAPHS)}
+    assert client.post("/extract/incremental", json=body).json()["reprocessed_segments"] == 3
+    response = client.post("/extract/incremental", json=body)
+
+    assert response.status_code == 200
+    assert response.json()["reprocessed_segments"] == 0
+    assert response.json()["entity_count"] == 4
+    assert client.get("/metrics").json()["incremental"]["documents"] == 1
+
+    body.update(include_text=False)
+    entity = client.post("/extract/incremental", json=body).json()["entities"][0]
+    assert entity == {"label": "ORG", "start": 0, "end": 10, "label_description": None}
+    body.update(ruler_only=True)
+    assert client.post("/extract/incremental", json=body).status_code == 400
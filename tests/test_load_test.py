@@ -0,0 +1,88 @@
+"""
+Tests for the load-test script's SLO checks, saturation detection and open-loop timing
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "load_test.py"
+spec = importlib.util.spec_from_file_location("load_test", SCRIPT)
+load_test = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(load_test)
+
+
+def test_parse_slos():
+    """Test scenario prefixes default to all and malformed SLOs are rejected"""
+    slos = load_test.parse_slos(["p99_ms=500", "extract.p95_ms=200", "throughput_rps=20.5"])
+    assert slos == {("all", "p99_ms"): 500.0, ("extract", "p95_ms"): 200.0, ("all", "throughput_rps"): 20.5}
+
+    for bad in ["p99=500", "search.p99_ms=500", "p99_ms", "p99_ms=fast", "error_rate=-1", "p99_ms=nan"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            load_test.parse_slos([bad])
+
+
+def test_check_slos():
+    """Test maxima and minima are checked against a known histogram"""
+    results = load_test.Results()
+    results.seconds = 10.0
+    for ms in range(1, 101):
+        results.record("extract", 200, float(ms))
+    results.record("extract", 503, 1.0)
+    report = results.summary()
+
+    assert load_test.check_slos(report, load_test.parse_slos(["p50_ms=60", "throughput_rps=10", "error_rate=0.01"])) == []
+    violations = load_test.check_slos(report, load_test.parse_slos([
+        "extract.p99_ms=50", "throughput_rps=20", "error_rate=0.001", "batch.p99_ms=1"
+    ]))
+    assert [violation.split(" =")[0] for violation in violations] == [
+        "extract.p99_ms", "all.throughput_rps", "all.error_rate"
+    ]
+
+
+def test_find_saturation():
+    """Test the knee is the first level gaining too little throughput or breaking an SLO"""
+    def steps(throughputs, failing=()):
+        return [
+            {"level": level, "report": {"all": {"throughput_rps": rps}}, "violations": ["x"] if level in failing else []}
+            for level, rps in zip([1, 2, 4, 8, 16], throughputs)
+        ]
+
+    assert load_test.find_saturation(steps([100, 190, 260, 270, 272]), knee=0.1) == 8
+    assert load_test.find_saturation(steps([100, 190, 260, 270, 272]), knee=0.01) == 16
+    assert load_test.find_saturation(steps([100, 200, 400, 800, 1600]), knee=0.1) is None
+    assert load_test.find_saturation(steps([100, 200, 400, 800, 1600], failing={4}), knee=0.1) == 4
+
+
+class _StallingClient:
+    """Client whose first request holds the event loop, so the arrivals during it are sent late"""
+
+    def __init__(self, stall: float):
+        self.stall = stall
+
+    async def request(self, method, path, json=None):
+        time.sleep(self.stall)
+        self.stall = 0.0
+        return type("Response", (), {"status_code": 200})()
+
+
+class _Workload:
+    def next(self):
+        return ("extract", "POST", "/extract", {"text": "Google"})
+
+
+def test_open_loop_measures_from_scheduled_arrival():
+    """Test arrivals delayed by a stall count the delay as latency (no coordinated omission)"""
+    results = asyncio.run(load_test.open_loop(
+        _StallingClient(0.25), _Workload(), rate=100, duration=0.5, warmup=0.0, max_in_flight=1000, seed=1
+    ))
+
+    stats = results.summary()["all"]
+    assert stats["requests"] >= 30
+    # Requests that were due during the 250 ms stall are only answered after
+    # it, so far more than the stalled request itself sees a long latency
+    assert stats["p95_ms"] > 100
@@ -0,0 +1,37 @@
+"""
+Tests for bounded StringStore growth
+"""
+
+import time
+
+from src.ner_service.ner_model import NERModel
+
+
+def _wait_for_rebuild(model, rebuilds, timeout=10.0):
+    deadline = time.time() + timeout
+    while model.rebuilds < rebuilds and time.time() < deadline:
+        time.sleep(0.05)
+
+
+def test_vocab_growth_triggers_rebuild(rule_model_path):
+    """Test unique request strings are dropped by rebuilding the pipeline"""
+    model = NERModel(custom_model_path=rule_model_path, max_vocab_growth=50)
+    baseline = len(model.nlp.vocab.strings)
+
+    model.batch_extract_entities([f"token{i} other{i}" for i in range(100)])
+    _wait_for_rebuild(model, 1)
+
+    assert model.rebuilds == 1
+    assert len(model.nlp.vocab.strings) == baseline
+    assert model.extract_entities("Steve Jobs")[0]["label"] == "PERSON"
+    assert model.vocab_stats()["max_growth"] == 50
+
+
+def test_unbounded_by_default(rule_model_path):
+    """Test no rebuild happens without a growth limit"""
+    model = NERModel(custom_model_path=rule_model_path)
+
+    model.batch_extract_entities([f"word{i}" for i in range(100)])
+
+    assert model.rebuilds == 0
+    assert model.vocab_growth >= 100
@@ -0,0 +1,39 @@
+"""
+Tests for the shared latency and accuracy metrics
+"""
+
+from src.ner_service.metrics import LatencyHistogram, f1
+
+
+def test_latency_histogram_percentiles():
+    """Test percentiles fall within one bucket of the true value"""
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(float(ms))
+
+    stats = histogram.stats()
+    assert stats["count"] == 100 and stats["max_ms"] == 100.0
+    assert 50 <= stats["p50_ms"] <= 55
+    assert 99 <= stats["p99_ms"] <= 100
+
+
+def test_latency_histogram_merge():
+    """Test merging matches recording every observation in one histogram"""
+    fast, slow, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for ms in range(1, 51):
+        fast.record(float(ms))
+        combined.record(float(ms))
+    for ms in range(51, 101):
+        slow.record(float(ms))
+        combined.record(float(ms))
+
+    fast.merge(slow)
+    assert fast.stats() == combined.stats()
+    assert fast.counts == combined.counts
+
+
+def test_f1():
+    """Test scores from match counts, with empty sides counted as perfect"""
+    assert f1(3, 4, 6) == {"precision": 0.75, "recall": 0.5, "f1": 0.6}
+    assert f1(0, 0, 0) == {"precision": 1.0, "recall": 1.0, "f1": 1.0}
+    assert f1(0, 2, 2)["f1"] == 0.0
@@ -0,0 +1,45 @@
+"""
+Tests for the fast-mode pre-filter
+"""
+
+import spacy
+from src.ner_service.ner_model import NERModel
+from src.ner_service.prefilter import EntityPrefilter, evaluate_prefilter
+
+
+def test_prefilter_signals():
+    """Test casing and digit signals"""
+    nlp = spacy.blank("en")
+    prefilter = EntityPrefilter()
+
+    assert not prefilter.has_candidates(nlp("ok see you later. thanks, I will"))
+    assert not prefilter.has_candidates(nlp("The build is green."))
+    assert prefilter.has_candidates(nlp("we met Steve yesterday"))
+    assert prefilter.has_candidates(nlp("error code 502 returned"))
+    assert not EntityPrefilter(use_digits=False).has_candidates(nlp("error code 502 returned"))
+
+
+def test_fast_mode_skips_model(rule_model_path):
+    """Test fast mode skips entity-free texts and keeps results for the rest"""
+    model = NERModel(custom_model_path=rule_model_path, fast_mode=True)
+
+    assert model.extract_entities("see you later") == []
+    results = model.batch_extract_entities(["see you later", "Steve Jobs lived in Cupertino", "ok"])
+
+    assert [len(result["entities"]) for result in results] == [0, 2, 0]
+    assert results[1]["text"] == "Steve Jobs lived in Cupertino"
+    assert model.prefilter.stats() == {"checked": 4, "skipped": 3, "skip_rate": 0.75}
+
+
+def test_evaluate_prefilter():
+    """Test skip rate and recall lost on a labeled corpus"""
+    examples = [
+        ("see you at noon", {"entities": [(11, 15, "TIME")]}),
+        ("Steve Jobs founded Apple", {"entities": [(0, 10, "PERSON"), (19, 24, "ORG")]}),
+    ]
+
+    report = evaluate_prefilter(EntityPrefilter(), spacy.blank("en"), examples)
+
+    assert report["skip_rate"] == 0.5
+    assert report["lost_entities"] == 1
+    assert report["lost_by_label"] == {"TIME": 1}
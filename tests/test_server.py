@@ -0,0 +1,80 @@
+"""
+Tests for server sizing and memory helpers
+"""
+
+import os
+import sys
+import types
+
+from src.ner_service import cpus
+from src.ner_service.cpus import available_cpus
+from src.ner_service.server import MB, memory_usage, recommended_workers
+
+
+def test_recommended_workers():
+    """Test worker count is bounded by CPUs and by memory after the shared model"""
+    assert recommended_workers(500 * MB, 200 * MB, cpus=8, memory=16000 * MB) == 8
+    assert recommended_workers(500 * MB, 200 * MB, cpus=8, memory=1500 * MB) == 4
+    assert recommended_workers(2000 * MB, 200 * MB, cpus=8, memory=1000 * MB) == 1
+
+
+def test_available_cpus_respects_cgroup_quota(monkeypatch):
+    """Test a cgroup v2 or v1 CPU quota caps the affinity mask"""
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    files = {}
+    monkeypatch.setattr(cpus, "_read", files.get)
+
+    assert available_cpus() == 8
+    files["/sys/fs/cgroup/cpu.max"] = "250000 100000"
+    assert available_cpus() == 2
+    files["/sys/fs/cgroup/cpu.max"] = "max 100000"
+    assert available_cpus() == 8
+    files.update({"/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "50000", "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000"})
+    assert available_cpus() == 1
+
+
+def test_memory_usage():
+    """Test the current process reports its memory split"""
+    usage = memory_usage(os.getpid())
+
+    assert usage["rss"] > 0
+    assert set(usage) == {"rss", "pss", "shared", "private"}
+
+
+def test_when_ready_measures_memory_before_preload(monkeypatch):
+    """Test the pool is sized from memory read before the model loads and concurrency is split across workers"""
+    from src.ner_service import gunicorn_conf as conf
+
+    events = []
+    app = types.SimpleNamespace(
+        preload_model=lambda: events.append("preload"),
+        configure_workers=lambda workers: events.append(("configure", workers))
+    )
+    monkeypatch.setitem(sys.modules, conf.APP_MODULE, app)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(conf.gc, "freeze", lambda: None)
+    monkeypatch.setattr(conf, "available_memory", lambda: events.append("memory") or 1500 * MB)
+    monkeypatch.setattr(conf, "memory_usage", lambda: {"rss": 500 * MB if "preload" in events else 0})
+    monkeypatch.setattr(conf, "recommended_workers",
+                        lambda shared, worker, memory: recommended_workers(shared, worker, cpus=8, memory=memory))
+    server = types.SimpleNamespace(num_workers=1, log=types.SimpleNamespace(info=lambda *args: None))
+
+    conf.when_ready(server)
+    assert events == ["memory", "preload", ("configure", 4)]
+    assert server.num_workers == 4
+
+
+def test_admission_slots_are_divided_across_workers(monkeypatch):
+    """Test the default in-flight limit is the CPU count divided by the worker count"""
+    from src.ner_service import main
+
+    monkeypatch.setattr(main, "admission", main.admission)
+    monkeypatch.delenv("MAX_IN_FLIGHT", raising=False)
+    monkeypatch.setattr(main, "available_cpus", lambda: 8)
+    main.configure_workers(4)
+    assert main.admission.max_in_flight == 2
+    main.configure_workers(16)
+    assert main.admission.max_in_flight == 1
+    monkeypatch.setenv("MAX_IN_FLIGHT", "3")
+    main.configure_workers(4)
+    assert main.admission.max_in_flight == 3
@@ -0,0 +1,92 @@
+"""
+Tests for shadow evaluation of a candidate model
+"""
+
+import pytest
+import spacy
+from fastapi.testclient import TestClient
+
+from src.ner_service.ner_model import NERModel
+from src.ner_service.shadow import ShadowEvaluator
+
+TEXT = "Apple Inc. was founded by Steve Jobs in Cupertino, California."
+
+
+@pytest.fixture(scope="module")
+def candidate_model_path(tmp_path_factory):
+    """Candidate that misses California and labels Steve Jobs differently"""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler", name="ner")
+    ruler.add_patterns([
+        {"label": "ORG", "pattern": "Apple Inc."},
+        {"label": "ORG", "pattern": "Steve Jobs"},
+        {"label": "GPE", "pattern": "Cupertino"},
+    ])
+    path = tmp_path_factory.mktemp("models") / "candidate"
+    nlp.to_disk(path)
+    return str(path)
+
+
+def test_agreement_per_label(rule_model_path, candidate_model_path):
+    """Test agreement treats the primary model as reference"""
+    primary = NERModel(custom_model_path=rule_model_path)
+    evaluator = ShadowEvaluator(NERModel(custom_model_path=candidate_model_path), sample_rate=1.0)
+
+    assert evaluator.submit([TEXT], [primary.extract_entities(TEXT)], 0.002)
+    assert evaluator.wait(timeout=10)
+    report = evaluator.report()
+
+    assert report["mirrored"] == 1 and report["errors"] == 0
+    assert report["agreement"]["entities"] == {"primary": 4, "candidate": 3, "matched": 2}
+    assert report["agreement"]["by_label"]["GPE"]["recall"] == 0.5
+    assert report["agreement"]["by_label"]["ORG"]["precision"] == 0.5
+    assert report["latency"]["primary"]["count"] == 1
+    evaluator.close()
+
+
+def test_backlog_drops_samples(rule_model_path):
+    """Test samples beyond the pending limit are dropped, not queued"""
+    evaluator = ShadowEvaluator(NERModel(custom_model_path=rule_model_path), max_pending=0)
+
+    assert evaluator.submit([TEXT], [[]], 0.001) is False
+    assert evaluator.report()["dropped"] == 1
+
+
+def test_shadow_report_endpoint(rule_model_path, candidate_model_path, monkeypatch):
+    """Test mirrored batch traffic shows up in the report"""
+    from src.ner_service import main
+
+    evaluator = main.ShadowEvaluator(main.NERModel(custom_model_path=candidate_model_path), sample_rate=1.0)
+    monkeypatch.setattr(main, "ner_model", main.NERModel(custom_model_path=rule_model_path))
+    monkeypatch.setattr(main, "shadow", evaluator)
+    client = TestClient(main.app)
+
+    assert client.post("/extract/batch", json={"texts": [TEXT, "Nothing to see here"]}).status_code == 200
+    evaluator.wait(timeout=10)
+    report = client.get("/shadow/report").json()
+
+    assert report["agreement"]["texts"] == 2
+    assert report["agreement"]["identical_texts"] == 1
+
+    monkeypatch.setattr(main, "shadow", None)
+    assert client.get("/shadow/report").status_code == 404
+
+
+def test_shadow_ignores_primary_model_settings(candidate_model_path, monkeypatch):
+    """Test the candidate skips the serving model's gazetteer, cascade and alias index but keeps its vocab bound"""
+    from src.ner_service import main
+
+    monkeypatch.setenv("SHADOW_MODEL_PATH", candidate_model_path)
+    monkeypatch.setenv("GAZETTEER_PATH", "/missing/gazetteer.jsonl")
+    monkeypatch.setenv("CASCADE_MODEL_PATH", "/missing/fast-model")
+    monkeypatch.setenv("ALIAS_INDEX_PATH", "/missing/aliases.idx")
+    monkeypatch.setenv("FAST_MODE", "true")
+    monkeypatch.setenv("MAX_VOCAB_GROWTH", "5000")
+    evaluator = main._create_shadow()
+
+    candidate = evaluator.candidate
+    assert candidate.custom_model_path == candidate_model_path
+    assert candidate.gazetteer_path is None and candidate.cascade_model_path is None
+    assert candidate.alias_index_path is None and candidate.prefilter is None
+    assert candidate.max_vocab_growth == 5000
+    evaluator.close()
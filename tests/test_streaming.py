@@ -0,0 +1,76 @@
+"""
+Tests for the WebSocket streaming endpoint
+"""
+
+from starlette.testclient import TestClient
+from src.ner_service import main
+from src.ner_service.ner_model import NERModel
+
+
+def test_stream_pipelined_requests(rule_model_path, monkeypatch):
+    """Test many pipelined texts are all answered by id"""
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/extract") as websocket:
+        for i in range(20):
+            websocket.send_json({"id": i, "text": "Steve Jobs lived in Cupertino" if i % 2 else "nothing here"})
+        replies = {}
+        for _ in range(20):
+            reply = websocket.receive_json()
+            replies[reply["id"]] = reply
+
+    assert sorted(replies) == list(range(20))
+    assert replies[1]["entity_count"] == 2
+    assert replies[1]["entities"][0]["label"] == "PERSON"
+    assert replies[0]["entities"] == []
+
+
+def test_stream_invalid_message(rule_model_path, monkeypatch):
+    """Test malformed messages get an error reply without closing the connection"""
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+    monkeypatch.setattr(main, "stream_limits", main.StreamLimits(max_pending=1, max_text_chars=10))
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/extract") as websocket:
+        websocket.send_json({"id": "a", "text": ""})
+        assert "error" in websocket.receive_json()
+        websocket.send_json({"id": "b", "text": "x" * 11})
+        assert websocket.receive_json() == {"id": "b", "error": "'text' exceeds 10 characters"}
+        websocket.send_json({"id": "c", "text": "Google"})
+        assert websocket.receive_json()["entity_count"] == 1
+
+
+def test_stream_malformed_frames(rule_model_path, monkeypatch):
+    """Test non-JSON and binary frames get an error reply and the connection keeps serving"""
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/extract") as websocket:
+        websocket.send_text("{not json")
+        assert websocket.receive_json() == {"id": None, "error": "Message is not valid JSON"}
+        websocket.send_bytes(b'{"id": 1, "text": "Google"}')
+        assert websocket.receive_json() == {"id": None, "error": "Messages must be JSON text frames"}
+        websocket.send_json({"id": 2, "text": "Google"})
+        assert websocket.receive_json()["entity_count"] == 1
+
+
+def test_stream_overload_and_deadline_errors(rule_model_path, monkeypatch):
+    """Test rejected batches get a retry hint and queued ones expire at the batch timeout"""
+    monkeypatch.setattr(main, "ner_model", NERModel(custom_model_path=rule_model_path))
+    controller = main.AdmissionController(max_in_flight=1, max_queue=0, retry_after=1.5)
+    # Keep the only slot busy
+    controller.in_flight = 1
+    monkeypatch.setattr(main, "admission", controller)
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/extract") as websocket:
+        websocket.send_json({"id": 1, "text": "Google"})
+        assert websocket.receive_json() == {"id": 1, "error": "Server overloaded, retry later", "retry_after": 2}
+
+    controller.lane().max_queue = 1
+    monkeypatch.setattr(main, "stream_limits", main.StreamLimits(batch_timeout_ms=50))
+    with client.websocket_connect("/ws/extract") as websocket:
+        websocket.send_json({"id": 2, "text": "Google"})
+        assert websocket.receive_json() == {"id": 2, "error": "Request deadline expired before processing"}
+    assert controller.expired == 1
@@ -0,0 +1,39 @@
+"""
+Tests for training throughput telemetry
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from src.training.telemetry import read_log
+from src.training.train_ner import NERTrainer, create_sample_training_data
+
+
+def test_train_writes_telemetry(tmp_path):
+    """Test each iteration logs throughput, phase timings and memory"""
+    trainer = NERTrainer(base_model="blank_model_for_tests", new_labels=["ORG", "PERSON", "GPE"])
+    log = tmp_path / "telemetry.jsonl"
+
+    summary = trainer.train(create_sample_training_data(), str(tmp_path / "model"), n_iter=2, telemetry_log=str(log))
+
+    runs = read_log(str(log))
+    assert len(runs) == 1
+    assert runs[0]["start"]["config"]["n_iter"] == 2
+    iterations = runs[0]["iterations"]
+    assert [record["iteration"] for record in iterations] == [1, 2]
+    assert all(record["examples"] == 6 and record["words"] > 0 for record in iterations)
+    assert set(iterations[0]["phases"]) == {"shuffle", "batching", "examples", "update"}
+    assert iterations[0]["batch_size"]["max"] >= iterations[0]["batch_size"]["min"] > 0
+    assert runs[0]["end"]["iterations"] == 2
+    assert summary["words_per_sec"] > 0 and summary["peak_rss_mb"] > 0
+
+
+def test_train_script_runs_directly(tmp_path):
+    """Test the training module runs as a script, as the quickstart suggests"""
+    script = Path(__file__).parent.parent / "src" / "training" / "train_ner.py"
+
+    result = subprocess.run([sys.executable, str(script)], cwd=tmp_path, capture_output=True, text=True, timeout=300)
+
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "custom_ner_model" / "meta.json").exists()